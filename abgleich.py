@@ -0,0 +1,118 @@
+from datetime import date
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from diagnose import gemessen
+
+
+# Hält die Karten einer Liste über Aktualisierungen hinweg am Leben, statt sie jedes Mal neu zu bauen.
+# Jede Karte ist über einen Schlüssel (Modul- bzw. Aufgaben-ID) an ihren Eintrag gebunden:
+# - erzeugen(eintrag)        → (karte, teile), teile sind die Controls, deren Eigenschaften sich ändern können
+# - aktualisieren(teile, e)  → setzt nur diese Eigenschaften
+# - zustand(eintrag)         → Tupel der angezeigten Werte; ist es unverändert, wird die Karte nicht angefasst
+# Da die Control-Instanzen erhalten bleiben, schickt page.update() nur die tatsächlich geänderten Eigenschaften.
+#
+# Mit seite > 0 werden nur die ersten `anzahl` Einträge als Karten gebaut; mehr_laden() vergrößert das Fenster
+# um eine weitere Seite (ausgelöst über nachladen_beim_scrollen, sobald das Listenende in Sicht kommt).
+class KartenListe:
+    def __init__(self, erzeugen: Callable, aktualisieren: Callable, zustand: Callable, seite: int = 0):
+        self.erzeugen = erzeugen
+        self.aktualisieren = aktualisieren
+        self.zustand = zustand
+        self.seite = seite
+        self.anzahl = seite
+        self.weitere = False
+        self._karten: Dict[Hashable, Tuple[Any, Any, tuple]] = {}
+
+    def abgleichen(self, controls: List, eintraege: Iterable[Tuple[Hashable, Any]], kopf: Iterable = ()) -> int:
+        karten = {}
+        ergebnis = list(kopf)
+        geaendert = 0
+        eintraege = iter(eintraege)
+        for schluessel, eintrag in (islice(eintraege, self.anzahl) if self.seite else eintraege):
+            zustand = self.zustand(eintrag)
+            vorher = self._karten.get(schluessel)
+            if vorher is None:
+                karte, teile = self.erzeugen(eintrag)
+                self.aktualisieren(teile, eintrag)
+                geaendert += 1
+            else:
+                karte, teile, alter_zustand = vorher
+                if zustand != alter_zustand:
+                    self.aktualisieren(teile, eintrag)
+                    geaendert += 1
+            karten[schluessel] = (karte, teile, zustand)
+            ergebnis.append(karte)
+        self._karten = karten
+        self.weitere = bool(self.seite) and next(eintraege, None) is not None
+
+        # Die Liste selbst nur ersetzen, wenn Karten hinzugekommen, weggefallen oder umsortiert sind
+        if len(ergebnis) != len(controls) or any(a is not b for a, b in zip(ergebnis, controls)):
+            controls[:] = ergebnis
+        return geaendert
+
+    def mehr_laden(self) -> bool:
+        if not self.weitere:
+            return False
+        self.anzahl += self.seite
+        return True
+
+    # Zurück auf die erste Seite, z. B. beim Wechsel des Moduls; Karten außerhalb des Fensters fallen beim nächsten Abgleich weg
+    def zuruecksetzen(self):
+        self.anzahl = self.seite
+
+
+# on_scroll-Handler für ListView: lädt die nächste Seite, sobald weniger als `puffer` Pixel bis zum Ende fehlen
+def nachladen_beim_scrollen(karten: KartenListe, neu_zeichnen: Callable, puffer: float = 600) -> Callable:
+    @gemessen
+    def beim_scrollen(e):
+        if e.pixels >= e.max_scroll_extent - puffer and karten.mehr_laden():
+            neu_zeichnen()
+    return beim_scrollen
+
+
+# Merkt sich, welche Teile der Oberfläche nach einer Änderung veraltet sind. Neu gezeichnet wird nur, was zur
+# aktiven Ansicht gehört; die übrigen Teile bleiben markiert, bis ihre Ansicht geöffnet wird.
+# Die Zeichenfunktionen rufen selbst kein page.update() auf, das erledigt der Aufrufer einmal pro Benutzeraktion.
+# Sie geben die Zahl der neu gebauten oder geänderten Karten zurück (siehe KartenListe.abgleichen); die Summe seit dem
+# letzten page.update() liefert geaendert_abholen() für die Diagnose.
+class Ansichten:
+    def __init__(self):
+        self._teile: Dict[str, Tuple[str, Callable]] = {}
+        self._veraltet: Set[str] = set()
+        self._stichtag: Optional[date] = None
+        self.aktiv: Optional[str] = None
+        self._geaendert = 0
+
+    def registrieren(self, teil: str, ansicht: str, zeichnen: Callable):
+        self._teile[teil] = (ansicht, gemessen(zeichnen))
+        self._veraltet.add(teil)
+
+    # Ohne Angabe gelten alle Teile als veraltet
+    def veraltet(self, *teile: str):
+        self._veraltet.update(teile or self._teile)
+
+    def ist_veraltet(self, teil: str) -> bool:
+        return teil in self._veraltet
+
+    def zeichnen(self, ansicht: Optional[str] = None, heute: Optional[date] = None) -> List[str]:
+        if ansicht is not None:
+            self.aktiv = ansicht
+
+        # Überfällig/heute hängen vom Datum ab; nach Mitternacht ist daher alles neu zu zeichnen
+        heute = heute or date.today()
+        if heute != self._stichtag:
+            self._stichtag = heute
+            self._veraltet.update(self._teile)
+
+        gezeichnet = []
+        for teil, (teil_ansicht, zeichnen) in self._teile.items():
+            if teil_ansicht == self.aktiv and teil in self._veraltet:
+                self._veraltet.discard(teil)
+                self._geaendert += zeichnen() or 0
+                gezeichnet.append(teil)
+        return gezeichnet
+
+    def geaendert_abholen(self) -> int:
+        geaendert, self._geaendert = self._geaendert, 0
+        return geaendert
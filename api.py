@@ -0,0 +1,403 @@
+import argparse
+import json
+import re
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from modell import Modul, Aufgabe, MODUL_FELDER, AUFGABE_FELDER, datum_parsen
+from datenaustausch import aufgabe_passt
+from speicher import DateiGesperrt
+from studienplaner import StudienplanerApp
+
+# Lokale JSON-API über dasselbe Modell wie die Oberfläche, ohne Flet:
+#   GET    /module                              Module mit Zählern (ohne Aufgaben)
+#   POST   /module                              {"name", "farbe"?, "beschreibung"?}
+#   GET    /module/<id>                         Modul samt Aufgaben (?erledigt=, ?von=, ?bis=)
+#   PATCH  /module/<id>                         {"name"?, "farbe"?, "beschreibung"?}
+#   DELETE /module/<id>
+#   POST   /module/<id>/aufgaben                {"titel", "beschreibung"?, "faelligkeitsdatum"?, "prioritaet"?}
+#   GET    /aufgaben                            Suche: ?q=, ?prioritaet=, ?erledigt=, ?von=, ?bis=, ?limit=
+#   GET    /aufgaben/<id>
+#   PATCH  /aufgaben/<id>                       Felder wie beim Anlegen
+#   POST   /aufgaben/<id>/umschalten            erledigt ↔ offen
+#   DELETE /aufgaben/<id>
+#   POST   /aufgaben/stapel                     {"aktion": "erledigt" | "offen" | "loeschen" | "aendern" |
+#                                                "verschieben" | "faelligkeit", "ids": [...], ...}
+#   GET    /kalender                            offene Aufgaben bis Ende des nächsten Monats (?heute=)
+#   GET    /dashboard                           Kennzahlen (?heute=)
+#   POST   /speichern                           kompletter Snapshot (wie Ctrl+S)
+# Das Modell bleibt zwischen den Anfragen im Speicher; Änderungen gehen wie in der Oberfläche ins Journal.
+# Pro Datendatei darf nur ein Prozess schreiben; die Sperrdatei daneben (siehe speicher.DateiSperre) setzt das durch.
+
+
+# Obergrenze für den JSON-Inhalt einer Anfrage; reicht für Stapelaktionen mit vielen tausend IDs
+MAX_INHALT = 1024 * 1024
+
+
+class ApiFehler(Exception):
+    def __init__(self, status: int, text: str):
+        super().__init__(text)
+        self.status = status
+        self.text = text
+
+
+def modul_daten(modul: Modul, heute: Optional[date] = None) -> Dict:
+    anzahl, erledigt, ueberfaellig = modul.zaehler(heute)
+    return {
+        "id": modul.id,
+        "name": modul.name,
+        "farbe": modul.farbe,
+        "beschreibung": modul.beschreibung,
+        "erstellt_am": modul.erstellt_am,
+        "anzahl": anzahl,
+        "erledigt": erledigt,
+        "ueberfaellig": ueberfaellig
+    }
+
+
+def aufgabe_daten(aufgabe: Aufgabe, modul: Modul) -> Dict:
+    daten = aufgabe.to_dict()
+    daten["modul_id"] = modul.id
+    return daten
+
+
+def _datum(text: Optional[str], name: str) -> Optional[date]:
+    if not text:
+        return None
+    datum = datum_parsen(text)
+    if datum is None:
+        raise ApiFehler(400, f"Ungültiges Datum für '{name}': {text}")
+    return datum
+
+
+def _wahrheitswert(text: Optional[str], name: str) -> Optional[bool]:
+    if text is None or text == "":
+        return None
+    if text.lower() in ("1", "true", "ja"):
+        return True
+    if text.lower() in ("0", "false", "nein"):
+        return False
+    raise ApiFehler(400, f"Ungültiger Wert für '{name}': {text}")
+
+
+# Nur bekannte Felder übernehmen und Texte prüfen; leere Fälligkeit heißt "keine"
+def _felder(daten: Dict, erlaubt: Tuple[str, ...]) -> Dict:
+    felder = {}
+    for feld in erlaubt:
+        if feld not in daten:
+            continue
+        wert = daten[feld]
+        if feld == "faelligkeitsdatum":
+            if wert in (None, ""):
+                wert = None
+            elif not isinstance(wert, str) or datum_parsen(wert) is None:
+                raise ApiFehler(400, f"Ungültiges Datum für 'faelligkeitsdatum': {wert}")
+        elif not isinstance(wert, str):
+            raise ApiFehler(400, f"'{feld}' muss ein Text sein")
+        else:
+            wert = wert.strip()
+        felder[feld] = wert
+    for feld in ("name", "titel"):
+        if feld in felder and not felder[feld]:
+            raise ApiFehler(400, f"'{feld}' darf nicht leer sein")
+    return felder
+
+
+class StudienplanerApi:
+    def __init__(self, app: StudienplanerApp):
+        self.app = app
+        # (Methode, Muster, Handler); Gruppen im Muster werden als Argumente übergeben
+        self.routen = [
+            ("GET", r"/module", self.module_liste),
+            ("POST", r"/module", self.modul_anlegen),
+            ("GET", r"/module/([0-9a-f]+)", self.modul_lesen),
+            ("PATCH", r"/module/([0-9a-f]+)", self.modul_aendern),
+            ("DELETE", r"/module/([0-9a-f]+)", self.modul_loeschen),
+            ("POST", r"/module/([0-9a-f]+)/aufgaben", self.aufgabe_anlegen),
+            ("GET", r"/aufgaben", self.aufgaben_suchen),
+            ("POST", r"/aufgaben/stapel", self.stapel),
+            ("GET", r"/aufgaben/([0-9a-f]+)", self.aufgabe_lesen),
+            ("PATCH", r"/aufgaben/([0-9a-f]+)", self.aufgabe_aendern),
+            ("POST", r"/aufgaben/([0-9a-f]+)/umschalten", self.aufgabe_umschalten),
+            ("DELETE", r"/aufgaben/([0-9a-f]+)", self.aufgabe_loeschen),
+            ("GET", r"/kalender", self.kalender),
+            ("GET", r"/dashboard", self.dashboard),
+            ("POST", r"/speichern", self.speichern),
+        ]
+        self.routen = [(methode, re.compile(muster + r"/?"), handler) for methode, muster, handler in self.routen]
+
+    # Führt eine Anfrage aus und gibt (Status, JSON-Antwort) zurück
+    def bearbeiten(self, methode: str, pfad: str, parameter: Dict[str, str], daten: Optional[Dict]) -> Tuple[int, object]:
+        pfad_passt = False
+        for routen_methode, muster, handler in self.routen:
+            treffer = muster.fullmatch(pfad)
+            if treffer is None:
+                continue
+            pfad_passt = True
+            if routen_methode == methode:
+                try:
+                    return handler(parameter, daten or {}, *treffer.groups())
+                except ApiFehler as e:
+                    return e.status, {"fehler": e.text}
+        if pfad_passt:
+            return 405, {"fehler": f"Methode {methode} nicht erlaubt"}
+        return 404, {"fehler": f"Unbekannter Pfad: {pfad}"}
+
+    def _modul(self, modul_id: str) -> Modul:
+        modul = self.app.modul_nach_id(modul_id)
+        if modul is None:
+            raise ApiFehler(404, f"Modul {modul_id} nicht gefunden")
+        return modul
+
+    def _aufgabe(self, aufgabe_id: str) -> Tuple[Aufgabe, Modul]:
+        eintrag = self.app.aufgabe_nach_id(aufgabe_id)
+        if eintrag is None:
+            raise ApiFehler(404, f"Aufgabe {aufgabe_id} nicht gefunden")
+        return eintrag
+
+    # Wie in der Oberfläche: ein einmal erzeugter Kalender-Feed wird nach Änderungen im Hintergrund nachgeführt
+    def _geaendert(self):
+        if self.app.ics_aktiv:
+            self.app.ics_aktualisieren(im_hintergrund=True)
+
+    def module_liste(self, parameter, daten):
+        heute = date.today()
+        with self.app.sperre:
+            return 200, [modul_daten(modul, heute) for modul in self.app.module]
+
+    def modul_anlegen(self, parameter, daten):
+        felder = _felder(daten, MODUL_FELDER)
+        if not felder.get("name"):
+            raise ApiFehler(400, "'name' fehlt")
+        modul = Modul(felder["name"], felder.get("farbe") or "#2196F3", felder.get("beschreibung", ""))
+        self.app.modul_hinzufuegen(modul)
+        self._geaendert()
+        return 201, modul_daten(modul)
+
+    def modul_lesen(self, parameter, daten, modul_id):
+        erledigt = _wahrheitswert(parameter.get("erledigt"), "erledigt")
+        von, bis = _datum(parameter.get("von"), "von"), _datum(parameter.get("bis"), "bis")
+        with self.app.sperre:
+            modul = self._modul(modul_id)
+            antwort = modul_daten(modul)
+            antwort["aufgaben"] = [aufgabe_daten(aufgabe, modul) for aufgabe in modul.aufgaben
+                                   if aufgabe_passt(aufgabe, erledigt, von, bis)]
+        return 200, antwort
+
+    def modul_aendern(self, parameter, daten, modul_id):
+        felder = _felder(daten, MODUL_FELDER)
+        with self.app.sperre:
+            modul = self._modul(modul_id)
+            self.app.modul_aktualisieren(modul, **felder)
+        self._geaendert()
+        return 200, modul_daten(modul)
+
+    def modul_loeschen(self, parameter, daten, modul_id):
+        self.app.modul_loeschen(self._modul(modul_id))
+        self._geaendert()
+        return 200, {"geloescht": modul_id}
+
+    def aufgabe_anlegen(self, parameter, daten, modul_id):
+        felder = _felder(daten, AUFGABE_FELDER)
+        if not felder.get("titel"):
+            raise ApiFehler(400, "'titel' fehlt")
+        aufgabe = Aufgabe(felder["titel"], felder.get("beschreibung", ""), felder.get("faelligkeitsdatum"),
+                          felder.get("prioritaet") or "Normal")
+        with self.app.sperre:
+            modul = self._modul(modul_id)
+            self.app.aufgabe_hinzufuegen(modul, aufgabe)
+        self._geaendert()
+        return 201, aufgabe_daten(aufgabe, modul)
+
+    def aufgaben_suchen(self, parameter, daten):
+        try:
+            limit = int(parameter.get("limit", 200))
+        except ValueError:
+            raise ApiFehler(400, f"Ungültiger Wert für 'limit': {parameter['limit']}")
+        with self.app.sperre:
+            treffer = self.app.aufgaben_suchen(
+                parameter.get("q", ""),
+                prioritaet=parameter.get("prioritaet") or None,
+                erledigt=_wahrheitswert(parameter.get("erledigt"), "erledigt"),
+                von=_datum(parameter.get("von"), "von"),
+                bis=_datum(parameter.get("bis"), "bis"),
+                limit=limit if limit > 0 else None
+            )
+            return 200, [aufgabe_daten(aufgabe, modul) for aufgabe, modul in treffer]
+
+    def aufgabe_lesen(self, parameter, daten, aufgabe_id):
+        with self.app.sperre:
+            return 200, aufgabe_daten(*self._aufgabe(aufgabe_id))
+
+    def aufgabe_aendern(self, parameter, daten, aufgabe_id):
+        felder = _felder(daten, AUFGABE_FELDER)
+        with self.app.sperre:
+            aufgabe, modul = self._aufgabe(aufgabe_id)
+            self.app.aufgabe_aktualisieren(modul, aufgabe, **felder)
+            antwort = aufgabe_daten(aufgabe, modul)
+        self._geaendert()
+        return 200, antwort
+
+    def aufgabe_umschalten(self, parameter, daten, aufgabe_id):
+        with self.app.sperre:
+            aufgabe, modul = self._aufgabe(aufgabe_id)
+            self.app.aufgabe_umschalten(modul, aufgabe)
+            antwort = aufgabe_daten(aufgabe, modul)
+        self._geaendert()
+        return 200, antwort
+
+    def aufgabe_loeschen(self, parameter, daten, aufgabe_id):
+        with self.app.sperre:
+            aufgabe, modul = self._aufgabe(aufgabe_id)
+            self.app.aufgabe_loeschen(modul, aufgabe)
+        self._geaendert()
+        return 200, {"geloescht": aufgabe_id}
+
+    # Sammelaktionen wie in der Mehrfachauswahl der Oberfläche: eine Journal-Zeile pro Anfrage
+    def stapel(self, parameter, daten):
+        ids = daten.get("ids")
+        if not isinstance(ids, list) or not all(isinstance(aufgabe_id, str) for aufgabe_id in ids):
+            raise ApiFehler(400, "'ids' muss eine Liste von Aufgaben-IDs sein")
+        aktion = daten.get("aktion")
+        if aktion in ("erledigt", "offen"):
+            anzahl = self.app.aufgaben_status_setzen(ids, aktion == "erledigt")
+        elif aktion == "loeschen":
+            anzahl = self.app.aufgaben_loeschen(ids)
+        elif aktion == "aendern":
+            felder = _felder(daten.get("felder") or {}, AUFGABE_FELDER)
+            anzahl = self.app.aufgaben_aktualisieren(ids, **felder) if felder else 0
+        elif aktion == "verschieben":
+            with self.app.sperre:
+                anzahl = self.app.aufgaben_verschieben(ids, self._modul(str(daten.get("modul_id"))))
+        elif aktion == "faelligkeit":
+            tage = daten.get("tage")
+            if not isinstance(tage, int) or isinstance(tage, bool):
+                raise ApiFehler(400, "'tage' muss eine ganze Zahl sein")
+            anzahl = self.app.aufgaben_faelligkeit_verschieben(ids, tage)
+        else:
+            raise ApiFehler(400, f"Unbekannte Aktion: {aktion}")
+        if anzahl:
+            self._geaendert()
+        return 200, {"geaendert": anzahl}
+
+    def kalender(self, parameter, daten):
+        heute = _datum(parameter.get("heute"), "heute") or date.today()
+        with self.app.sperre:
+            return 200, [dict(aufgabe_daten(aufgabe, modul), ueberfaellig=faellig < heute)
+                         for faellig, aufgabe, modul in self.app.kalender_eintraege(heute)]
+
+    def dashboard(self, parameter, daten):
+        heute = _datum(parameter.get("heute"), "heute") or date.today()
+        with self.app.sperre:
+            zahlen = self.app.dashboard_zahlen(heute)
+            zahlen["module"] = [dict(id=modul.id, name=modul.name, anzahl=anzahl, erledigt=erledigt)
+                                for modul, (anzahl, erledigt) in zip(self.app.module, zahlen["module"])]
+        return 200, zahlen
+
+    def speichern(self, parameter, daten):
+        self.app.daten_speichern()
+        if self.app.speicher.letzter_fehler:
+            raise ApiFehler(500, f"Fehler beim Speichern: {self.app.speicher.letzter_fehler}")
+        return 200, {"gespeichert": True}
+
+
+class _AnfrageHandler(BaseHTTPRequestHandler):
+    # Keep-alive, damit Skripte viele Anfragen über eine Verbindung schicken können; ohne Nagle, sonst wartet
+    # jede Antwort (Kopf und Inhalt in zwei Paketen) auf das verzögerte ACK des Clients
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    api: StudienplanerApi = None
+
+    def _bearbeiten(self):
+        teile = urlsplit(self.path)
+        parameter = {name: werte[-1] for name, werte in parse_qs(teile.query).items()}
+        daten = None
+        try:
+            laenge = self._inhalt_laenge()
+        except ApiFehler as e:
+            # Der Inhalt bleibt ungelesen im Socket; die Verbindung kann daher nicht weiterverwendet werden
+            self.close_connection = True
+            return self._antworten(e.status, {"fehler": e.text})
+        if laenge:
+            try:
+                daten = json.loads(self.rfile.read(laenge))
+            except (ValueError, UnicodeDecodeError) as e:
+                return self._antworten(400, {"fehler": f"Ungültiges JSON: {e}"})
+            if not isinstance(daten, dict):
+                return self._antworten(400, {"fehler": "JSON-Objekt erwartet"})
+        try:
+            status, antwort = self.api.bearbeiten(self.command, teile.path, parameter, daten)
+        except Exception as e:
+            print(f"Fehler in der API ({self.command} {self.path}): {e}")
+            status, antwort = 500, {"fehler": str(e)}
+        self._antworten(status, antwort)
+
+    # Länge des Anfrage-Inhalts aus Content-Length; ohne Kopfzeile gibt es keinen Inhalt. Ein Inhalt ohne Längenangabe
+    # (Transfer-Encoding: chunked) wird nicht unterstützt, zu große werden abgelehnt, bevor etwas gelesen wird
+    def _inhalt_laenge(self) -> int:
+        angabe = self.headers.get("Content-Length")
+        if angabe is None:
+            if self.headers.get("Transfer-Encoding"):
+                raise ApiFehler(411, "Content-Length fehlt")
+            return 0
+        try:
+            laenge = int(angabe)
+        except ValueError:
+            raise ApiFehler(400, f"Ungültige Content-Length: {angabe!r}")
+        if laenge < 0:
+            raise ApiFehler(400, f"Ungültige Content-Length: {angabe!r}")
+        if laenge > MAX_INHALT:
+            raise ApiFehler(413, f"Inhalt zu groß (höchstens {MAX_INHALT} Bytes)")
+        return laenge
+
+    def _antworten(self, status: int, antwort):
+        inhalt = json.dumps(antwort, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(inhalt)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(inhalt)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _bearbeiten
+
+    # Keine Zeile pro Anfrage auf der Konsole
+    def log_message(self, format, *args):
+        pass
+
+
+def server_erzeugen(app: StudienplanerApp, host: str = "127.0.0.1", port: int = 8551) -> ThreadingHTTPServer:
+    handler = type("AnfrageHandler", (_AnfrageHandler,), {"api": StudienplanerApi(app)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argumente: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Studienplaner als lokale JSON-API (ohne Oberfläche)")
+    parser.add_argument("--datei", default="studienplaner_data.json", help="Datendatei")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8551)
+    argumente = parser.parse_args(argumente)
+
+    # Nur ein Prozess darf die Datei schreiben; läuft schon die Oberfläche oder eine zweite API darauf, nicht starten
+    try:
+        app = StudienplanerApp.geteilt(argumente.datei)
+    except DateiGesperrt as e:
+        parser.exit(1, f"{e}\n")
+    server = server_erzeugen(app, argumente.host, argumente.port)
+    print(f"Studienplaner-API auf http://{argumente.host}:{server.server_port}/ ({argumente.datei})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        app.ausstehendes_speichern()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from modell import Modul, Aufgabe, Prioritaet
+from abgleich import KartenListe
+from studienplaner import StudienplanerApp
+
+# Benchmarks auf synthetischen Daten: python benchmark.py [--groesse klein mittel ...] [--baseline-schreiben]
+# Jeder Fall meldet p50/p99 der Laufzeit, Durchsatz (Aufgaben bzw. Aktionen pro Sekunde) und den Spitzenwert
+# des Speichers (tracemalloc, in einem eigenen Lauf, damit die Zeitmessung nicht verfälscht wird).
+# Mit vorhandener Baseline (benchmark_baseline.json) werden Fälle, deren p50 um mehr als die Toleranz
+# schlechter ist, als Regression gemeldet; der Exit-Code ist dann 1. Baselines sind rechnerabhängig und
+# gehören daher nicht ins Repository.
+
+# (Module, Aufgaben insgesamt)
+GROESSEN = {
+    "klein": (10, 500),
+    "mittel": (100, 10_000),
+    "gross": (1_000, 100_000),
+    "riesig": (10_000, 1_000_000),
+}
+
+FAECHER = ["Analysis", "Lineare Algebra", "Programmierung", "Datenbanken", "Statistik", "Mikroökonomie",
+           "Experimentalphysik", "Organische Chemie", "Öffentliches Recht", "Business English", "Rechnernetze",
+           "Theoretische Informatik", "Buchführung", "Soziologie", "Kunstgeschichte"]
+TITEL = ["Übungsblatt", "Vorlesung nacharbeiten", "Klausurvorbereitung", "Hausarbeit", "Praktikumsprotokoll",
+         "Referat", "Kapitel lesen", "Projektmeilenstein", "Tutorium", "Altklausur rechnen"]
+BESCHREIBUNGEN = ["", "", "Aufgaben 1-4, Abgabe im Moodle", "Folien und Skript Kapitel 3",
+                  "Mit der Lerngruppe besprechen", "Literaturliste durchgehen und zusammenfassen"]
+FARBEN = ["#2196F3", "#4CAF50", "#FF9800", "#9C27B0", "#F44336", "#009688"]
+PRIORITAETEN = [p.value for p in Prioritaet]
+PRIORITAET_GEWICHTE = [3, 2, 2, 1, 6]
+
+
+# Reproduzierbarer Studienplaner: Modulgrößen schwanken um den Mittelwert, Fälligkeiten liegen zwischen vier Monaten
+# in der Vergangenheit und einem halben Jahr in der Zukunft (teils mit Uhrzeit, teils ohne Datum), vergangene
+# Aufgaben sind überwiegend erledigt. IDs kommen ebenfalls aus dem Zufallsgenerator.
+def planer_erzeugen(anzahl_module: int, anzahl_aufgaben: int, seed: int = 42,
+                    heute: Optional[date] = None) -> List[Modul]:
+    zufall = random.Random(seed)
+    heute = heute or date.today()
+    neue_id = lambda: "%032x" % zufall.getrandbits(128)
+
+    gewichte = [zufall.uniform(0.5, 1.5) for _ in range(anzahl_module)]
+    summe = sum(gewichte)
+    groessen = [int(anzahl_aufgaben * gewicht / summe) for gewicht in gewichte]
+    groessen[-1] += anzahl_aufgaben - sum(groessen)
+
+    module = []
+    for nummer, groesse in enumerate(groessen):
+        fach = FAECHER[nummer % len(FAECHER)]
+        modul = Modul(f"{fach} {nummer // len(FAECHER) + 1}", zufall.choice(FARBEN), zufall.choice(BESCHREIBUNGEN),
+                      datetime(2026, 4, 1).isoformat(), neue_id())
+        aufgaben = []
+        for i in range(groesse):
+            art = zufall.random()
+            tag = heute + timedelta(days=zufall.randint(-120, 180))
+            if art < 0.15:
+                faelligkeit = None
+            elif art < 0.75:
+                faelligkeit = tag.isoformat()
+            else:
+                faelligkeit = datetime(tag.year, tag.month, tag.day, zufall.choice((8, 10, 12, 14, 23)), 59).isoformat()
+            aufgabe = Aufgabe(f"{zufall.choice(TITEL)} {i + 1}", zufall.choice(BESCHREIBUNGEN), faelligkeit,
+                              zufall.choices(PRIORITAETEN, PRIORITAET_GEWICHTE)[0],
+                              datetime(2026, 4, 1).isoformat(), neue_id())
+            aufgabe.erledigt = zufall.random() < (0.7 if faelligkeit and tag < heute else 0.2)
+            aufgaben.append(aufgabe)
+        modul.aufgaben = aufgaben
+        module.append(modul)
+    return module
+
+
+def _perzentil(werte: List[float], anteil: float) -> float:
+    sortiert = sorted(werte)
+    return sortiert[max(0, min(len(sortiert) - 1, math.ceil(anteil * len(sortiert)) - 1))]
+
+
+# Führt `fall` einmal unter tracemalloc (Spitzenwert) und dann `wiederholungen`-mal ungestört aus.
+# `vorbereiten` läuft vor jedem Durchlauf und wird nicht mitgemessen.
+def messen(fall: Callable, wiederholungen: int, einheiten: int,
+           vorbereiten: Optional[Callable] = None) -> Dict[str, float]:
+    if vorbereiten:
+        vorbereiten()
+    gc.collect()
+    tracemalloc.start()
+    fall()
+    spitze = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    zeiten = []
+    for _ in range(wiederholungen):
+        if vorbereiten:
+            vorbereiten()
+        start = time.perf_counter()
+        fall()
+        zeiten.append(time.perf_counter() - start)
+    p50 = _perzentil(zeiten, 0.5)
+    return {
+        "p50_ms": p50 * 1000,
+        "p99_ms": _perzentil(zeiten, 0.99) * 1000,
+        "durchsatz": einheiten / p50 if p50 > 0 else float("inf"),
+        "spitze_mb": spitze / 1024 / 1024,
+    }
+
+
+# Kopflose Seite für die Zeichenfälle: nimmt nur Controls auf und zählt update()-Aufrufe
+class SeitenAttrappe:
+    def __init__(self):
+        self.controls: List = []
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+# Kalender wie aktualisiere_kalender() in main.py: Einträge holen und mit der KartenListe abgleichen;
+# statt Flet-Controls entstehen einfache Dicts, gemessen wird also Datenaufbereitung und Abgleich
+def _kalender_zeichnen(app: StudienplanerApp, karten: KartenListe, seite: SeitenAttrappe, heute: date):
+    eintraege = app.kalender_eintraege(heute)
+    karten.abgleichen(seite.controls, (
+        (aufgabe.id, (faellig, aufgabe, modul, faellig == heute, faellig < heute and not aufgabe.erledigt))
+        for faellig, aufgabe, modul in eintraege
+    ))
+    seite.update()
+
+
+# Dashboard wie aktualisiere_dashboard(): Kennzahlen plus eine Zeile pro Modul
+def _dashboard_zeichnen(app: StudienplanerApp, seite: SeitenAttrappe, heute: date):
+    zahlen = app.dashboard_zahlen(heute)
+    seite.controls[:] = [{"gesamt": zahlen["gesamt"], "erledigt": zahlen["erledigt"], "ueberfaellig": zahlen["ueberfaellig"]}]
+    seite.controls.extend({"name": modul.name, "fortschritt": erledigt / anzahl if anzahl else 0}
+                          for modul, (anzahl, erledigt) in zip(app.module, zahlen["module"]))
+    seite.update()
+
+
+def groesse_messen(name: str, anzahl_module: int, anzahl_aufgaben: int, verzeichnis: str,
+                   wiederholungen: Optional[int], seed: int) -> Dict[str, Dict[str, float]]:
+    heute = date.today()
+    pfad = os.path.join(verzeichnis, name, "studienplaner_data.json")
+    app = StudienplanerApp(pfad)
+    app.module = planer_erzeugen(anzahl_module, anzahl_aufgaben, seed, heute)
+    app.daten_speichern()
+    app.schliessen()
+    del app
+    gc.collect()
+
+    # Teure Fälle laufen seltener als die, die pro Klick anfallen
+    selten = wiederholungen or (3 if anzahl_aufgaben > 200_000 else 5)
+    oft = wiederholungen or 50
+    ergebnisse = {}
+
+    def fall(fall_name: str, funktion: Callable, anzahl: int, einheiten: int, vorbereiten: Optional[Callable] = None):
+        ergebnisse[fall_name] = messen(funktion, anzahl, einheiten, vorbereiten)
+        werte = ergebnisse[fall_name]
+        print(f"  {fall_name:<22} p50 {werte['p50_ms']:9.2f} ms   p99 {werte['p99_ms']:9.2f} ms   "
+              f"{werte['durchsatz']:12.0f}/s   Spitze {werte['spitze_mb']:8.1f} MB", flush=True)
+
+    # Laden: jede Wiederholung mit frischer App, damit keine abgeleiteten Daten mitgemessen werden
+    apps = []
+    def neue_app():
+        if apps:
+            apps.pop().schliessen()
+        apps.append(StudienplanerApp(pfad))
+    fall("daten_laden", lambda: apps[-1].daten_laden(), selten, anzahl_aufgaben, neue_app)
+    # Laden plus erste Zählung (Dashboard) und erster Datumsindex (Kalender), wie beim ersten Seitenaufbau
+    fall("laden_und_uebersicht", lambda: (apps[-1].daten_laden(), apps[-1].dashboard_zahlen(heute),
+                                          apps[-1].kalender_eintraege(heute)), selten, anzahl_aufgaben, neue_app)
+    app = apps.pop()
+
+    fall("daten_speichern", app.daten_speichern, selten, anzahl_aufgaben)
+    fall("export_csv", app.export_csv, selten, anzahl_aufgaben)
+
+    def backup_leeren():
+        shutil.rmtree(app.sicherungen.verzeichnis, ignore_errors=True)
+        app.sicherungen.alles_veraltet()
+    fall("backup_voll", app.backup_erstellen, selten, anzahl_aufgaben, backup_leeren)
+    erstes_modul = next(iter(app.module))
+    fall("backup_inkrementell", app.backup_erstellen, oft, 1,
+         lambda: app.modul_aktualisieren(erstes_modul, beschreibung=str(time.perf_counter())))
+
+    seite = SeitenAttrappe()
+    kalender_karten = KartenListe(lambda eintrag: ({}, {}), lambda teile, eintrag: None, lambda eintrag: eintrag[3:], seite=40)
+    fall("kalender_zeichnen", lambda: _kalender_zeichnen(app, kalender_karten, seite, heute), oft, 1)
+    fall("dashboard_zeichnen", lambda: _dashboard_zeichnen(app, seite, heute), oft, 1)
+    fall("suche", lambda: app.aufgaben_suchen("klausur", erledigt=False), oft, 1)
+
+    # Eine Benutzeraktion: Status umschalten und den Journal-Eintrag schreiben
+    aufgabe = next(iter(erstes_modul.aufgaben))
+    def umschalten():
+        app.aufgabe_umschalten(erstes_modul, aufgabe)
+        app.ausstehendes_speichern()
+    fall("aufgabe_umschalten", umschalten, oft, 1)
+
+    app.schliessen()
+    return ergebnisse
+
+
+# Vergleicht mit der Baseline; gibt die Regressionen als Text zurück
+def vergleichen(ergebnisse: Dict, baseline: Dict, toleranz: float) -> List[str]:
+    regressionen = []
+    for groesse, faelle in ergebnisse.items():
+        for fall_name, werte in faelle.items():
+            alt = baseline.get(groesse, {}).get(fall_name)
+            if not alt:
+                continue
+            faktor = werte["p50_ms"] / alt["p50_ms"] if alt["p50_ms"] else 1.0
+            if faktor > 1 + toleranz:
+                regressionen.append(f"{groesse}/{fall_name}: p50 {alt['p50_ms']:.2f} → {werte['p50_ms']:.2f} ms "
+                                    f"(+{(faktor - 1) * 100:.0f} %)")
+    return regressionen
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks des Studienplaners auf synthetischen Daten")
+    parser.add_argument("--groesse", nargs="+", choices=list(GROESSEN), default=["klein", "mittel", "gross"])
+    parser.add_argument("--wiederholungen", type=int, help="Wiederholungen pro Fall (Standard: je nach Fall 3-50)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--speicher", choices=["json", "sqlite"], default=os.environ.get("STUDIENPLANER_SPEICHER", "json"))
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--baseline-schreiben", action="store_true", help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--toleranz", type=float, default=0.25, help="erlaubte Verschlechterung von p50 (0.25 = 25 %%)")
+    argumente = parser.parse_args(argumente)
+
+    os.environ["STUDIENPLANER_SPEICHER"] = argumente.speicher
+    baseline_pfad = os.path.abspath(argumente.baseline)
+    ergebnisse = {}
+    arbeitsverzeichnis = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="studienplaner_benchmark_") as verzeichnis:
+        # Export und Kalender-Feed schreiben relativ zum Arbeitsverzeichnis
+        os.chdir(verzeichnis)
+        try:
+            for groesse in argumente.groesse:
+                anzahl_module, anzahl_aufgaben = GROESSEN[groesse]
+                print(f"{groesse}: {anzahl_module} Module, {anzahl_aufgaben} Aufgaben ({argumente.speicher})", flush=True)
+                ergebnisse[groesse] = groesse_messen(groesse, anzahl_module, anzahl_aufgaben, verzeichnis,
+                                                     argumente.wiederholungen, argumente.seed)
+        finally:
+            os.chdir(arbeitsverzeichnis)
+
+    if argumente.baseline_schreiben:
+        with open(baseline_pfad, "w", encoding="utf-8") as f:
+            json.dump(ergebnisse, f, indent=1)
+        print(f"Baseline gespeichert: {baseline_pfad}")
+        return 0
+    if not os.path.exists(baseline_pfad):
+        print(f"Keine Baseline unter {baseline_pfad}; mit --baseline-schreiben anlegen")
+        return 0
+    with open(baseline_pfad, "r", encoding="utf-8") as f:
+        regressionen = vergleichen(ergebnisse, json.load(f), argumente.toleranz)
+    for regression in regressionen:
+        print(f"REGRESSION {regression}")
+    if not regressionen:
+        print("Keine Regressionen gegenüber der Baseline")
+    return 1 if regressionen else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+import os
+import struct
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional
+
+from modell import Modul, neue_id
+
+# Kompaktes Binärformat für den Snapshot (optional neben studienplaner_data.json).
+#
+# Aufbau: Kopf | Aufgaben-Blöcke | Modul-Tabelle | String-Tabelle
+# - jeder Datensatz ist längenpräfixiert (u32), damit spätere Versionen Felder anhängen können
+# - alle Texte stehen genau einmal in der String-Tabelle (Prioritäten, Farben usw. wiederholen sich oft)
+# - Fälligkeitsdaten sind Tagesnummern (date.toordinal), Zeitstempel Mikrosekunden seit 0001-01-01
+# Beim Laden wird die Datei in einem Stück gelesen und gleich wieder geschlossen, Aufgaben werden erst beim Zugriff
+# dekodiert. Kein mmap: solange Module noch nicht geladen sind, bliebe die Datei eingeblendet, und unter Windows
+# ließe sie sich dann beim nächsten Snapshot nicht ersetzen.
+MAGIC = b"SPLB"
+VERSION = 2
+KOPF = struct.Struct("<4sHIIQQ")        # Magic, Version, Anzahl Strings, Anzahl Module, Offset Strings, Offset Module
+LAENGE = struct.Struct("<I")
+MODUL = struct.Struct("<IIIIIqIQ")      # ID, Name, Farbe, Beschreibung, erstellt_am (Text), erstellt_am (µs), Anzahl Aufgaben, Offset Aufgaben
+AUFGABE = struct.Struct("<IIIiIIBIq")   # ID, Titel, Beschreibung, Tag, Datum (Text), Priorität, erledigt, erstellt_am (Text), erstellt_am (µs)
+KEIN = 0xFFFFFFFF
+KEINE_ZEIT = -1
+_NULLPUNKT = datetime(1, 1, 1)
+
+
+def _tag(faelligkeitsdatum: Optional[str]):
+    # (Tagesnummer, None) für reine Datumsangaben, sonst (0, Originaltext)
+    if not faelligkeitsdatum:
+        return 0, None
+    try:
+        tag = date.fromisoformat(faelligkeitsdatum)
+        if tag.isoformat() == faelligkeitsdatum:
+            return tag.toordinal(), None
+    except ValueError:
+        pass
+    return 0, faelligkeitsdatum
+
+
+def _zeit(zeitstempel: Optional[str]):
+    # (Mikrosekunden, None), wenn sich der Text verlustfrei zurückgewinnen lässt, sonst (KEINE_ZEIT, Originaltext)
+    if zeitstempel:
+        try:
+            wert = datetime.fromisoformat(zeitstempel)
+            if wert.tzinfo is None and wert.isoformat() == zeitstempel:
+                return (wert - _NULLPUNKT) // timedelta(microseconds=1), None
+        except ValueError:
+            pass
+    return KEINE_ZEIT, zeitstempel
+
+
+class _StringTabelle:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.werte: List[bytes] = []
+
+    def id(self, wert: Optional[str]) -> int:
+        if wert is None:
+            return KEIN
+        sid = self.ids.get(wert)
+        if sid is None:
+            sid = self.ids[wert] = len(self.werte)
+            self.werte.append(wert.encode("utf-8"))
+        return sid
+
+
+def schreiben(module_daten: List[Dict], pfad: str):
+    strings = _StringTabelle()
+    puffer = bytearray(KOPF.size)
+
+    modul_saetze = []
+    for modul_data in module_daten:
+        aufgaben_offset = len(puffer)
+        anzahl = 0
+        for aufgabe_data in modul_data.get("aufgaben", []):
+            tag, datum_text = _tag(aufgabe_data.get("faelligkeitsdatum"))
+            erstellt_us, erstellt_text = _zeit(aufgabe_data.get("erstellt_am"))
+            satz = AUFGABE.pack(
+                strings.id(aufgabe_data.get("id") or neue_id()),
+                strings.id(aufgabe_data["titel"]),
+                strings.id(aufgabe_data.get("beschreibung", "")),
+                tag,
+                strings.id(datum_text),
+                strings.id(aufgabe_data.get("prioritaet", "Normal")),
+                1 if aufgabe_data.get("erledigt", False) else 0,
+                strings.id(erstellt_text),
+                erstellt_us
+            )
+            puffer += LAENGE.pack(len(satz)) + satz
+            anzahl += 1
+        erstellt_us, erstellt_text = _zeit(modul_data.get("erstellt_am"))
+        modul_saetze.append(MODUL.pack(
+            strings.id(modul_data.get("id") or neue_id()),
+            strings.id(modul_data["name"]),
+            strings.id(modul_data.get("farbe", "#2196F3")),
+            strings.id(modul_data.get("beschreibung", "")),
+            strings.id(erstellt_text),
+            erstellt_us,
+            anzahl,
+            aufgaben_offset
+        ))
+
+    module_offset = len(puffer)
+    for satz in modul_saetze:
+        puffer += LAENGE.pack(len(satz)) + satz
+
+    # String-Tabelle: Offsets (Anzahl + 1 Einträge) gefolgt von den UTF-8-Daten
+    strings_offset = len(puffer)
+    position = 0
+    offsets = []
+    for wert in strings.werte:
+        offsets.append(position)
+        position += len(wert)
+    offsets.append(position)
+    puffer += struct.pack(f"<{len(offsets)}I", *offsets)
+    puffer += b"".join(strings.werte)
+
+    KOPF.pack_into(puffer, 0, MAGIC, VERSION, len(strings.werte), len(modul_saetze), strings_offset, module_offset)
+
+    tmp_pfad = pfad + ".tmp"
+    with open(tmp_pfad, "wb") as f:
+        f.write(puffer)
+    os.replace(tmp_pfad, pfad)
+
+
+class BinaerSnapshot:
+    def __init__(self, pfad: str):
+        with open(pfad, "rb") as f:
+            self._daten = f.read()
+        magic, version, self.anzahl_strings, self.anzahl_module, strings_offset, self._module_offset = KOPF.unpack_from(self._daten, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{pfad} ist kein Studienplaner-Snapshot (Version {VERSION})")
+        self._string_offsets = strings_offset
+        self._string_daten = strings_offset + 4 * (self.anzahl_strings + 1)
+        # Nur bereits gelesene Strings; häufige Werte wie Prioritäten werden so nur einmal dekodiert
+        self._strings: Dict[int, str] = {}
+
+    def string(self, sid: int) -> Optional[str]:
+        if sid == KEIN:
+            return None
+        wert = self._strings.get(sid)
+        if wert is None:
+            start, ende = struct.unpack_from("<II", self._daten, self._string_offsets + 4 * sid)
+            wert = self._strings[sid] = self._daten[self._string_daten + start:self._string_daten + ende].decode("utf-8")
+        return wert
+
+    def _zeit_text(self, sid: int, mikrosekunden: int) -> Optional[str]:
+        if mikrosekunden == KEINE_ZEIT:
+            return self.string(sid)
+        return (_NULLPUNKT + timedelta(microseconds=mikrosekunden)).isoformat()
+
+    def module(self) -> List[Modul]:
+        module = []
+        offset = self._module_offset
+        for _ in range(self.anzahl_module):
+            (laenge,) = LAENGE.unpack_from(self._daten, offset)
+            modul_id, name, farbe, beschreibung, erstellt_sid, erstellt_us, anzahl, aufgaben_offset = MODUL.unpack_from(self._daten, offset + LAENGE.size)
+            modul_data = {
+                "id": self.string(modul_id),
+                "name": self.string(name),
+                "farbe": self.string(farbe),
+                "beschreibung": self.string(beschreibung),
+                "aufgaben": _Aufgaben(self, aufgaben_offset, anzahl)
+            }
+            erstellt_am = self._zeit_text(erstellt_sid, erstellt_us)
+            if erstellt_am is not None:
+                modul_data["erstellt_am"] = erstellt_am
+            module.append(Modul.from_dict(modul_data))
+            offset += LAENGE.size + laenge
+        return module
+
+    def aufgabe(self, offset: int):
+        (laenge,) = LAENGE.unpack_from(self._daten, offset)
+        aufgabe_id, titel, beschreibung, tag, datum_sid, prioritaet, erledigt, erstellt_sid, erstellt_us = AUFGABE.unpack_from(self._daten, offset + LAENGE.size)
+        aufgabe_data = {
+            "id": self.string(aufgabe_id),
+            "titel": self.string(titel),
+            "beschreibung": self.string(beschreibung),
+            "faelligkeitsdatum": date.fromordinal(tag).isoformat() if tag else self.string(datum_sid),
+            "prioritaet": self.string(prioritaet),
+            "erledigt": bool(erledigt)
+        }
+        erstellt_am = self._zeit_text(erstellt_sid, erstellt_us)
+        if erstellt_am is not None:
+            aufgabe_data["erstellt_am"] = erstellt_am
+        return aufgabe_data, offset + LAENGE.size + laenge
+
+
+# Rohdaten eines Moduls, die erst beim Durchlaufen aus den gelesenen Bytes dekodiert werden
+class _Aufgaben:
+    def __init__(self, snapshot: BinaerSnapshot, offset: int, anzahl: int):
+        self._snapshot = snapshot
+        self._offset = offset
+        self._anzahl = anzahl
+
+    def __len__(self):
+        return self._anzahl
+
+    def __iter__(self):
+        offset = self._offset
+        for _ in range(self._anzahl):
+            aufgabe_data, offset = self._snapshot.aufgabe(offset)
+            yield aufgabe_data
+
+
+def laden(pfad: str) -> List[Modul]:
+    return BinaerSnapshot(pfad).module()
+
+
+def json_nach_binaer(json_pfad: str, bin_pfad: str):
+    import json
+    with open(json_pfad, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    schreiben(data.get("module", []), bin_pfad)
+
+
+def binaer_nach_json(bin_pfad: str, json_pfad: str):
+    import json
+    data = {
+        "module": [modul.to_dict() for modul in laden(bin_pfad)],
+        "gespeichert_am": datetime.now().isoformat()
+    }
+    with open(json_pfad, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+# python binaer.py studienplaner_data.json   → studienplaner_data.bin
+# python binaer.py studienplaner_data.bin    → studienplaner_data.json
+if __name__ == "__main__":
+    import sys
+    quelle = sys.argv[1] if len(sys.argv) > 1 else "studienplaner_data.json"
+    basis, endung = os.path.splitext(quelle)
+    if endung == ".bin":
+        ziel = sys.argv[2] if len(sys.argv) > 2 else basis + ".json"
+        binaer_nach_json(quelle, ziel)
+    else:
+        ziel = sys.argv[2] if len(sys.argv) > 2 else basis + ".bin"
+        json_nach_binaer(quelle, ziel)
+    print(f"{quelle} → {ziel}")
@@ -0,0 +1,507 @@
+import codecs
+import csv
+import gzip
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from modell import Modul, Aufgabe, Prioritaet
+from suche import normalisieren
+
+CSV_KOPF = ['Modul', 'Aufgabe', 'Beschreibung', 'Fälligkeitsdatum', 'Priorität', 'Status']
+
+ICS_KOPF = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Studienplaner//DE\r\nCALSCALE:GREGORIAN\r\nX-WR-CALNAME:Studienplaner\r\n"
+ICS_ENDE = "END:VCALENDAR\r\n"
+
+
+# Filter für Export (und später Import/ICS): None heißt jeweils "alle"
+def aufgabe_passt(aufgabe: Aufgabe, erledigt: Optional[bool] = None,
+                  von: Optional[date] = None, bis: Optional[date] = None) -> bool:
+    if erledigt is not None and aufgabe.erledigt != erledigt:
+        return False
+    if von is not None and (aufgabe.faellig is None or aufgabe.faellig < von):
+        return False
+    if bis is not None and (aufgabe.faellig is None or aufgabe.faellig > bis):
+        return False
+    return True
+
+
+# Liefert die CSV-Zeilen einzeln, ohne den Export im Speicher aufzubauen. Erwartet pro Modul (Name, Aufgaben), die Aufgaben
+# als Kopie aus Modul.aufgaben_kopie() (siehe StudienplanerApp._export_aufgaben); Roh-Dicts werden erst hier (im Export-Thread) zu Aufgaben, ohne das Modul zu laden.
+# Module ohne Aufgaben erscheinen (wie bisher) als Zeile mit leeren Aufgabenspalten, solange kein Aufgabenfilter gesetzt ist.
+def csv_zeilen(module: Iterable[Tuple[str, List]], erledigt: Optional[bool] = None,
+               von: Optional[date] = None, bis: Optional[date] = None) -> Iterator[List[str]]:
+    aufgaben_filter = erledigt is not None or von is not None or bis is not None
+    for modul_name, aufgaben in module:
+        if not aufgaben:
+            if not aufgaben_filter:
+                yield [modul_name, '', '', '', '', '']
+            continue
+        for aufgabe in aufgaben:
+            if isinstance(aufgabe, dict):
+                aufgabe = Aufgabe.from_dict(aufgabe)
+            if aufgaben_filter and not aufgabe_passt(aufgabe, erledigt, von, bis):
+                continue
+            yield [
+                modul_name,
+                aufgabe.titel,
+                aufgabe.beschreibung,
+                aufgabe.faelligkeitsdatum or '',
+                aufgabe.prioritaet,
+                'Erledigt' if aufgabe.erledigt else 'Offen'
+            ]
+
+
+def _oeffnen(pfad: str, komprimieren: bool):
+    if komprimieren:
+        return gzip.open(pfad, 'wt', newline='', encoding='utf-8')
+    return open(pfad, 'w', newline='', encoding='utf-8')
+
+
+# Schreibt die Zeilen in eine temporäre Datei und ersetzt erst am Ende das Ziel; gibt die Zahl der Aufgabenzeilen zurück.
+# bei_fortschritt(geschrieben) wird höchstens alle `intervall` Sekunden aufgerufen; abbrechen() → True bricht ab.
+def csv_schreiben(zeilen: Iterable[List[str]], pfad: str, komprimieren: bool = False,
+                  bei_fortschritt: Optional[Callable[[int], None]] = None, intervall: float = 0.2,
+                  abbrechen: Optional[Callable[[], bool]] = None) -> int:
+    tmp_pfad = pfad + ".tmp"
+    geschrieben = 0
+    letzte_meldung = time.monotonic()
+    try:
+        with _oeffnen(tmp_pfad, komprimieren) as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_KOPF)
+            for zeile in zeilen:
+                writer.writerow(zeile)
+                geschrieben += 1
+                if geschrieben % 500 == 0:
+                    if abbrechen is not None and abbrechen():
+                        raise InterruptedError("Export abgebrochen")
+                    if bei_fortschritt is not None and time.monotonic() - letzte_meldung >= intervall:
+                        letzte_meldung = time.monotonic()
+                        bei_fortschritt(geschrieben)
+        os.replace(tmp_pfad, pfad)
+    except BaseException:
+        if os.path.exists(tmp_pfad):
+            os.remove(tmp_pfad)
+        raise
+    return geschrieben
+
+
+# CSV-Export in einem eigenen Thread. Die Rückmeldungen kommen aus diesem Thread:
+# bei_fortschritt(geschrieben, gesamt) während des Schreibens, bei_ende(datei_name oder None, Fehler oder None) zum Schluss.
+class CsvExport:
+    def __init__(self, module: Iterable[Tuple[str, List]], datei_name: str, gesamt: int = 0, komprimieren: bool = False,
+                 bei_fortschritt: Optional[Callable[[int, int], None]] = None,
+                 bei_ende: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None, **filter):
+        self.module = module
+        self.datei_name = datei_name
+        self.gesamt = gesamt
+        self.komprimieren = komprimieren
+        self.filter = filter
+        self.bei_fortschritt = bei_fortschritt
+        self.bei_ende = bei_ende
+        self.geschrieben = 0
+        self.fehler: Optional[Exception] = None
+        self._abbrechen = threading.Event()
+        self._thread = threading.Thread(target=self._lauf, daemon=True)
+
+    def starten(self) -> "CsvExport":
+        self._thread.start()
+        return self
+
+    def abbrechen(self):
+        self._abbrechen.set()
+
+    def warten(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    @property
+    def laeuft(self) -> bool:
+        return self._thread.is_alive()
+
+    def _fortschritt(self, geschrieben: int):
+        self.geschrieben = geschrieben
+        if self.bei_fortschritt:
+            self.bei_fortschritt(geschrieben, self.gesamt)
+
+    def _lauf(self):
+        try:
+            self.geschrieben = csv_schreiben(
+                csv_zeilen(self.module, **self.filter), self.datei_name, self.komprimieren,
+                bei_fortschritt=self._fortschritt, abbrechen=self._abbrechen.is_set
+            )
+        except Exception as e:
+            print(f"Fehler beim CSV-Export: {e}")
+            self.fehler = e
+        if self.bei_ende:
+            self.bei_ende(None if self.fehler else self.datei_name, self.fehler)
+
+
+# Text nach RFC 5545 (3.3.11) maskieren
+def _ics_text(text: Optional[str]) -> str:
+    return (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+# Zeilen nach höchstens 75 Oktetten umbrechen (3.1), ohne ein UTF-8-Zeichen zu zerteilen
+def _ics_zeile(zeile: str) -> str:
+    if len(zeile.encode("utf-8")) <= 75:
+        return zeile + "\r\n"
+    teile = []
+    aktuell, laenge, grenze = [], 0, 75
+    for zeichen in zeile:
+        groesse = len(zeichen.encode("utf-8"))
+        if laenge + groesse > grenze:
+            teile.append("".join(aktuell))
+            aktuell, laenge, grenze = [], 0, 74  # Folgezeilen beginnen mit einem Leerzeichen
+        aktuell.append(zeichen)
+        laenge += groesse
+    teile.append("".join(aktuell))
+    return "\r\n ".join(teile) + "\r\n"
+
+
+# Ein VEVENT pro Aufgabe: reine Datumsangaben als ganztägiger Termin (DTEND ist der Folgetag, 3.6.1),
+# Angaben mit Uhrzeit als Zeitpunkt (DTEND = DTSTART). Zeitangaben mit Zeitzone werden nach UTC umgerechnet
+# und mit "Z" geschrieben, solche ohne bleiben lokale Zeit. Die UID ist aus der Aufgaben-ID abgeleitet
+# und bleibt daher über alle Exporte gleich.
+def ics_eintrag(aufgabe: Aufgabe, modul: Modul, stempel: str) -> Optional[str]:
+    try:
+        zeitpunkt = datetime.fromisoformat(aufgabe.faelligkeitsdatum)
+    except (ValueError, TypeError):
+        return None
+    if len(aufgabe.faelligkeitsdatum) == 10:
+        beginn = f"DTSTART;VALUE=DATE:{zeitpunkt:%Y%m%d}"
+        ende = f"DTEND;VALUE=DATE:{zeitpunkt + timedelta(days=1):%Y%m%d}"
+    else:
+        if zeitpunkt.tzinfo is not None:
+            wert = zeitpunkt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        else:
+            wert = zeitpunkt.strftime("%Y%m%dT%H%M%S")
+        beginn = f"DTSTART:{wert}"
+        ende = f"DTEND:{wert}"
+    beschreibung = f"Priorität: {aufgabe.prioritaet}"
+    if aufgabe.beschreibung:
+        beschreibung = aufgabe.beschreibung + "\n\n" + beschreibung
+    zeilen = [
+        "BEGIN:VEVENT",
+        f"UID:{aufgabe.id}@studienplaner",
+        f"DTSTAMP:{stempel}",
+        beginn,
+        ende,
+        "SUMMARY:" + ("✓ " if aufgabe.erledigt else "") + _ics_text(aufgabe.titel),
+        "DESCRIPTION:" + _ics_text(beschreibung),
+        "CATEGORIES:" + _ics_text(modul.name),
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT"
+    ]
+    return "".join(_ics_zeile(zeile) for zeile in zeilen)
+
+
+# Kalender-Feed aller Aufgaben mit Fälligkeitsdatum. Jede Aufgabe hat ein fertig serialisiertes Fragment;
+# nach Änderungen werden nur die als veraltet gemeldeten Aufgaben neu serialisiert (und auch das nur, wenn sich
+# ihre angezeigten Werte geändert haben). Die Datei wird aus den Fragmenten zusammengesetzt und
+# (wie beim CSV-Export) über eine temporäre Datei ersetzt: Fragmente wechselnder Länge lassen sich nicht an Ort und
+# Stelle austauschen, und Kalender-Clients rufen den Feed ohnehin immer vollständig ab.
+class IcsFeed:
+    def __init__(self):
+        # Aufgaben-ID → (Zustand, Fragment als UTF-8), damit beim Schreiben nichts mehr kodiert werden muss
+        self._fragmente: Dict[str, Tuple[tuple, bytes]] = {}
+        self._veraltet: Set[str] = set()
+        self._komplett = True
+        self.geaendert = True
+        self._generation = 0
+        self._geschrieben = 0
+        self._schreib_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._fragmente)
+
+    def veraltet(self, aufgabe_id: str):
+        self._veraltet.add(aufgabe_id)
+
+    def alles_veraltet(self):
+        self._komplett = True
+
+    @staticmethod
+    def _zustand(aufgabe: Aufgabe, modul: Modul) -> tuple:
+        return (aufgabe.titel, aufgabe.beschreibung, aufgabe.faelligkeitsdatum, str(aufgabe.prioritaet),
+                aufgabe.erledigt, modul.name)
+
+    def _eintragen(self, aufgabe: Aufgabe, modul: Modul, stempel: str) -> bool:
+        zustand = self._zustand(aufgabe, modul)
+        vorher = self._fragmente.get(aufgabe.id)
+        if vorher is not None and vorher[0] == zustand:
+            return False
+        fragment = ics_eintrag(aufgabe, modul, stempel) if aufgabe.faelligkeitsdatum else None
+        if fragment is None:
+            return self._fragmente.pop(aufgabe.id, None) is not None
+        self._fragmente[aufgabe.id] = (zustand, fragment.encode("utf-8"))
+        return True
+
+    # Bringt die Fragmente auf den aktuellen Stand; nachschlagen(id) → (Aufgabe, Modul) oder None.
+    # Gibt die Zahl der neu serialisierten oder entfernten Aufgaben zurück.
+    def nachfuehren(self, module: Iterable[Modul], nachschlagen: Callable[[str], Optional[Tuple[Aufgabe, Modul]]]) -> int:
+        stempel = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        anzahl = 0
+        if self._komplett:
+            self._komplett = False
+            self._veraltet.clear()
+            alt, self._fragmente = self._fragmente, {}
+            for modul in module:
+                if modul.ist_geladen:
+                    aufgaben = modul.aufgaben
+                else:
+                    # Nicht geladene Module bleiben ungeladen: nur Aufgaben mit Datum (oder mit altem Fragment)
+                    # werden vorübergehend aus den Rohdaten erzeugt
+                    aufgaben = (Aufgabe.from_dict(aufgabe_data) for aufgabe_data in modul.aufgaben_kopie()
+                                if aufgabe_data.get("faelligkeitsdatum") or aufgabe_data.get("id") in alt)
+                for aufgabe in aufgaben:
+                    if aufgabe.id in alt:
+                        self._fragmente[aufgabe.id] = alt[aufgabe.id]
+                    anzahl += self._eintragen(aufgabe, modul, stempel)
+            anzahl += len(alt.keys() - self._fragmente.keys())
+        else:
+            for aufgabe_id in self._veraltet:
+                eintrag = nachschlagen(aufgabe_id)
+                if eintrag is None:
+                    anzahl += self._fragmente.pop(aufgabe_id, None) is not None
+                else:
+                    anzahl += self._eintragen(eintrag[0], eintrag[1], stempel)
+            self._veraltet.clear()
+        if anzahl:
+            self.geaendert = True
+        return anzahl
+
+    # Schreibt die Datei nur, wenn sich seit dem letzten Schreiben etwas geändert hat (oder sie fehlt).
+    # Im Hintergrund wird eine Momentaufnahme der Fragmente geschrieben; die Oberfläche wartet nicht auf die Platte.
+    def schreiben(self, pfad: str, im_hintergrund: bool = False) -> bool:
+        if not self.geaendert and os.path.exists(pfad):
+            return False
+        self.geaendert = False
+        self._generation += 1
+        fragmente = [fragment for _, fragment in self._fragmente.values()]
+        if im_hintergrund:
+            threading.Thread(target=self._hintergrund, args=(pfad, fragmente, self._generation), daemon=True).start()
+        else:
+            self._datei_schreiben(pfad, fragmente, self._generation)
+        return True
+
+    def _datei_schreiben(self, pfad: str, fragmente: List[bytes], generation: int):
+        with self._schreib_lock:
+            # Ein später gestarteter Schreibvorgang war schneller; dieser Stand ist schon überholt
+            if generation <= self._geschrieben:
+                return
+            verzeichnis = os.path.dirname(pfad)
+            if verzeichnis:
+                os.makedirs(verzeichnis, exist_ok=True)
+            tmp_pfad = pfad + ".tmp"
+            try:
+                with open(tmp_pfad, "wb") as f:
+                    f.write(ICS_KOPF.encode("utf-8"))
+                    f.writelines(fragmente)
+                    f.write(ICS_ENDE.encode("utf-8"))
+                os.replace(tmp_pfad, pfad)
+                self._geschrieben = generation
+            except BaseException:
+                self.geaendert = True
+                if os.path.exists(tmp_pfad):
+                    os.remove(tmp_pfad)
+                raise
+
+    def _hintergrund(self, pfad: str, fragmente: List[bytes], generation: int):
+        try:
+            self._datei_schreiben(pfad, fragmente, generation)
+        except Exception as e:
+            print(f"Fehler beim ICS-Export: {e}")
+
+
+# Spaltennamen (normalisiert, siehe suche.normalisieren) für den Import: eigener Export und übliche Stundenplan-Exporte
+IMPORT_SPALTEN = {
+    "modul": ("modul", "veranstaltung", "lehrveranstaltung", "kurs", "fach", "module", "course"),
+    "titel": ("aufgabe", "titel", "bezeichnung", "thema", "termin", "title", "task", "summary"),
+    "beschreibung": ("beschreibung", "bemerkung", "notiz", "hinweis", "raum", "ort", "description", "location"),
+    "faelligkeitsdatum": ("faelligkeitsdatum", "faellig", "faellig am", "datum", "abgabe", "beginn", "start", "date", "due"),
+    "uhrzeit": ("uhrzeit", "zeit", "von", "time"),
+    "prioritaet": ("prioritaet", "art", "typ", "veranstaltungsart", "priority", "type", "kategorie"),
+    "status": ("status", "erledigt", "done"),
+}
+
+# Normalisierter Wert → Priorität; unbekannte Werte werden zu "Normal" (mit Hinweis im Bericht)
+IMPORT_PRIORITAETEN = {
+    **{normalisieren(p.value): p for p in Prioritaet},
+    "klausur": Prioritaet.PRUEFUNG, "exam": Prioritaet.PRUEFUNG, "pruefungsleistung": Prioritaet.PRUEFUNG,
+    "muendliche pruefung": Prioritaet.PRUEFUNG, "test": Prioritaet.PRUEFUNG,
+    "hausarbeit": Prioritaet.ABGABE, "hausaufgabe": Prioritaet.ABGABE, "deadline": Prioritaet.ABGABE,
+    "assignment": Prioritaet.ABGABE, "referat": Prioritaet.ABGABE, "projekt": Prioritaet.ABGABE,
+    "praktikum": Prioritaet.PRAKTISCHE_ARBEIT, "labor": Prioritaet.PRAKTISCHE_ARBEIT, "uebung": Prioritaet.PRAKTISCHE_ARBEIT,
+    "tutorium": Prioritaet.PRAKTISCHE_ARBEIT, "lab": Prioritaet.PRAKTISCHE_ARBEIT,
+    "vorlesung": Prioritaet.SELBSTSTUDIUM, "seminar": Prioritaet.SELBSTSTUDIUM, "lektuere": Prioritaet.SELBSTSTUDIUM,
+    "lecture": Prioritaet.SELBSTSTUDIUM, "self study": Prioritaet.SELBSTSTUDIUM,
+    "": Prioritaet.NORMAL,
+}
+
+IMPORT_STATUS = {
+    "erledigt": True, "ja": True, "x": True, "1": True, "true": True, "done": True, "fertig": True,
+    "offen": False, "nein": False, "0": False, "false": False, "open": False, "": False,
+}
+
+_DATUM_DE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{2}|\d{4})(?:[ ,]+(\d{1,2}):(\d{2})(?::\d{2})?)?(?: ?uhr)?$")
+_UHRZEIT = re.compile(r"(\d{1,2})[:.](\d{2})(?::\d{2})?(?: ?uhr)?$")
+
+
+# Fälligkeitsdatum aus ISO (2025-01-31, 2025-01-31T14:00) oder deutscher Schreibweise (31.01.2025 14:00, 31.1.25),
+# optional mit Uhrzeit aus einer eigenen Spalte; Ergebnis im Format der App. Ungültige Angaben → ValueError.
+def datum_lesen(text: str, uhrzeit: str = "") -> Optional[str]:
+    text = text.strip().lower()
+    if not text:
+        return None
+    treffer = _DATUM_DE.match(text)
+    if treffer:
+        tag, monat, jahr, stunde, minute = treffer.groups()
+        jahr = int(jahr) + (2000 if len(jahr) == 2 else 0)
+        zeitpunkt = datetime(jahr, int(monat), int(tag), int(stunde or 0), int(minute or 0))
+        mit_uhrzeit = stunde is not None
+    else:
+        zeitpunkt = datetime.fromisoformat(text.upper())
+        mit_uhrzeit = len(text) > 10
+    uhrzeit = uhrzeit.strip().lower()
+    if uhrzeit:
+        treffer = _UHRZEIT.match(uhrzeit)
+        if not treffer:
+            raise ValueError(f"ungültige Uhrzeit '{uhrzeit}'")
+        zeitpunkt = zeitpunkt.replace(hour=int(treffer.group(1)), minute=int(treffer.group(2)))
+        mit_uhrzeit = True
+    return zeitpunkt.isoformat() if mit_uhrzeit else zeitpunkt.date().isoformat()
+
+
+# Ergebnis des Einlesens: gültige Aufgaben nach Modul gruppiert, dazu Fehler (Zeile übersprungen) und Hinweise.
+# Wird vor dem Übernehmen als Probelauf-Bericht angezeigt; übernommen werden nur die gültigen Zeilen.
+class ImportPlan:
+    def __init__(self):
+        # Normalisierter Modulname → (Name wie in der Datei, Aufgaben)
+        self.module: Dict[str, Tuple[str, List[Aufgabe]]] = {}
+        self.zeilen = 0
+        self.fehler: List[str] = []
+        self.hinweise: List[str] = []
+        # Vom Übernehmen gesetzt: Namen der neu angelegten Module, Zahl der übernommenen Aufgaben
+        self.neue_module: List[str] = []
+        self.importiert = 0
+
+    @property
+    def anzahl_aufgaben(self) -> int:
+        return sum(len(aufgaben) for _, aufgaben in self.module.values())
+
+    def bericht(self, max_zeilen: int = 10) -> str:
+        zeilen = [f"{self.zeilen} Zeilen gelesen: {self.anzahl_aufgaben} Aufgaben in {len(self.module)} Modulen"
+                  + (f" ({len(self.neue_module)} neu)" if self.neue_module else "")]
+        for titel, meldungen in (("Fehler (Zeile wird übersprungen)", self.fehler), ("Hinweise", self.hinweise)):
+            if meldungen:
+                zeilen.append(f"{len(meldungen)} {titel}:")
+                zeilen.extend(meldungen[:max_zeilen])
+                if len(meldungen) > max_zeilen:
+                    zeilen.append(f"… und {len(meldungen) - max_zeilen} weitere")
+        return "\n".join(zeilen)
+
+
+# Öffnet eine (optional gzip-komprimierte) CSV-Datei; UTF-8 (mit oder ohne BOM), sonst Windows-1252 (Excel)
+def _csv_oeffnen(pfad: str):
+    oeffnen = gzip.open if pfad.endswith(".gz") else open
+    with oeffnen(pfad, "rb") as f:
+        probe = f.read(65536)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(probe, final=False)
+        kodierung = "utf-8-sig"
+    except UnicodeDecodeError:
+        kodierung = "cp1252"
+    f = oeffnen(pfad, "rt", encoding=kodierung, newline="")
+    kopf = probe.decode(kodierung, errors="replace").splitlines()[0] if probe else ""
+    # Trennzeichen aus der Kopfzeile: Excel und viele Hochschulsysteme exportieren mit Semikolon
+    trenner = max(",;\t", key=kopf.count)
+    return f, trenner
+
+
+# Liest und prüft eine CSV-Datei in Stapeln von `stapel` Zeilen, ohne etwas am Modell zu ändern (Probelauf).
+# bei_fortschritt(gelesene Zeilen) nach jedem Stapel.
+def csv_import_lesen(pfad: str, stapel: int = 2000, bei_fortschritt: Optional[Callable[[int], None]] = None) -> ImportPlan:
+    plan = ImportPlan()
+    f, trenner = _csv_oeffnen(pfad)
+    with f:
+        reader = csv.reader(f, delimiter=trenner)
+        kopf = [normalisieren(spalte).strip() for spalte in next(reader, [])]
+        spalten = {}
+        for ziel, namen in IMPORT_SPALTEN.items():
+            spalten[ziel] = next((kopf.index(name) for name in namen if name in kopf), None)
+        fehlend = [ziel for ziel in ("modul", "titel") if spalten[ziel] is None]
+        if fehlend:
+            plan.fehler.append(f"Spalte(n) nicht gefunden: {', '.join(fehlend)} (Kopfzeile: {', '.join(kopf)})")
+            return plan
+
+        erstellt_am = datetime.now().isoformat()
+        i_modul, i_titel = spalten["modul"], spalten["titel"]
+        weitere = [spalten[ziel] for ziel in ("beschreibung", "faelligkeitsdatum", "uhrzeit", "prioritaet", "status")]
+        # Modulnamen, Daten, Prioritäten und Status wiederholen sich stark; jede Rohangabe wird nur einmal ausgewertet
+        modul_schluessel: Dict[str, str] = {}
+        daten: Dict[Tuple[str, str], Optional[str]] = {}  # "" = ungültige Angabe
+        prioritaeten: Dict[str, Prioritaet] = {}
+        status_werte: Dict[str, Optional[bool]] = {}
+
+        def wert(zeile: List[str], index: Optional[int]) -> str:
+            return zeile[index].strip() if index is not None and index < len(zeile) else ""
+
+        while True:
+            block = list(islice(reader, stapel))
+            if not block:
+                break
+            # Zeilennummer in der Datei: Kopfzeile + bisher gelesene Zeilen (mehrzeilige Felder zählen als eine Zeile)
+            for nummer, zeile in enumerate(block, start=plan.zeilen + 2):
+                if not any(zeile):
+                    continue
+                modul_name, titel = wert(zeile, i_modul), wert(zeile, i_titel)
+                beschreibung, datum, uhrzeit, prioritaet, status = (wert(zeile, index) for index in weitere)
+                if not modul_name:
+                    if titel or beschreibung or datum or status:
+                        plan.fehler.append(f"Zeile {nummer}: Modul fehlt")
+                    continue
+                schluessel = modul_schluessel.get(modul_name)
+                if schluessel is None:
+                    schluessel = modul_schluessel[modul_name] = normalisieren(modul_name)
+                if not titel:
+                    # Modul ohne Aufgaben (so schreibt es der eigene Export)
+                    if beschreibung or datum or status:
+                        plan.fehler.append(f"Zeile {nummer}: Aufgabe fehlt")
+                    else:
+                        plan.module.setdefault(schluessel, (modul_name, []))
+                    continue
+
+                if (datum, uhrzeit) not in daten:
+                    try:
+                        daten[datum, uhrzeit] = datum_lesen(datum, uhrzeit)
+                    except ValueError:
+                        daten[datum, uhrzeit] = ""
+                faelligkeitsdatum = daten[datum, uhrzeit]
+                if faelligkeitsdatum == "":
+                    angabe = f"{datum} {uhrzeit}".strip()
+                    plan.fehler.append(f"Zeile {nummer}: ungültiges Datum '{angabe}'")
+                    continue
+                if status not in status_werte:
+                    status_werte[status] = IMPORT_STATUS.get(normalisieren(status))
+                erledigt = status_werte[status]
+                if erledigt is None:
+                    plan.fehler.append(f"Zeile {nummer}: unbekannter Status '{status}'")
+                    continue
+                zugeordnet = prioritaeten.get(prioritaet)
+                if zugeordnet is None:
+                    zugeordnet = prioritaeten[prioritaet] = IMPORT_PRIORITAETEN.get(normalisieren(prioritaet), Prioritaet.NORMAL)
+                    if normalisieren(prioritaet) not in IMPORT_PRIORITAETEN:
+                        plan.hinweise.append(f"Zeile {nummer}: Priorität '{prioritaet}' unbekannt, als 'Normal' übernommen")
+
+                aufgabe = Aufgabe(titel, beschreibung, faelligkeitsdatum, zugeordnet, erstellt_am)
+                aufgabe.erledigt = erledigt
+                plan.module.setdefault(schluessel, (modul_name, []))[1].append(aufgabe)
+            plan.zeilen += len(block)
+            if bei_fortschritt is not None:
+                bei_fortschritt(plan.zeilen)
+    return plan
@@ -0,0 +1,170 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+
+# Zeitmessung für Handler, Zeichenfunktionen, Laden/Speichern und page.update(), nur mit STUDIENPLANER_DIAGNOSE=1.
+# Ausgeschaltet gibt gemessen() die Funktion unverändert zurück und erfassen() kehrt sofort zurück; es bleiben
+# also keine Kosten außer einem Funktionsaufruf an wenigen Stellen pro Speichervorgang.
+# Eingeschaltet:
+# - pro Name ein rollender Verlauf der letzten Messungen (Perzentile, Maximum) plus Gesamtzahl und -summe
+# - Vorgänge über STUDIENPLANER_DIAGNOSE_LANGSAM_MS (Standard 100) werden auf der Konsole gemeldet
+# - bei page.update() zusätzlich die Zahl der seit dem letzten Update neu gebauten oder geänderten Karten
+# - Ctrl+Shift+D zeigt eine Übersicht und schreibt sie nach studienplaner_diagnose.json, ebenso beim Beenden
+aktiv = os.environ.get("STUDIENPLANER_DIAGNOSE") == "1"
+langsam_ms = float(os.environ.get("STUDIENPLANER_DIAGNOSE_LANGSAM_MS", "100"))
+dump_pfad = os.environ.get("STUDIENPLANER_DIAGNOSE_DATEI", "studienplaner_diagnose.json")
+
+
+def _perzentil(sortiert: List[float], anteil: float) -> float:
+    return sortiert[min(len(sortiert) - 1, int(anteil * len(sortiert)))]
+
+
+class Verlauf:
+    def __init__(self, fenster: int = 1000):
+        self.dauern: Deque[float] = deque(maxlen=fenster)
+        self.mengen: Deque[int] = deque(maxlen=fenster)
+        self.anzahl = 0
+        self.summe = 0.0
+
+    def erfassen(self, dauer: float, menge: Optional[int]):
+        self.dauern.append(dauer)
+        if menge is not None:
+            self.mengen.append(menge)
+        self.anzahl += 1
+        self.summe += dauer
+
+    def zusammenfassung(self) -> Dict:
+        dauern = sorted(self.dauern)
+        ergebnis = {
+            "anzahl": self.anzahl,
+            "summe_ms": round(self.summe * 1000, 1),
+            "p50_ms": round(_perzentil(dauern, 0.5) * 1000, 2),
+            "p95_ms": round(_perzentil(dauern, 0.95) * 1000, 2),
+            "p99_ms": round(_perzentil(dauern, 0.99) * 1000, 2),
+            "max_ms": round(dauern[-1] * 1000, 2),
+        }
+        if self.mengen:
+            mengen = sorted(self.mengen)
+            ergebnis["menge_p50"] = _perzentil(mengen, 0.5)
+            ergebnis["menge_max"] = mengen[-1]
+        return ergebnis
+
+
+_verlaeufe: Dict[str, Verlauf] = {}
+# Die letzten langsamen Vorgänge: (Zeitpunkt, Name, Dauer in ms, Menge)
+_langsam: Deque[tuple] = deque(maxlen=200)
+_sperre = threading.Lock()
+
+
+def erfassen(name: str, dauer: float, menge: Optional[int] = None):
+    if not aktiv:
+        return
+    with _sperre:
+        verlauf = _verlaeufe.get(name)
+        if verlauf is None:
+            verlauf = _verlaeufe[name] = Verlauf()
+        verlauf.erfassen(dauer, menge)
+        if dauer * 1000 >= langsam_ms:
+            _langsam.append((datetime.now().isoformat(timespec="milliseconds"), name, round(dauer * 1000, 1), menge))
+    if dauer * 1000 >= langsam_ms:
+        print(f"Langsam: {name} {dauer * 1000:.0f} ms" + (f" ({menge})" if menge is not None else ""))
+
+
+# Dekorator (auch für async-Funktionen); ohne Namen gilt der Funktionsname
+def gemessen(funktion: Optional[Callable] = None, name: Optional[str] = None):
+    if funktion is None:
+        return lambda f: gemessen(f, name)
+    if not aktiv:
+        return funktion
+    name = name or funktion.__qualname__.replace(".<locals>", "")
+
+    if inspect.iscoroutinefunction(funktion):
+        @functools.wraps(funktion)
+        async def gemessen_async(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await funktion(*args, **kwargs)
+            finally:
+                erfassen(name, time.perf_counter() - start)
+        return gemessen_async
+
+    @functools.wraps(funktion)
+    def gemessen_sync(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return funktion(*args, **kwargs)
+        finally:
+            erfassen(name, time.perf_counter() - start)
+    return gemessen_sync
+
+
+# Misst page.update() bzw. update_async() einer Seite. Ersetzt werden nur diese beiden öffentlichen Methoden der
+# Instanz, nichts Internes von Flet. Als Menge zählt, was geaendert() liefert (die Oberfläche übergibt die Zahl der
+# seit dem letzten Update neu gebauten oder geänderten Karten), ohne geaendert() die Zahl der übergebenen Controls.
+def seite_instrumentieren(page, geaendert: Optional[Callable[[], int]] = None):
+    if not aktiv:
+        return
+
+    def menge(controls) -> Optional[int]:
+        return geaendert() if geaendert is not None else len(controls) or None
+
+    update = page.update
+    def gemessenes_update(*controls):
+        start = time.perf_counter()
+        try:
+            return update(*controls)
+        finally:
+            erfassen("page.update", time.perf_counter() - start, menge(controls))
+    page.update = gemessenes_update
+
+    update_async = getattr(page, "update_async", None)
+    if inspect.iscoroutinefunction(update_async):
+        async def gemessenes_update_async(*controls):
+            start = time.perf_counter()
+            try:
+                return await update_async(*controls)
+            finally:
+                erfassen("page.update", time.perf_counter() - start, menge(controls))
+        page.update_async = gemessenes_update_async
+
+
+def zusammenfassung() -> Dict:
+    with _sperre:
+        return {
+            "erstellt_am": datetime.now().isoformat(),
+            "langsam_ms": langsam_ms,
+            "messungen": {name: verlauf.zusammenfassung() for name, verlauf in sorted(_verlaeufe.items())},
+            "langsam": [dict(zip(("zeitpunkt", "name", "ms", "menge"), eintrag)) for eintrag in _langsam],
+        }
+
+
+# Kurzfassung für die Diagnose-Ansicht: die Namen mit der größten Gesamtzeit zuerst
+def zeilen(anzahl: int = 25) -> List[str]:
+    messungen = sorted(zusammenfassung()["messungen"].items(), key=lambda eintrag: -eintrag[1]["summe_ms"])
+    return [f"{name}: {werte['anzahl']}×, p50 {werte['p50_ms']} ms, p99 {werte['p99_ms']} ms, max {werte['max_ms']} ms"
+            + (f", Menge p50 {werte['menge_p50']}/max {werte['menge_max']}" if "menge_p50" in werte else "")
+            for name, werte in messungen[:anzahl]]
+
+
+def schreiben(pfad: Optional[str] = None) -> Optional[str]:
+    pfad = pfad or dump_pfad
+    try:
+        tmp_pfad = pfad + ".tmp"
+        with open(tmp_pfad, "w", encoding="utf-8") as f:
+            json.dump(zusammenfassung(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp_pfad, pfad)
+        return pfad
+    except Exception as e:
+        print(f"Fehler beim Schreiben der Diagnose: {e}")
+        return None
+
+
+if aktiv:
+    atexit.register(schreiben)
@@ -1,156 +1,84 @@
  
-import flet as ft
-import json
+import asyncio
 import os
+import re
+import flet as ft
+from typing import Optional
 from datetime import datetime, date
-from typing import List, Dict, Optional
-import calendar
-
-class Modul:
-    def __init__(self, name: str, farbe: str = "#2196F3", beschreibung: str = ""):
-        self.name = name
-        self.farbe = farbe
-        self.beschreibung = beschreibung
-        self.aufgaben: List[Aufgabe] = []
-        self.erstellt_am = datetime.now().isoformat()
-    
-    def to_dict(self):
-        return {
-            "name": self.name,
-            "farbe": self.farbe,
-            "beschreibung": self.beschreibung,
-            "aufgaben": [aufgabe.to_dict() for aufgabe in self.aufgaben],
-            "erstellt_am": self.erstellt_am
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        modul = cls(data["name"], data.get("farbe", "#2196F3"), data.get("beschreibung", ""))
-        modul.erstellt_am = data.get("erstellt_am", datetime.now().isoformat())
-        modul.aufgaben = [Aufgabe.from_dict(aufgabe_data) for aufgabe_data in data.get("aufgaben", [])]
-        return modul
-    
-    def get_fortschritt(self):
-        if not self.aufgaben:
-            return 0
-        erledigte = sum(1 for aufgabe in self.aufgaben if aufgabe.erledigt)
-        return erledigte / len(self.aufgaben)
-
-class Aufgabe:
-    def __init__(self, titel: str, beschreibung: str = "", faelligkeitsdatum: Optional[str] = None, prioritaet: str = "Normal"):
-        self.titel = titel
-        self.beschreibung = beschreibung
-        self.faelligkeitsdatum = faelligkeitsdatum
-        self.prioritaet = prioritaet
-        self.erledigt = False
-        self.erstellt_am = datetime.now().isoformat()
-    
-    def to_dict(self):
-        return {
-            "titel": self.titel,
-            "beschreibung": self.beschreibung,
-            "faelligkeitsdatum": self.faelligkeitsdatum,
-            "prioritaet": self.prioritaet,
-            "erledigt": self.erledigt,
-            "erstellt_am": self.erstellt_am
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        aufgabe = cls(
-            data["titel"],
-            data.get("beschreibung", ""),
-            data.get("faelligkeitsdatum"),
-            data.get("prioritaet", "Normal")
-        )
-        aufgabe.erledigt = data.get("erledigt", False)
-        aufgabe.erstellt_am = data.get("erstellt_am", datetime.now().isoformat())
-        return aufgabe
-    
-    def ist_ueberfaellig(self):
-        if not self.faelligkeitsdatum or self.erledigt:
-            return False
-        try:
-            faellig = datetime.fromisoformat(self.faelligkeitsdatum).date()
-            return faellig < date.today()
-        except:
-            return False
-
-class StudienplanerApp:
-    def __init__(self):
-        self.module: List[Modul] = []
-        self.aktuelles_modul: Optional[Modul] = None
-        self.datei_pfad = "studienplaner_data.json"
-        self.aktuelle_ansicht = "module"
-        
-    def daten_laden(self):
-        try:
-            if os.path.exists(self.datei_pfad):
-                with open(self.datei_pfad, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.module = [Modul.from_dict(modul_data) for modul_data in data.get("module", [])]
-        except Exception as e:
-            print(f"Fehler beim Laden der Daten: {e}")
-    
-    def daten_speichern(self):
-        try:
-            data = {
-                "module": [modul.to_dict() for modul in self.module],
-                "gespeichert_am": datetime.now().isoformat()
-            }
-            with open(self.datei_pfad, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Fehler beim Speichern der Daten: {e}")
-
-    def export_csv(self):
-        try:
-            import csv
-            datei_name = f"studienplaner_export_{date.today().isoformat()}.csv"
-            with open(datei_name, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Modul', 'Aufgabe', 'Beschreibung', 'Fälligkeitsdatum', 'Priorität', 'Status'])
-                
-                for modul in self.module:
-                    if modul.aufgaben:
-                        # Modul mit Aufgaben 
-                        for aufgabe in modul.aufgaben:
-                            writer.writerow([
-                                modul.name,
-                                aufgabe.titel,
-                                aufgabe.beschreibung,
-                                aufgabe.faelligkeitsdatum or '',
-                                aufgabe.prioritaet,
-                                'Erledigt' if aufgabe.erledigt else 'Offen'
-                            ])
-                    else:
-                        # Modul ohne Aufgaben → leere Aufgabenspalten
-                        writer.writerow([
-                            modul.name,
-                            '', '', '', '', ''  # leere Spalten für Titel, Beschreibung usw.
-                        ])
-
-            return datei_name
-        except Exception as e:
-            print(f"Fehler beim CSV-Export: {e}")
-            return None
 
-    def backup_json(self):
-        try:
-            datei_name_backup = f"studienplaner_backup_{date.today().isoformat()}.json"
-            backup_data = {
-                "module": [modul.to_dict() for modul in self.module],
-                "gespeichert_am": datetime.now().isoformat()
-            }
-            with open(datei_name_backup, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, indent=2, ensure_ascii=False)
-            return datei_name_backup
-        except Exception as e:
-            print(f"Fehler beim JSON-Backup: {e}")
-            return None
+from modell import Modul, Aufgabe, datum_parsen, neue_id
+from speicher import DateiGesperrt
+from studienplaner import StudienplanerApp, Sitzung
+from abgleich import Ansichten, KartenListe, nachladen_beim_scrollen
+from overlays import Overlays
+import diagnose
+from diagnose import gemessen
+
+# Feste Kartenhöhen (item_extent): Die ListViews müssen so keine Karte ausmessen, um Scrollposition und -länge zu kennen
+MODUL_KARTE_HOEHE = 150
+AUFGABE_KARTE_HOEHE = 125
+TERMIN_KARTE_HOEHE = 110
+# Karten pro Seite; weitere Seiten werden beim Scrollen nachgeladen
+SEITE = 40
+# Ist das Verzeichnis gesetzt, bekommt im Web-Modus jeder Browser eine eigene Datendatei darunter
+# (<Verzeichnis>/<Kennung>/studienplaner_data.json, Sicherungen daneben); sonst teilen sich alle eine Datei
+NUTZER_VERZEICHNIS = os.environ.get("STUDIENPLANER_NUTZER_VERZEICHNIS")
+NUTZER_SCHLUESSEL = "studienplaner.nutzer"
+
+
+# Kennung des Kalender-Feeds eines Nutzers, in seinem Verzeichnis abgelegt. Sie ist bewusst eine andere als die
+# Nutzerkennung: der Feed-Link wird geteilt, und wer die Nutzerkennung kennt, hat vollen Zugriff auf die Daten.
+def feed_kennung(verzeichnis: str) -> str:
+    pfad = os.path.join(verzeichnis, "kalender_kennung")
+    try:
+        with open(pfad, "r", encoding="utf-8") as f:
+            kennung = f.read().strip()
+        if re.fullmatch(r"[0-9a-f]{32}", kennung):
+            return kennung
+    except OSError:
+        pass
+    kennung = neue_id()
+    os.makedirs(verzeichnis, exist_ok=True)
+    with open(pfad + ".tmp", "w", encoding="utf-8") as f:
+        f.write(kennung)
+    os.replace(pfad + ".tmp", pfad)
+    return kennung
+
+
+def nutzer_modus(page: ft.Page) -> bool:
+    return bool(page.web and NUTZER_VERZEICHNIS)
+
 
+# Pfad einer zu importierenden Datei. Im Mehrnutzer-Betrieb relativ zum Verzeichnis des Nutzers, und nur Dateien
+# darin (auch über ".." oder Symlinks kommt niemand hinaus); sonst None
+def import_pfad(eingabe: str, verzeichnis: Optional[str]) -> Optional[str]:
+    if verzeichnis is None:
+        return eingabe
+    verzeichnis = os.path.realpath(verzeichnis)
+    pfad = os.path.realpath(os.path.join(verzeichnis, eingabe))
+    return pfad if os.path.commonpath([verzeichnis, pfad]) == verzeichnis else None
 
-def main(page: ft.Page):
+
+# (Datendatei, Pfad des Kalender-Feeds) für die Sitzung. Die Kennung liegt im Client-Speicher des Browsers,
+# so findet ein Nutzer beim erneuten Verbinden seine Datei wieder; ungültige Kennungen werden ersetzt.
+async def sitzung_dateien(page: ft.Page):
+    if not nutzer_modus(page):
+        return "studienplaner_data.json", None
+    speicher = page.client_storage
+    kennung = await speicher.get_async(NUTZER_SCHLUESSEL) if hasattr(speicher, "get_async") else speicher.get(NUTZER_SCHLUESSEL)
+    if not isinstance(kennung, str) or not re.fullmatch(r"[0-9a-f]{32}", kennung):
+        kennung = neue_id()
+        if hasattr(speicher, "set_async"):
+            await speicher.set_async(NUTZER_SCHLUESSEL, kennung)
+        else:
+            speicher.set(NUTZER_SCHLUESSEL, kennung)
+    verzeichnis = os.path.join(NUTZER_VERZEICHNIS, kennung)
+    feed = await asyncio.to_thread(feed_kennung, verzeichnis)
+    return (os.path.join(verzeichnis, "studienplaner_data.json"),
+            os.path.join("assets", "kalender", feed + ".ics"))
+
+
+async def main(page: ft.Page):
     page.title = "Studienplaner"
     page.favicon = "studienplaner_favicon.png"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -158,14 +86,123 @@ def main(page: ft.Page):
     page.window_height = 700
     page.padding = 20
     
-    app = StudienplanerApp()
-    app.daten_laden()
+    # Alle Sitzungen (Browser-Tabs) teilen sich eine App pro Datendatei: geladen wird nur beim ersten Tab,
+    # geschrieben nur von einem Speicher. Eigen ist jeder Sitzung nur, was sie gerade anzeigt.
+    # Alles, was auf die Platte wartet, läuft in einem Worker-Thread (asyncio.to_thread), damit eine langsame Platte
+    # oder ein großer Import in einer Sitzung die Ereignisschleife und damit die anderen Sitzungen nicht aufhält.
+    # Handler, die nur im Speicher arbeiten, bleiben synchron; Flet führt sie ohnehin in seinem Thread-Pool aus.
+    # Geladene Apps hält ein LRU-Cache; freigegeben wird die App erst, wenn die Sitzung abläuft
+    datei_pfad, ics_pfad = await sitzung_dateien(page)
+    # Schreibt schon ein anderer Prozess (z. B. api.py) die Datei, startet die Oberfläche nicht
+    try:
+        app = await asyncio.to_thread(StudienplanerApp.geteilt, datei_pfad, ics_pfad)
+    except DateiGesperrt as e:
+        page.add(ft.Text(f"Der Studienplaner kann nicht starten: {e}", color=ft.Colors.RED))
+        return
+    sitzung = Sitzung()
+    # Einmal täglich automatisch sichern; unveränderte Module kosten dabei keinen Speicherplatz
+    await asyncio.to_thread(app.backup_falls_faellig)
+
+    # In async-Handlern: update_async(), wo Flet es anbietet (bis 0.2x), sonst update()
+    async def seite_aktualisieren():
+        if hasattr(page, "update_async"):
+            await page.update_async()
+        else:
+            page.update()
+
+    # Eine wiederverwendete Snackbar und ein kleiner Dialog-Pool statt neuer Overlays bei jeder Meldung
+    overlays = Overlays(page)
+    if app.ladefehler:
+        overlays.meldung(f"Die Daten konnten nicht geladen werden, Speichern ist gesperrt: {app.ladefehler}",
+                         fehler=True, dauer=15000)
+
+    # Änderungen und Speicherfehler gehen über Flet-PubSub an die anderen Sitzungen derselben Datei
+    thema = "studienplaner:" + os.path.abspath(app.datei_pfad)
+
+    # Fehler beim Speichern im Hintergrund sichtbar machen (in allen Sitzungen). Registriert wird nur einmal pro App,
+    # von der ersten Sitzung: der PubSub-Hub gehört zur Flet-App, send_all_on_topic erreicht auch nach dem Ende
+    # dieser Sitzung alle, die das Thema abonniert haben
+    if app.speicher.bei_fehler is None:
+        pubsub = page.pubsub
+        app.speicher.bei_fehler = lambda fehler: pubsub.send_all_on_topic(thema, ("fehler", str(fehler)))
+
+    # Verbindung unterbrochen: die Sitzung kann sich wieder verbinden und bleibt deshalb angemeldet
+    @gemessen
+    async def sitzung_beenden(e=None):
+        await asyncio.to_thread(app.ausstehendes_speichern)
+
+    # Sitzung abgelaufen: abmelden und die App an den Cache zurückgeben
+    @gemessen
+    async def sitzung_schliessen(e=None):
+        page.pubsub.unsubscribe_all()
+        await sitzung_beenden()
+        await asyncio.to_thread(app.freigeben)
+
+    page.on_disconnect = sitzung_beenden
+    page.on_close = sitzung_schliessen
+
+    # Welche Teile nach einer Änderung neu zu zeichnen sind; registriert werden sie unten bei den Zeichenfunktionen
+    ansichten = Ansichten()
+    # Mit STUDIENPLANER_DIAGNOSE=1 wird jedes page.update() gemessen, samt der seit dem letzten Update neu gebauten
+    # oder geänderten Karten (siehe diagnose.py); sonst bleibt die Seite unverändert
+    diagnose.seite_instrumentieren(page, ansichten.geaendert_abholen)
+
+    # Ausgewähltes Modul und ausgewählte Aufgaben können inzwischen gelöscht (oder nach einer Wiederherstellung
+    # durch neue Objekte ersetzt) sein
+    def sitzung_abgleichen():
+        if sitzung.aktuelles_modul is not None:
+            modul = app.modul_nach_id(sitzung.aktuelles_modul.id)
+            if modul is not sitzung.aktuelles_modul:
+                sitzung.aktuelles_modul = modul
+                aufgabe_karten.zuruecksetzen()
+        if ausgewaehlt:
+            ausgewaehlt.intersection_update([aufgabe_id for aufgabe_id in ausgewaehlt if app.aufgabe_nach_id(aufgabe_id)])
+
+    # Betroffene Teile als veraltet markieren und nur die der aktiven Ansicht neu zeichnen.
+    # page.update() bleibt beim Aufrufer, damit eine Benutzeraktion genau ein Update verschickt.
+    def neu_zeichnen(*teile):
+        ansichten.veraltet(*teile)
+        with app.sperre:
+            ansichten.zeichnen(sitzung.aktuelle_ansicht)
+
+    def auffrischen(*teile):
+        neu_zeichnen(*teile)
+        page.update()
+
+    # Nach einer Änderung am Modell: selbst neu zeichnen und die anderen Sitzungen benachrichtigen
+    @gemessen
+    def aenderung_anzeigen(*teile):
+        sitzung_abgleichen()
+        neu_zeichnen(*teile)
+        page.pubsub.send_others_on_topic(thema, ("aenderung", teile))
+        # Sobald der Kalender-Feed einmal erzeugt wurde, folgt er jeder Änderung (nur geänderte Aufgaben werden neu serialisiert)
+        if app.ics_aktiv:
+            app.ics_aktualisieren(im_hintergrund=True)
+
+    # Nachricht einer anderen Sitzung: nur die genannten Teile abgleichen (die Kartenlisten ändern nur, was anders ist)
+    @gemessen
+    def nachricht_empfangen(_thema, nachricht):
+        art, inhalt = nachricht
+        if art == "aenderung":
+            sitzung_abgleichen()
+            neu_zeichnen(*inhalt)
+        elif art == "fehler":
+            overlays.meldung(f"Fehler beim Speichern: {inhalt}", fehler=True)
+        page.update()
+
+    page.pubsub.subscribe_topic(thema, nachricht_empfangen)
     
-    module_list = ft.ListView(expand=True, spacing=10)
-    aufgaben_list = ft.ListView(expand=True, spacing=5)
-    kalender_content = ft.Column(expand=True, scroll="auto")
+    # Ohne spacing, da Flutter item_extent bei Listen mit Abstand ignoriert; den Abstand liefert der Rand der Karten
+    module_list = ft.ListView(expand=True, item_extent=MODUL_KARTE_HOEHE, on_scroll_interval=100)
+    aufgaben_list = ft.ListView(expand=True, item_extent=AUFGABE_KARTE_HOEHE, on_scroll_interval=100)
+    kalender_liste = ft.ListView(expand=True, item_extent=TERMIN_KARTE_HOEHE, on_scroll_interval=100)
+    kalender_content = ft.Column([
+        ft.Text(f"Überfällige, sowie die ab heute bis Ende nächsten Monat fällig werdenden Aufgaben", size=24, weight=ft.FontWeight.BOLD),
+        kalender_liste
+    ], expand=True)
     dashboard_content = ft.Column(expand=True, scroll="auto")
     
+    @gemessen
     def modul_dialog(e=None, modul_bearbeiten=None):
         ist_bearbeiten = modul_bearbeiten is not None
 
@@ -190,13 +227,17 @@ def main(page: ft.Page):
             value=modul_bearbeiten.farbe if ist_bearbeiten else "#2196F3"
         )
 
+        @gemessen
         def modul_speichern(e=None):
             if modul_name.value and modul_name.value.strip():
                 if ist_bearbeiten:
                     # Vorhandenes Modul aktualisieren
-                    modul_bearbeiten.name = modul_name.value.strip()
-                    modul_bearbeiten.beschreibung = modul_beschreibung.value.strip() if modul_beschreibung.value else ""
-                    modul_bearbeiten.farbe = modul_farbe.value
+                    app.modul_aktualisieren(
+                        modul_bearbeiten,
+                        name=modul_name.value.strip(),
+                        beschreibung=modul_beschreibung.value.strip() if modul_beschreibung.value else "",
+                        farbe=modul_farbe.value
+                    )
                 else:
                     # Neues Modul erstellen
                     neues_modul = Modul(
@@ -204,29 +245,28 @@ def main(page: ft.Page):
                         modul_farbe.value,
                         modul_beschreibung.value.strip() if modul_beschreibung.value else ""
                     )
-                    app.module.append(neues_modul)
+                    app.modul_hinzufuegen(neues_modul)
 
-                app.daten_speichern()
-                aktualisiere_module_liste()
+                # Umbenennen oder Umfärben betrifft auch Aufgabenkopf, Kalender und Dashboard
+                if ist_bearbeiten:
+                    aenderung_anzeigen()
+                else:
+                    aenderung_anzeigen("module_liste", "dashboard")
 
                 # Snackbar einbauen
-                snack_text = f"Modul '{modul_name.value.strip()}' wurde {'aktualisiert' if ist_bearbeiten else 'erstellt'}."
-                snack = ft.SnackBar(
-                    ft.Text(snack_text),
-                    duration=3000
-                )
-                page.snack_bar = snack
-                page.overlay.append(snack)
-                snack.open = True
-                page.close(dialog)
+                overlays.meldung(f"Modul '{modul_name.value.strip()}' wurde {'aktualisiert' if ist_bearbeiten else 'erstellt'}.")
+                overlays.schliessen(dialog)
                 page.update()
             else:
                 modul_name.error_text = "Bitte geben Sie einen Modulnamen ein"
                 page.update()
 
+        @gemessen
         def dialog_abbrechen(e=None):
-            page.close(dialog)
+            overlays.schliessen(dialog)
+            page.update()
 
+        @gemessen
         def on_key(e: ft.KeyboardEvent):
             if not dialog.open:
                 return
@@ -235,30 +275,29 @@ def main(page: ft.Page):
             elif e.key == "Enter":
                 modul_speichern()
 
-        dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Modul bearbeiten" if ist_bearbeiten else "Neues Modul hinzufügen"),
-            content=ft.Column([
+        dialog = overlays.dialog(
+            "Modul bearbeiten" if ist_bearbeiten else "Neues Modul hinzufügen",
+            ft.Column([
                 modul_name,
                 modul_beschreibung,
                 modul_farbe
             ], tight=True, height=200),
-            actions=[
+            [
                 ft.TextButton("Abbrechen", on_click=dialog_abbrechen),
                 ft.ElevatedButton("Speichern", on_click=modul_speichern)
-            ]
+            ],
+            tasten=on_key
         )
-
-        page.on_keyboard_event = on_key
-        page.open(dialog)
         page.update()
         modul_name.focus()
-        page.update()
 
 
     # Block 3: Aufgabe hinzufügen Dialog
-    def aufgabe_dialog(e=None, aufgabe_bearbeiten=None):
-        if not app.aktuelles_modul:
+    @gemessen
+    def aufgabe_dialog(e=None, aufgabe_bearbeiten=None, modul=None):
+        # Suchtreffer können zu einem anderen als dem ausgewählten Modul gehören
+        modul = modul or sitzung.aktuelles_modul
+        if not modul:
             return
 
         ist_bearbeiten = aufgabe_bearbeiten is not None
@@ -276,12 +315,15 @@ def main(page: ft.Page):
                 ft.dropdown.Option("Abgabe"),
                 ft.dropdown.Option("Prüfung")
             ],
-            value=aufgabe_bearbeiten.prioritaet if ist_bearbeiten else "Selbststudium"
+            value=str(aufgabe_bearbeiten.prioritaet) if ist_bearbeiten else "Selbststudium"
         )
 
+        @gemessen
         def dialog_schliessen(e=None):
-            page.close(dialog)
+            overlays.schliessen(dialog)
+            page.update()
 
+        @gemessen
         def aufgabe_speichern(e=None):
             if aufgabe_titel.value.strip():
                 # Datum validieren
@@ -295,10 +337,14 @@ def main(page: ft.Page):
 
                 if ist_bearbeiten:
                     # Aufgabe aktualisieren
-                    aufgabe_bearbeiten.titel = aufgabe_titel.value.strip()
-                    aufgabe_bearbeiten.beschreibung = aufgabe_beschreibung.value.strip()
-                    aufgabe_bearbeiten.faelligkeitsdatum = faelligkeitsdatum
-                    aufgabe_bearbeiten.prioritaet = aufgabe_prioritaet.value
+                    app.aufgabe_aktualisieren(
+                        modul,
+                        aufgabe_bearbeiten,
+                        titel=aufgabe_titel.value.strip(),
+                        beschreibung=aufgabe_beschreibung.value.strip(),
+                        faelligkeitsdatum=faelligkeitsdatum,
+                        prioritaet=aufgabe_prioritaet.value
+                    )
                 else:
                     # Neue Aufgabe anlegen
                     neue_aufgabe = Aufgabe(
@@ -307,29 +353,19 @@ def main(page: ft.Page):
                         faelligkeitsdatum,
                         aufgabe_prioritaet.value
                     )
-                    app.aktuelles_modul.aufgaben.append(neue_aufgabe)
+                    app.aufgabe_hinzufuegen(modul, neue_aufgabe)
 
-                app.daten_speichern()
-                aktualisiere_aufgaben_liste()
-                aktualisiere_module_liste()
-                aktualisiere_dashboard()
+                aenderung_anzeigen("aufgaben", "module_liste", "kalender", "dashboard")
 
                 # Snackbar anzeigen
-                msg = "Aufgabe erfolgreich bearbeitet." if ist_bearbeiten else "Aufgabe erfolgreich erstellt."
-                snack = ft.SnackBar(
-                    ft.Text(msg),
-                    duration=3000
-                )
-                page.snack_bar = snack
-                page.overlay.append(snack)
-                snack.open = True
-
-                page.close(dialog)
+                overlays.meldung("Aufgabe erfolgreich bearbeitet." if ist_bearbeiten else "Aufgabe erfolgreich erstellt.")
+                overlays.schliessen(dialog)
                 page.update()
             else:
                 aufgabe_titel.error_text = "Bitte geben Sie einen Aufgabentitel ein"
                 page.update()
 
+        @gemessen
         def on_key(e: ft.KeyboardEvent):
             if not dialog.open:
                 return
@@ -338,384 +374,679 @@ def main(page: ft.Page):
             elif e.key == "Enter":
                 aufgabe_speichern()
 
-        dialog = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("Aufgabe bearbeiten" if ist_bearbeiten else f"Neue Aufgabe für {app.aktuelles_modul.name}"),
-            content=ft.Column([
+        dialog = overlays.dialog(
+            "Aufgabe bearbeiten" if ist_bearbeiten else f"Neue Aufgabe für {modul.name}",
+            ft.Column([
                 aufgabe_titel,
                 aufgabe_beschreibung,
                 aufgabe_datum,
                 aufgabe_prioritaet
             ], tight=True, height=250),
-            actions=[
+            [
                 ft.TextButton("Abbrechen", on_click=dialog_schliessen),
                 ft.ElevatedButton("Speichern", on_click=aufgabe_speichern)
-            ]
+            ],
+            tasten=on_key
         )
-
-        page.dialog = dialog
-        page.overlay.append(dialog)
-        dialog.open = True
         page.update()
         aufgabe_titel.focus()
-        page.on_keyboard_event = on_key
 
-    def aktualisiere_module_liste():
-        module_list.controls.clear()     
+    @gemessen
+    def loesche_modul(e, modul_id):
+        zu_loeschendes_modul = app.modul_nach_id(modul_id)
+        if zu_loeschendes_modul is None:
+            return
 
-        if not app.module:
-            module_list.controls.append(
-                ft.Container(
-                    content=ft.Text("Noch keine Module vorhanden.", 
-                                    size=18, text_align=ft.TextAlign.CENTER, italic=True),
-                    padding=20,
-                    alignment=ft.alignment.center
-                )
-            )
-        else:
-            for modul in app.module:
-                fortschritt = modul.get_fortschritt()
-                aufgaben_anzahl = len(modul.aufgaben)
-                erledigte_anzahl = sum(1 for a in modul.aufgaben if a.erledigt)
-
-                def loesche_modul(e, zu_loeschendes_modul=modul):
-                    def modul_loeschen_bestaetigt(e=None):
-                        if zu_loeschendes_modul in app.module:
-                            app.module.remove(zu_loeschendes_modul)
-                            app.aktuelles_modul = None if app.aktuelles_modul == zu_loeschendes_modul else app.aktuelles_modul
-                            app.daten_speichern()
-                            aktualisiere_module_liste()
-                            aktualisiere_aufgaben_liste()
-                            aktualisiere_dashboard()
-
-                            # Snackbar anzeigen
-                            snack = ft.SnackBar(
-                                ft.Text(f"Modul '{zu_loeschendes_modul.name}' erfolgreich gelöscht."),
-                                duration=3000
-                            )
-                            page.snack_bar = snack
-                            page.overlay.append(snack)
-                            snack.open = True
-                            
-                        page.dialog.open = False
-                        page.update()
-
-                    def modul_loeschen_abbrechen(e=None):
-                        page.dialog.open = False
-                        page.update()
-
-                    def on_key(e: ft.KeyboardEvent):
-                        if not dialog.open:
-                            return
-                        if e.key == "Escape":
-                            modul_loeschen_abbrechen()
-                        elif e.key == "Enter":
-                            modul_loeschen_bestaetigt()
-
-                    dialog = ft.AlertDialog(
-                        modal=True,
-                        title=ft.Text("Modul löschen"),
-                        content=ft.Text(f"Möchten Sie das Modul '{zu_loeschendes_modul.name}' wirklich löschen?"),
-                        actions=[
-                            ft.TextButton("Abbrechen", on_click=modul_loeschen_abbrechen),
-                            ft.ElevatedButton("Löschen", on_click=modul_loeschen_bestaetigt, bgcolor=ft.Colors.RED, color=ft.Colors.WHITE)
-                        ],
-                        actions_alignment=ft.MainAxisAlignment.END
-                    )
-                    page.dialog = dialog
-                    page.overlay.append(dialog)
-                    dialog.open = True
-                    page.on_keyboard_event = on_key
-                    page.update()
-
-                modul_card = ft.Card(
-                    content=ft.Container(
-                        content=ft.Column([
-                            ft.Row([
-                                ft.Container(
-                                    content=ft.Text(modul.name, size=20, weight=ft.FontWeight.BOLD),
-                                    expand=True
-                                ),
-                                ft.Text(f"{erledigte_anzahl}/{aufgaben_anzahl}", size=14),
-                                ft.Row([
-                                    ft.IconButton(
-                                        icon=ft.Icons.EDIT,
-                                        icon_color=ft.Colors.GREY_800,
-                                        tooltip="Modul bearbeiten",
-                                        on_click=lambda e, m=modul: modul_dialog(e, modul_bearbeiten=m),
-                                        style=ft.ButtonStyle(padding=5)
-                                    ),
-                                    ft.IconButton(
-                                        icon=ft.Icons.DELETE,
-                                        icon_color=ft.Colors.RED_700,
-                                        tooltip="Modul löschen",
-                                        on_click=lambda e, m=modul: loesche_modul(e, m),
-                                        style=ft.ButtonStyle(padding=5)
-                                    )
-                                ], spacing=0)  # <- Icons ganz nah beieinander
-                            ]),
-                            ft.Text(modul.beschreibung, size=18, opacity=0.9) if modul.beschreibung else ft.Container(),
-                            ft.ProgressBar(value=fortschritt, color=modul.farbe, height=8),
-                        ]),
-                        padding=15,
-                        border_radius=8,
-                        bgcolor=ft.Colors.with_opacity(0.3, modul.farbe),
-                        on_click=lambda e, m=modul: modul_auswaehlen(m)
-                    )
-                )
+        @gemessen
+        def modul_loeschen_bestaetigt(e=None):
+            if app.modul_nach_id(zu_loeschendes_modul.id) is not None:
+                app.modul_loeschen(zu_loeschendes_modul)
+                aenderung_anzeigen()
+
+                # Snackbar anzeigen
+                overlays.meldung(f"Modul '{zu_loeschendes_modul.name}' erfolgreich gelöscht.")
+                
+            overlays.schliessen(dialog)
+            page.update()
 
-                module_list.controls.append(modul_card)
+        @gemessen
+        def modul_loeschen_abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
 
+        @gemessen
+        def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                modul_loeschen_abbrechen()
+            elif e.key == "Enter":
+                modul_loeschen_bestaetigt()
+
+        dialog = overlays.dialog(
+            "Modul löschen",
+            ft.Text(f"Möchten Sie das Modul '{zu_loeschendes_modul.name}' wirklich löschen?"),
+            [
+                ft.TextButton("Abbrechen", on_click=modul_loeschen_abbrechen),
+                ft.ElevatedButton("Löschen", on_click=modul_loeschen_bestaetigt, bgcolor=ft.Colors.RED, color=ft.Colors.WHITE)
+            ],
+            tasten=on_key,
+            actions_alignment=ft.MainAxisAlignment.END
+        )
         page.update()
 
+    # Modul-Karten werden einmal gebaut und danach nur noch angepasst (siehe abgleich.py)
+    def modul_karte_erzeugen(eintrag):
+        modul_id = eintrag[0].id
+        teile = {
+            "name": ft.Text(size=20, weight=ft.FontWeight.BOLD, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+            "zaehler": ft.Text(size=14),
+            "beschreibung": ft.Text(size=18, opacity=0.9, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+            "fortschritt": ft.ProgressBar(value=0, height=8),
+        }
+        teile["container"] = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Container(
+                        content=teile["name"],
+                        expand=True
+                    ),
+                    teile["zaehler"],
+                    ft.Row([
+                        ft.IconButton(
+                            icon=ft.Icons.EDIT,
+                            icon_color=ft.Colors.GREY_800,
+                            tooltip="Modul bearbeiten",
+                            on_click=lambda e: modul_dialog(e, modul_bearbeiten=app.modul_nach_id(modul_id)),
+                            style=ft.ButtonStyle(padding=5)
+                        ),
+                        ft.IconButton(
+                            icon=ft.Icons.DELETE,
+                            icon_color=ft.Colors.RED_700,
+                            tooltip="Modul löschen",
+                            on_click=lambda e: loesche_modul(e, modul_id),
+                            style=ft.ButtonStyle(padding=5)
+                        )
+                    ], spacing=0)  # <- Icons ganz nah beieinander
+                ]),
+                teile["beschreibung"],
+                teile["fortschritt"],
+            ]),
+            padding=15,
+            border_radius=8,
+            on_click=lambda e: modul_auswaehlen(app.modul_nach_id(modul_id))
+        )
+        return ft.Card(content=teile["container"]), teile
+
+    def modul_karte_zustand(eintrag):
+        modul, aufgaben_anzahl, erledigte_anzahl = eintrag
+        return (modul.name, modul.beschreibung, modul.farbe, aufgaben_anzahl, erledigte_anzahl)
+
+    def modul_karte_aktualisieren(teile, eintrag):
+        modul, aufgaben_anzahl, erledigte_anzahl = eintrag
+        teile["name"].value = modul.name
+        teile["zaehler"].value = f"{erledigte_anzahl}/{aufgaben_anzahl}"
+        teile["beschreibung"].value = modul.beschreibung
+        teile["beschreibung"].visible = bool(modul.beschreibung)
+        teile["fortschritt"].value = erledigte_anzahl / aufgaben_anzahl if aufgaben_anzahl else 0
+        teile["fortschritt"].color = modul.farbe
+        teile["container"].bgcolor = ft.Colors.with_opacity(0.3, modul.farbe)
+
+    modul_karten = KartenListe(modul_karte_erzeugen, modul_karte_aktualisieren, modul_karte_zustand, seite=SEITE)
+    keine_module = ft.Container(
+        content=ft.Text("Noch keine Module vorhanden.", 
+                        size=18, text_align=ft.TextAlign.CENTER, italic=True),
+        padding=20,
+        alignment=ft.alignment.center
+    )
+
+    def aktualisiere_module_liste():
+        if not app.module:
+            return modul_karten.abgleichen(module_list.controls, (), kopf=[keine_module])
+        else:
+            zahlen = app.dashboard_zahlen()["module"]
+            return modul_karten.abgleichen(
+                module_list.controls,
+                ((modul.id, (modul, aufgaben_anzahl, erledigte_anzahl))
+                 for modul, (aufgaben_anzahl, erledigte_anzahl) in zip(app.module, zahlen))
+            )
 
+    module_list.on_scroll = nachladen_beim_scrollen(modul_karten, lambda: auffrischen("module_liste"))
 
+    @gemessen
     def modul_auswaehlen(modul: Modul):
-        app.aktuelles_modul = modul
-        aktualisiere_aufgaben_liste()
+        if modul is not sitzung.aktuelles_modul:
+            aufgabe_karten.zuruecksetzen()
+        sitzung.aktuelles_modul = modul
+        auffrischen("aufgaben")
     
  
-    def aktualisiere_aufgaben_liste():
-        aufgaben_list.controls.clear()
+    @gemessen
+    def toggle_aufgabe_status(e, aufgabe_id):
+        treffer = app.aufgabe_nach_id(aufgabe_id)
+        if treffer is None:
+            return
+        aufgabe, modul = treffer
+        app.aufgabe_umschalten(modul, aufgabe)
+        aenderung_anzeigen("aufgaben", "module_liste", "kalender", "dashboard")
+        page.update()
 
-        if not app.aktuelles_modul:
-            aufgaben_list.controls.append(
-                ft.Container(
-                    content=ft.Text("Wählen Sie ein Modul aus der Liste links aus",
-                                size=18, text_align=ft.TextAlign.CENTER, italic=True),
-                    padding=20,
-                    alignment=ft.alignment.center
-                )
-            )
-            page.update()
+    @gemessen
+    def aufgabe_bearbeiten(e, aufgabe_id):
+        treffer = app.aufgabe_nach_id(aufgabe_id)
+        if treffer is not None:
+            aufgabe_dialog(e, treffer[0], treffer[1])
+
+    @gemessen
+    def aufgabe_loeschen(e, aufgabe_id):
+        treffer = app.aufgabe_nach_id(aufgabe_id)
+        if treffer is None:
             return
+        aufgabe, modul = treffer
 
-        header = ft.Row([
-            ft.Text(f"Aufgaben für {app.aktuelles_modul.name}", size=20, weight=ft.FontWeight.BOLD),
-            ft.ElevatedButton("Neue Aufgabe", icon=ft.Icons.ADD, on_click=aufgabe_dialog)
-        ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
-        aufgaben_list.controls.append(header)
+        @gemessen
+        def aufgabe_loeschen_bestaetigen(e=None):
+            if app.aufgabe_nach_id(aufgabe_id) is not None:
+                app.aufgabe_loeschen(modul, aufgabe)
+                aenderung_anzeigen("aufgaben", "module_liste", "kalender", "dashboard")
 
-        if not app.aktuelles_modul.aufgaben:
-            aufgaben_list.controls.append(
-                ft.Container(
-                    content=ft.Text("Noch keine Aufgaben vorhanden.",
-                                size=18, text_align=ft.TextAlign.CENTER, italic=True),
-                    padding=20,
-                    alignment=ft.alignment.center
-                )
-            )
-        else:
-            for i, aufgabe in enumerate(app.aktuelles_modul.aufgaben):
-                prioritaet_farbe = {
-                    "Selbststudium": ft.Colors.GREEN,
-                    "Praktische Arbeit": ft.Colors.BLUE,
-                    "Abgabe": ft.Colors.ORANGE,
-                    "Prüfung": ft.Colors.RED
-                }.get(aufgabe.prioritaet, ft.Colors.BLUE)
-
-                status_icon = ft.Icons.CHECK_CIRCLE if aufgabe.erledigt else ft.Icons.RADIO_BUTTON_UNCHECKED
-                status_farbe = ft.Colors.GREEN if aufgabe.erledigt else ft.Colors.GREY
-
-                card_farbe = ft.Colors.RED_50 if aufgabe.ist_ueberfaellig() else None
-
-                def toggle_aufgabe_status(e, aufgabe_idx=i):
-                    app.aktuelles_modul.aufgaben[aufgabe_idx].erledigt = not app.aktuelles_modul.aufgaben[aufgabe_idx].erledigt
-                    app.daten_speichern()
-                    aktualisiere_aufgaben_liste()
-                    aktualisiere_module_liste()
-                    aktualisiere_dashboard()
-
-                def aufgabe_loeschen(e, aufgabe_idx=i):
-                    def aufgabe_loeschen_bestaetigen(e=None):
-                        del app.aktuelles_modul.aufgaben[aufgabe_idx]
-                        app.daten_speichern()
-                        aktualisiere_aufgaben_liste()
-                        aktualisiere_module_liste()
-                        aktualisiere_dashboard()
-                        page.dialog.open = False
-
-                        # Snackbar anzeigen
-                        snack = ft.SnackBar(
-                            ft.Text(f"Aufgabe erfolgreich gelöscht."),
-                            duration=3000
-                        )
-                        page.snack_bar = snack
-                        page.overlay.append(snack)
-                        snack.open = True
-
-                        page.update()
-
-                    def aufgabe_loeschen_abbrechen(e=None):
-                        page.dialog.open = False
-                        page.update()
-
-                    def on_key(e: ft.KeyboardEvent):
-                        if not dialog.open:
-                            return
-                        if e.key == "Escape":
-                            aufgabe_loeschen_abbrechen()
-                        elif e.key == "Enter":
-                            aufgabe_loeschen_bestaetigen()
-
-                    dialog = ft.AlertDialog(
-                        modal=True,
-                        title=ft.Text("Aufgabe löschen"),
-                        content=ft.Text(f"Möchten Sie die Aufgabe '{app.aktuelles_modul.aufgaben[aufgabe_idx].titel}' wirklich löschen?"),
-                        actions=[
-                            ft.TextButton("Abbrechen", on_click=aufgabe_loeschen_abbrechen),
-                            ft.ElevatedButton(
-                                "Löschen",
-                                on_click=aufgabe_loeschen_bestaetigen,
-                                bgcolor=ft.Colors.RED,
-                                color=ft.Colors.WHITE
-                            )
-                        ],
-                        actions_alignment=ft.MainAxisAlignment.END
-                    )
-                    page.dialog = dialog
-                    page.overlay.append(dialog)
-                    dialog.open = True
-                    page.on_keyboard_event = on_key
-                    page.update()
-
-                # Buttons Edit + Delete nebeneinander mit spacing=0 und Farbe GREY_800
-                edit_button = ft.IconButton(
-                    icon=ft.Icons.EDIT,
-                    icon_color=ft.Colors.GREY_800,
-                    tooltip="Aufgabe bearbeiten",
-                    on_click=lambda e, a=aufgabe: aufgabe_dialog(e, a),
-                    padding=5,
-                    width=35,
-                    height=35,
-                )
-                delete_button = ft.IconButton(
-                    icon=ft.Icons.DELETE,
-                    icon_color=ft.Colors.RED_700,
-                    tooltip="Aufgabe löschen",
-                    on_click=aufgabe_loeschen,
-                    padding=5,
-                    width=35,
-                    height=35,
+                # Snackbar anzeigen
+                overlays.meldung("Aufgabe erfolgreich gelöscht.")
+
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def aufgabe_loeschen_abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                aufgabe_loeschen_abbrechen()
+            elif e.key == "Enter":
+                aufgabe_loeschen_bestaetigen()
+
+        dialog = overlays.dialog(
+            "Aufgabe löschen",
+            ft.Text(f"Möchten Sie die Aufgabe '{aufgabe.titel}' wirklich löschen?"),
+            [
+                ft.TextButton("Abbrechen", on_click=aufgabe_loeschen_abbrechen),
+                ft.ElevatedButton(
+                    "Löschen",
+                    on_click=aufgabe_loeschen_bestaetigen,
+                    bgcolor=ft.Colors.RED,
+                    color=ft.Colors.WHITE
                 )
+            ],
+            tasten=on_key,
+            actions_alignment=ft.MainAxisAlignment.END
+        )
+        page.update()
+
+    # Aufgaben-Karten: über die ID gebunden, damit die Handler nicht von der Listenposition abhängen
+    def aufgabe_karte_erzeugen(eintrag):
+        aufgabe_id = eintrag[0].id
+        teile = {
+            "auswahl": ft.Checkbox(on_change=lambda e: auswahl_umschalten(aufgabe_id, e.control.value)),
+            "status": ft.IconButton(on_click=lambda e: toggle_aufgabe_status(e, aufgabe_id)),
+            "titel": ft.Text(size=18, weight=ft.FontWeight.BOLD, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+            "beschreibung": ft.Text(size=16, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+            "prioritaet": ft.Text(size=14, color=ft.Colors.WHITE),
+            "faellig": ft.Text(size=14),
+        }
+        teile["prioritaet_box"] = ft.Container(
+            content=teile["prioritaet"],
+            padding=ft.padding.symmetric(horizontal=8, vertical=4),
+            border_radius=4
+        )
 
-                aufgabe_card = ft.Card(
-                    content=ft.Container(
+        # Buttons Edit + Delete nebeneinander mit spacing=0 und Farbe GREY_800
+        edit_button = ft.IconButton(
+            icon=ft.Icons.EDIT,
+            icon_color=ft.Colors.GREY_800,
+            tooltip="Aufgabe bearbeiten",
+            on_click=lambda e: aufgabe_bearbeiten(e, aufgabe_id),
+            padding=5,
+            width=35,
+            height=35,
+        )
+        delete_button = ft.IconButton(
+            icon=ft.Icons.DELETE,
+            icon_color=ft.Colors.RED_700,
+            tooltip="Aufgabe löschen",
+            on_click=lambda e: aufgabe_loeschen(e, aufgabe_id),
+            padding=5,
+            width=35,
+            height=35,
+        )
+
+        teile["container"] = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    teile["auswahl"],
+                    teile["status"],
+                    ft.Container(
                         content=ft.Column([
+                            teile["titel"],
+                            teile["beschreibung"],
                             ft.Row([
-                                ft.IconButton(
-                                    icon=status_icon,
-                                    icon_color=status_farbe,
-                                    on_click=toggle_aufgabe_status
-                                ),
-                                ft.Container(
-                                    content=ft.Column([
-                                        ft.Text(
-                                            aufgabe.titel,
-                                            size=18,
-                                            weight=ft.FontWeight.BOLD,
-                                            style=ft.TextStyle(decoration=ft.TextDecoration.LINE_THROUGH) if aufgabe.erledigt else None
-                                        ),
-                                        ft.Text(aufgabe.beschreibung, size=16) if aufgabe.beschreibung else ft.Container(height=0),
-                                        ft.Row([
-                                            ft.Container(
-                                                content=ft.Text(aufgabe.prioritaet, size=14, color=ft.Colors.WHITE),
-                                                bgcolor=prioritaet_farbe,
-                                                padding=ft.padding.symmetric(horizontal=8, vertical=4),
-                                                border_radius=4
-                                            ),
-                                            ft.Text(
-                                                f"Fällig: {aufgabe.faelligkeitsdatum}" if aufgabe.faelligkeitsdatum else "",
-                                                size=14,
-                                                color=ft.Colors.RED if aufgabe.ist_ueberfaellig() else ft.Colors.GREY
-                                            )
-                                        ], spacing=10)
-                                    ], spacing=5),
-                                    expand=True
-                                ),
-                                ft.Row(
-                                    [edit_button, delete_button],
-                                    spacing=0,
-                                    vertical_alignment=ft.CrossAxisAlignment.CENTER
-                                )
-                            ])
-                        ]),
-                        padding=10,
-                        bgcolor=card_farbe
+                                teile["prioritaet_box"],
+                                teile["faellig"]
+                            ], spacing=10)
+                        ], spacing=5),
+                        expand=True
+                    ),
+                    ft.Row(
+                        [edit_button, delete_button],
+                        spacing=0,
+                        vertical_alignment=ft.CrossAxisAlignment.CENTER
                     )
+                ])
+            ]),
+            padding=10
+        )
+        return ft.Card(content=teile["container"]), teile
+
+    def aufgabe_karte_zustand(eintrag):
+        aufgabe, ueberfaellig, gewaehlt = eintrag
+        return (aufgabe.titel, aufgabe.beschreibung, aufgabe.prioritaet, aufgabe.faelligkeitsdatum, aufgabe.erledigt, ueberfaellig, gewaehlt)
+
+    def aufgabe_karte_aktualisieren(teile, eintrag):
+        aufgabe, ueberfaellig, gewaehlt = eintrag
+        teile["auswahl"].value = gewaehlt
+        teile["status"].icon = ft.Icons.CHECK_CIRCLE if aufgabe.erledigt else ft.Icons.RADIO_BUTTON_UNCHECKED
+        teile["status"].icon_color = ft.Colors.GREEN if aufgabe.erledigt else ft.Colors.GREY
+        teile["titel"].value = aufgabe.titel
+        teile["titel"].style = ft.TextStyle(decoration=ft.TextDecoration.LINE_THROUGH) if aufgabe.erledigt else None
+        teile["beschreibung"].value = aufgabe.beschreibung
+        teile["beschreibung"].visible = bool(aufgabe.beschreibung)
+        teile["prioritaet"].value = str(aufgabe.prioritaet)
+        teile["prioritaet_box"].bgcolor = {
+            "Selbststudium": ft.Colors.GREEN,
+            "Praktische Arbeit": ft.Colors.BLUE,
+            "Abgabe": ft.Colors.ORANGE,
+            "Prüfung": ft.Colors.RED
+        }.get(aufgabe.prioritaet, ft.Colors.BLUE)
+        teile["faellig"].value = f"Fällig: {aufgabe.faelligkeitsdatum}" if aufgabe.faelligkeitsdatum else ""
+        teile["faellig"].color = ft.Colors.RED if ueberfaellig else ft.Colors.GREY
+        teile["container"].bgcolor = ft.Colors.RED_50 if ueberfaellig else None
+
+    aufgabe_karten = KartenListe(aufgabe_karte_erzeugen, aufgabe_karte_aktualisieren, aufgabe_karte_zustand, seite=SEITE)
+    kein_modul_gewaehlt = ft.Container(
+        content=ft.Text("Wählen Sie ein Modul aus der Liste links aus",
+                    size=18, text_align=ft.TextAlign.CENTER, italic=True),
+        padding=20,
+        alignment=ft.alignment.center
+    )
+    keine_aufgaben = ft.Container(
+        content=ft.Text("Noch keine Aufgaben vorhanden.",
+                    size=18, text_align=ft.TextAlign.CENTER, italic=True),
+        padding=20,
+        alignment=ft.alignment.center
+    )
+    aufgaben_titel = ft.Text(size=20, weight=ft.FontWeight.BOLD)
+    aufgaben_kopf = ft.Row([
+        aufgaben_titel,
+        ft.ElevatedButton("Neue Aufgabe", icon=ft.Icons.ADD, on_click=aufgabe_dialog)
+    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+
+    keine_treffer = ft.Container(
+        content=ft.Text("Keine passenden Aufgaben gefunden.",
+                    size=18, text_align=ft.TextAlign.CENTER, italic=True),
+        padding=20,
+        alignment=ft.alignment.center
+    )
+
+    # Suche über alle Module: Solange ein Suchbegriff oder Filter gesetzt ist, zeigt die Aufgabenliste die Treffer
+    @gemessen
+    def suche_geaendert(e=None):
+        aufgabe_karten.zuruecksetzen()
+        auffrischen("aufgaben")
+
+    such_feld = ft.TextField(
+        hint_text="Aufgaben suchen …",
+        prefix_icon=ft.Icons.SEARCH,
+        expand=True,
+        dense=True,
+        on_change=suche_geaendert,
+        on_focus=lambda e: app.suchindex()  # Index schon beim Klick ins Feld aufbauen, nicht beim ersten Tastendruck
+    )
+    such_prioritaet = ft.Dropdown(
+        label="Priorität",
+        width=170,
+        dense=True,
+        options=[
+            ft.dropdown.Option("Alle"),
+            ft.dropdown.Option("Selbststudium"),
+            ft.dropdown.Option("Praktische Arbeit"),
+            ft.dropdown.Option("Abgabe"),
+            ft.dropdown.Option("Prüfung")
+        ],
+        value="Alle",
+        on_change=suche_geaendert
+    )
+    such_status = ft.Dropdown(
+        label="Status",
+        width=120,
+        dense=True,
+        options=[ft.dropdown.Option("Alle"), ft.dropdown.Option("Offen"), ft.dropdown.Option("Erledigt")],
+        value="Alle",
+        on_change=suche_geaendert
+    )
+    such_von = ft.TextField(label="Fällig ab", hint_text="YYYY-MM-DD", width=130, dense=True, on_change=suche_geaendert)
+    such_bis = ft.TextField(label="Fällig bis", hint_text="YYYY-MM-DD", width=130, dense=True, on_change=suche_geaendert)
+    such_zeile = ft.Row([such_feld, such_prioritaet, such_status, such_von, such_bis], spacing=10)
+
+    # (Anfrage, Priorität, erledigt, von, bis) aus den Suchfeldern; None = kein Filter
+    def suchfilter():
+        return (
+            (such_feld.value or "").strip(),
+            None if such_prioritaet.value in (None, "Alle") else such_prioritaet.value,
+            {"Offen": False, "Erledigt": True}.get(such_status.value),
+            datum_parsen(such_von.value),
+            datum_parsen(such_bis.value)
+        )
+
+    # Aufgaben, die die Liste gerade zeigt: bei gesetzter Suche die Treffer, sonst die des ausgewählten Moduls
+    # (None, wenn kein Modul ausgewählt ist)
+    def angezeigte_aufgaben(limit=None):
+        anfrage, prioritaet, erledigt, von, bis = suchfilter()
+        if anfrage or prioritaet or erledigt is not None or von or bis:
+            return [aufgabe for aufgabe, _ in app.aufgaben_suchen(anfrage, prioritaet=prioritaet, erledigt=erledigt,
+                                                                  von=von, bis=bis, limit=limit)]
+        if not sitzung.aktuelles_modul:
+            return None
+        return sitzung.aktuelles_modul.aufgaben
+
+    # Mehrfachauswahl: IDs der angehakten Aufgaben, auch über Modulwechsel und Suchen hinweg
+    ausgewaehlt = set()
+    PRIORITAETEN = ["Selbststudium", "Praktische Arbeit", "Abgabe", "Prüfung"]
+
+    @gemessen
+    def auswahl_umschalten(aufgabe_id, gewaehlt):
+        if gewaehlt:
+            ausgewaehlt.add(aufgabe_id)
+        else:
+            ausgewaehlt.discard(aufgabe_id)
+        stapel_leiste_aktualisieren()
+        page.update()
+
+    @gemessen
+    def alle_auswaehlen(e=None):
+        ausgewaehlt.update(aufgabe.id for aufgabe in angezeigte_aufgaben() or ())
+        auffrischen("aufgaben")
+
+    @gemessen
+    def auswahl_aufheben(e=None):
+        ausgewaehlt.clear()
+        auffrischen("aufgaben")
+
+    # Eine Sammelaktion = ein Journal-Eintrag, ein Neuzeichnen der aktiven Ansicht; page.update() macht der Aufrufer
+    @gemessen
+    def stapel_ausfuehren(aktion, text, auswahl_leeren=False):
+        anzahl = aktion(list(ausgewaehlt))
+        if auswahl_leeren:
+            ausgewaehlt.clear()
+        aenderung_anzeigen("aufgaben", "module_liste", "kalender", "dashboard")
+        overlays.meldung(text.format(anzahl=anzahl))
+
+    @gemessen
+    def stapel_status(erledigt):
+        stapel_ausfuehren(lambda ids: app.aufgaben_status_setzen(ids, erledigt),
+                          "{anzahl} Aufgabe(n) als " + ("erledigt" if erledigt else "offen") + " markiert.")
+        page.update()
+
+    @gemessen
+    def stapel_prioritaet(prioritaet):
+        stapel_ausfuehren(lambda ids: app.aufgaben_aktualisieren(ids, prioritaet=prioritaet),
+                          "Priorität von {anzahl} Aufgabe(n) auf " + prioritaet + " gesetzt.")
+        page.update()
+
+    @gemessen
+    def stapel_faelligkeit_dialog(e=None):
+        tage_feld = ft.TextField(label="Tage (z. B. 7 oder -3)", width=300, autofocus=True)
+
+        @gemessen
+        def verschieben(e=None):
+            try:
+                tage = int((tage_feld.value or "").strip())
+            except ValueError:
+                tage_feld.error_text = "Bitte eine ganze Zahl eingeben"
+                page.update()
+                return
+            stapel_ausfuehren(lambda ids: app.aufgaben_faelligkeit_verschieben(ids, tage),
+                              "Fälligkeit von {anzahl} Aufgabe(n) verschoben.")
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                abbrechen()
+            elif e.key == "Enter":
+                verschieben()
+
+        dialog = overlays.dialog(
+            f"Fälligkeit von {len(ausgewaehlt)} Aufgabe(n) verschieben",
+            tage_feld,
+            [ft.TextButton("Abbrechen", on_click=abbrechen), ft.ElevatedButton("Verschieben", on_click=verschieben)],
+            tasten=on_key
+        )
+        page.update()
+
+    @gemessen
+    def stapel_modul_dialog(e=None):
+        auswahl = app.modul_auswahl()
+        if not auswahl:
+            return
+        ziel_feld = ft.Dropdown(
+            label="Zielmodul",
+            width=300,
+            options=[ft.dropdown.Option(key=modul_id, text=name) for modul_id, name in auswahl],
+            value=sitzung.aktuelles_modul.id if sitzung.aktuelles_modul else auswahl[0][0]
+        )
+
+        @gemessen
+        def verschieben(e=None):
+            ziel = app.modul_nach_id(ziel_feld.value)
+            if ziel is not None:
+                stapel_ausfuehren(lambda ids: app.aufgaben_verschieben(ids, ziel),
+                                  "{anzahl} Aufgabe(n) nach '" + ziel.name + "' verschoben.", auswahl_leeren=True)
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                abbrechen()
+            elif e.key == "Enter":
+                verschieben()
+
+        dialog = overlays.dialog(
+            f"{len(ausgewaehlt)} Aufgabe(n) verschieben",
+            ziel_feld,
+            [ft.TextButton("Abbrechen", on_click=abbrechen), ft.ElevatedButton("Verschieben", on_click=verschieben)],
+            tasten=on_key
+        )
+        page.update()
+
+    @gemessen
+    def stapel_loeschen_dialog(e=None):
+        @gemessen
+        def loeschen(e=None):
+            stapel_ausfuehren(app.aufgaben_loeschen, "{anzahl} Aufgabe(n) gelöscht.", auswahl_leeren=True)
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                abbrechen()
+            elif e.key == "Enter":
+                loeschen()
+
+        dialog = overlays.dialog(
+            "Aufgaben löschen",
+            ft.Text(f"Möchten Sie {len(ausgewaehlt)} ausgewählte Aufgabe(n) wirklich löschen?"),
+            [
+                ft.TextButton("Abbrechen", on_click=abbrechen),
+                ft.ElevatedButton("Löschen", on_click=loeschen, bgcolor=ft.Colors.RED, color=ft.Colors.WHITE)
+            ],
+            tasten=on_key,
+            actions_alignment=ft.MainAxisAlignment.END
+        )
+        page.update()
+
+    auswahl_text = ft.Text(size=14, weight=ft.FontWeight.BOLD)
+    stapel_leiste = ft.Row([
+        auswahl_text,
+        ft.TextButton("Alle auswählen", on_click=alle_auswaehlen),
+        ft.TextButton("Auswahl aufheben", on_click=auswahl_aufheben),
+        ft.IconButton(icon=ft.Icons.CHECK_CIRCLE, icon_color=ft.Colors.GREEN, tooltip="Als erledigt markieren",
+                      on_click=lambda e: stapel_status(True)),
+        ft.IconButton(icon=ft.Icons.RADIO_BUTTON_UNCHECKED, tooltip="Als offen markieren",
+                      on_click=lambda e: stapel_status(False)),
+        ft.PopupMenuButton(
+            icon=ft.Icons.FLAG,
+            tooltip="Priorität ändern",
+            items=[ft.PopupMenuItem(text=prioritaet, on_click=lambda e, p=prioritaet: stapel_prioritaet(p)) for prioritaet in PRIORITAETEN]
+        ),
+        ft.IconButton(icon=ft.Icons.EVENT, tooltip="Fälligkeit verschieben", on_click=stapel_faelligkeit_dialog),
+        ft.IconButton(icon=ft.Icons.DRIVE_FILE_MOVE, tooltip="In anderes Modul verschieben", on_click=stapel_modul_dialog),
+        ft.IconButton(icon=ft.Icons.DELETE, icon_color=ft.Colors.RED_700, tooltip="Ausgewählte löschen",
+                      on_click=stapel_loeschen_dialog)
+    ], spacing=5, visible=False)
+
+    def stapel_leiste_aktualisieren():
+        # Gelöschte Aufgaben fallen aus der Auswahl heraus
+        for aufgabe_id in [aufgabe_id for aufgabe_id in ausgewaehlt if app.aufgabe_nach_id(aufgabe_id) is None]:
+            ausgewaehlt.discard(aufgabe_id)
+        stapel_leiste.visible = bool(ausgewaehlt)
+        auswahl_text.value = f"{len(ausgewaehlt)} ausgewählt"
+
+    # Suchzeile, Kopf und Aktionsleiste stehen über der ListView, damit alle Einträge der Liste dieselbe Höhe haben
+    aufgaben_bereich = ft.Column([such_zeile, aufgaben_kopf, stapel_leiste, aufgaben_list], expand=True)
+
+    def aktualisiere_aufgaben_liste():
+        stapel_leiste_aktualisieren()
+        # Eine Karte mehr als angezeigt anfragen, damit die Liste weiß, ob es weitere Treffer gibt
+        aufgaben = angezeigte_aufgaben(limit=aufgabe_karten.anzahl + 1)
+        anfrage, prioritaet, erledigt, von, bis = suchfilter()
+        suche_aktiv = bool(anfrage or prioritaet or erledigt is not None or von or bis)
+
+        if aufgaben is None:
+            aufgaben_kopf.visible = False
+            return aufgabe_karten.abgleichen(aufgaben_list.controls, (), kopf=[kein_modul_gewaehlt])
+
+        aufgaben_kopf.visible = True
+        aufgaben_titel.value = "Suchergebnisse" if suche_aktiv else f"Aufgaben für {sitzung.aktuelles_modul.name}"
+
+        if not aufgaben:
+            return aufgabe_karten.abgleichen(aufgaben_list.controls, (), kopf=[keine_treffer if suche_aktiv else keine_aufgaben])
+        else:
+            heute = date.today()
+            return aufgabe_karten.abgleichen(
+                aufgaben_list.controls,
+                ((aufgabe.id, (aufgabe, aufgabe.ist_ueberfaellig(heute), aufgabe.id in ausgewaehlt)) for aufgabe in aufgaben)
+            )
+
+    aufgaben_list.on_scroll = nachladen_beim_scrollen(aufgabe_karten, lambda: auffrischen("aufgaben"))
+
+    # Termin-Karten, ebenfalls über die Aufgaben-ID wiederverwendet
+    def termin_karte_erzeugen(eintrag):
+        teile = {
+            "datum": ft.Text(size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+            "titel": ft.Text(size=16, weight=ft.FontWeight.BOLD, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+            "modul": ft.Text(size=14, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+            "hinweis": ft.Text(size=14),
+        }
+        teile["kreis"] = ft.Container(
+            content=teile["datum"],
+            width=75,
+            height=50,
+            border_radius=25,
+            alignment=ft.alignment.center
+        )
+        teile["container"] = ft.Container(
+            content=ft.Row([
+                teile["kreis"],
+                ft.Container(
+                    content=ft.Column([
+                        teile["titel"],
+                        teile["modul"],
+                        teile["hinweis"]
+                    ], spacing=5),
+                    expand=True,
+                    padding=ft.padding.only(left=15)
                 )
-                aufgaben_list.controls.append(aufgabe_card)
+            ]),
+            padding=10
+        )
+        return ft.Card(content=teile["container"]), teile
+
+    def termin_karte_zustand(eintrag):
+        aufgabe_datum, aufgabe, modul, ist_heute, ist_ueberfaellig = eintrag
+        return (aufgabe_datum, aufgabe.titel, modul.name, modul.farbe, ist_heute, ist_ueberfaellig)
 
-        page.update()   
+    def termin_karte_aktualisieren(teile, eintrag):
+        aufgabe_datum, aufgabe, modul, ist_heute, ist_ueberfaellig = eintrag
+        teile["datum"].value = f"{aufgabe_datum.day}.{aufgabe_datum.month}."
+        teile["kreis"].bgcolor = ft.Colors.with_opacity(0.5, modul.farbe)
+        teile["titel"].value = aufgabe.titel
+        teile["modul"].value = f"Modul: {modul.name}"
+        teile["modul"].color = modul.farbe
+        teile["hinweis"].value = "Heute!" if ist_heute else "Überfällig!" if ist_ueberfaellig else ""
+        teile["hinweis"].color = ft.Colors.RED if ist_ueberfaellig else ft.Colors.BLUE
+
+        card_farbe = None
+        if ist_heute:
+            card_farbe = ft.Colors.BLUE_50
+        elif ist_ueberfaellig:
+            card_farbe = ft.Colors.RED_50
+        teile["container"].bgcolor = card_farbe
+
+    kalender_karten = KartenListe(termin_karte_erzeugen, termin_karte_aktualisieren, termin_karte_zustand, seite=SEITE)
+    keine_termine = ft.Text("Keine offenen Aufgaben ab heute bis Ende des nächsten Monates", italic=True)
 
     def aktualisiere_kalender():
-        kalender_content.controls.clear()
         heute = date.today()
-        kalender_content.controls.append(
-            ft.Text(f"Überfällige, sowie die ab heute bis Ende nächsten Monat fällig werdenden Aufgaben", size=24, weight=ft.FontWeight.BOLD)
-        )
-        
-        monatliche_aufgaben = []
-        for modul in app.module:
-            for aufgabe in modul.aufgaben:
-                if aufgabe.faelligkeitsdatum:
-                    try:
-                        aufgabe_datum = datetime.fromisoformat(aufgabe.faelligkeitsdatum).date()
-                        if (aufgabe_datum.month == heute.month and aufgabe_datum.year == heute.year and not aufgabe.erledigt or
-                            aufgabe_datum.month == heute.month+1 and aufgabe_datum.year == heute.year and not aufgabe.erledigt or
-                            aufgabe_datum.month < heute.month and not aufgabe.erledigt):
-                            monatliche_aufgaben.append((aufgabe_datum, aufgabe, modul))
-                    except:
-                        continue
-                    
-        monatliche_aufgaben.sort(key=lambda x: x[0])
+        monatliche_aufgaben = app.kalender_eintraege(heute)
         
         if not monatliche_aufgaben:
-            kalender_content.controls.append(ft.Text("Keine offenen Aufgaben ab heute bis Ende des nächsten Monates", italic=True))
+            return kalender_karten.abgleichen(kalender_liste.controls, (), kopf=[keine_termine])
         else:
-            for aufgabe_datum, aufgabe, modul in monatliche_aufgaben:
-                ist_heute = aufgabe_datum == heute
-                ist_ueberfaellig = aufgabe_datum < heute and not aufgabe.erledigt
-                
-                card_farbe = None
-                if ist_heute:
-                    card_farbe = ft.Colors.BLUE_50
-                elif ist_ueberfaellig:
-                    card_farbe = ft.Colors.RED_50
-
-                termin_card = ft.Card(
-                    content=ft.Container(
-                        content=ft.Row([
-                            ft.Container(
-                                content=ft.Text(str(f"{aufgabe_datum.day}.{aufgabe_datum.month}."), size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
-                                width=75,
-                                height=50,
-                                #bgcolor=modul.farbe,
-                                bgcolor=ft.Colors.with_opacity(0.5, modul.farbe),
-                                border_radius=25,
-                                alignment=ft.alignment.center
-                            ),
-                            ft.Container(
-                                content=ft.Column([
-                                    ft.Text(aufgabe.titel, size=16, weight=ft.FontWeight.BOLD),
-                                    ft.Text(f"Modul: {modul.name}", size=14, color=modul.farbe),
-                                    ft.Text(
-                                        "Heute!" if ist_heute else "Überfällig!" if ist_ueberfaellig else "",
-                                        size=14,
-                                        color=ft.Colors.RED if ist_ueberfaellig else ft.Colors.BLUE
-                                    )
-                                ], spacing=5),
-                                expand=True,
-                                padding=ft.padding.only(left=15)
-                            )
-                        ]),
-                        padding=10,
-                        bgcolor=card_farbe
-                    )
-                )
-                kalender_content.controls.append(termin_card)
-        
-        page.update()
+            return kalender_karten.abgleichen(
+                kalender_liste.controls,
+                ((aufgabe.id, (aufgabe_datum, aufgabe, modul, aufgabe_datum == heute, aufgabe_datum < heute and not aufgabe.erledigt))
+                 for aufgabe_datum, aufgabe, modul in monatliche_aufgaben)
+            )
+
+    kalender_liste.on_scroll = nachladen_beim_scrollen(kalender_karten, lambda: auffrischen("kalender"))
     
     def aktualisiere_dashboard():
         dashboard_content.controls.clear()
@@ -726,12 +1057,12 @@ def main(page: ft.Page):
         
         if not app.module:
             dashboard_content.controls.append(ft.Text("Noch keine Module vorhanden", italic=True))
-            page.update()
-            return
+            return len(dashboard_content.controls)
         
-        gesamt_aufgaben = sum(len(modul.aufgaben) for modul in app.module)
-        gesamt_erledigt = sum(sum(1 for a in modul.aufgaben if a.erledigt) for modul in app.module)
-        gesamt_ueberfaellig = sum(sum(1 for a in modul.aufgaben if a.ist_ueberfaellig()) for modul in app.module)
+        zahlen = app.dashboard_zahlen()
+        gesamt_aufgaben = zahlen["gesamt"]
+        gesamt_erledigt = zahlen["erledigt"]
+        gesamt_ueberfaellig = zahlen["ueberfaellig"]
         
         stats_row = ft.Row([
             ft.Card(
@@ -780,10 +1111,8 @@ def main(page: ft.Page):
             )
         )
 
-        for modul in app.module:
-            fortschritt = modul.get_fortschritt()
-            aufgaben_anzahl = len(modul.aufgaben)
-            erledigte_anzahl = sum(1 for a in modul.aufgaben if a.erledigt)
+        for modul, (aufgaben_anzahl, erledigte_anzahl) in zip(app.module, zahlen["module"]):
+            fortschritt = erledigte_anzahl / aufgaben_anzahl if aufgaben_anzahl else 0
             
             modul_progress = ft.Card(
                 content=ft.Container(
@@ -798,80 +1127,323 @@ def main(page: ft.Page):
                 )
             )
             dashboard_content.controls.append(modul_progress)
-        
-        page.update()
+        return len(dashboard_content.controls)
+
+    ansichten.registrieren("module_liste", "module", aktualisiere_module_liste)
+    ansichten.registrieren("aufgaben", "module", aktualisiere_aufgaben_liste)
+    ansichten.registrieren("kalender", "kalender", aktualisiere_kalender)
+    ansichten.registrieren("dashboard", "dashboard", aktualisiere_dashboard)
     
+    # Einmal gebaut, damit ein Tabwechsel die vorhandenen Listen wiederverwendet
+    modul_ansicht = ft.Row([
+        ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Text("Module", size=24, weight=ft.FontWeight.BOLD),
+                    ft.ElevatedButton("Neues Modul", icon=ft.Icons.ADD, on_click=modul_dialog)
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                ft.Container(module_list, expand=True)
+            ]),
+            width=400,
+            padding=10
+        ),
+        ft.VerticalDivider(),
+        ft.Container(
+            content=aufgaben_bereich,
+            expand=True,
+            padding=10
+        )
+    ], expand=True)
+
+    @gemessen
     def ansicht_wechseln(neue_ansicht: str):
-        app.aktuelle_ansicht = neue_ansicht
+        ansicht_zeichnen(neue_ansicht)
+        page.update()
+
+    def ansicht_zeichnen(neue_ansicht: str):
+        sitzung.aktuelle_ansicht = neue_ansicht
         
         if neue_ansicht == "module":
-            content_area.content = ft.Row([
-                ft.Container(
-                    content=ft.Column([
-                        ft.Row([
-                            ft.Text("Module", size=24, weight=ft.FontWeight.BOLD),
-                            ft.ElevatedButton("Neues Modul", icon=ft.Icons.ADD, on_click=modul_dialog)
-                        ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                        ft.Container(module_list, expand=True)
-                    ]),
-                    width=400,
-                    padding=10
-                ),
-                ft.VerticalDivider(),
-                ft.Container(
-                    content=aufgaben_list,
-                    expand=True,
-                    padding=10
-                )
-            ], expand=True)
+            content_area.content = modul_ansicht
         elif neue_ansicht == "kalender":
-            aktualisiere_kalender()
             content_area.content = kalender_content
         elif neue_ansicht == "dashboard":
-            aktualisiere_dashboard()
             content_area.content = dashboard_content
-        
-        page.update()
+
+        # Nur was seit dem letzten Besuch veraltet ist, wird neu gezeichnet
+        with app.sperre:
+            ansichten.zeichnen(neue_ansicht)
     
-    def csv_exportieren(e):
-        datei_name = app.export_csv()
+    # CSV-Export läuft in einem eigenen Thread; die Oberfläche bleibt bedienbar und zeigt den Fortschritt an
+    laufender_export = []
+
+    def export_fortschritt(geschrieben, gesamt):
+        overlays.meldung(f"Export läuft: {geschrieben}/{gesamt} Zeilen", dauer=60000)
+        page.update()
+
+    def export_ende(datei_name, fehler):
+        laufender_export.clear()
         if datei_name:
-            page.snack_bar = ft.SnackBar(content=ft.Text(f"Daten erfolgreich exportiert nach: {datei_name}"))
-            page.snack_bar.open = True
+            overlays.meldung(f"Daten erfolgreich exportiert nach: {datei_name}", dauer=4000)
         else:
-            page.snack_bar = ft.SnackBar(ft.Text("Fehler beim Export"))
-            page.snack_bar.open = True
- 
-        page.overlay.append(page.snack_bar)        
-        page.snack_bar.open = True
+            overlays.meldung(f"Fehler beim Export: {fehler}", fehler=True, dauer=4000)
+        page.update()
+
+    def export_starten(**filter):
+        if laufender_export and laufender_export[0].laeuft:
+            overlays.meldung("Es läuft bereits ein Export", dauer=4000)
+            return
+        export = app.export_csv_starten(export_fortschritt, export_ende, **filter)
+        laufender_export[:] = [export]
+        overlays.meldung(f"Export gestartet ({export.gesamt} Aufgaben) …", dauer=60000)
+
+    @gemessen
+    def csv_exportieren(e=None):
+        modul_feld = ft.Dropdown(
+            label="Modul",
+            width=300,
+            options=[ft.dropdown.Option("Alle")] + [ft.dropdown.Option(key=modul_id, text=name) for modul_id, name in app.modul_auswahl()],
+            value="Alle"
+        )
+        status_feld = ft.Dropdown(
+            label="Status",
+            width=300,
+            options=[ft.dropdown.Option("Alle"), ft.dropdown.Option("Offen"), ft.dropdown.Option("Erledigt")],
+            value="Alle"
+        )
+        von_feld = ft.TextField(label="Fällig ab", hint_text="YYYY-MM-DD", width=145)
+        bis_feld = ft.TextField(label="Fällig bis", hint_text="YYYY-MM-DD", width=145)
+        gzip_feld = ft.Checkbox(label="Komprimieren (.csv.gz)", value=False)
+
+        @gemessen
+        def exportieren(e=None):
+            von, bis = datum_parsen((von_feld.value or "").strip()), datum_parsen((bis_feld.value or "").strip())
+            von_feld.error_text = "Ungültiges Datum" if (von_feld.value or "").strip() and von is None else None
+            bis_feld.error_text = "Ungültiges Datum" if (bis_feld.value or "").strip() and bis is None else None
+            if von_feld.error_text or bis_feld.error_text:
+                page.update()
+                return
+            export_starten(
+                modul_ids=None if modul_feld.value in (None, "Alle") else [modul_feld.value],
+                erledigt={"Offen": False, "Erledigt": True}.get(status_feld.value),
+                von=von,
+                bis=bis,
+                komprimieren=bool(gzip_feld.value)
+            )
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                abbrechen()
+            elif e.key == "Enter":
+                exportieren()
+
+        dialog = overlays.dialog(
+            "Als CSV exportieren",
+            ft.Column([modul_feld, status_feld, ft.Row([von_feld, bis_feld], spacing=10), gzip_feld], tight=True, spacing=10),
+            [ft.TextButton("Abbrechen", on_click=abbrechen), ft.ElevatedButton("Exportieren", on_click=exportieren)],
+            tasten=on_key
+        )
         page.update()
     
-    def json_backup(e):
-        datei_name_backup = app.backup_json()
+    # Im Mehrnutzer-Betrieb nur Dateien aus dem eigenen Verzeichnis (dort landen auch die Exporte)
+    import_verzeichnis = os.path.dirname(app.datei_pfad) if nutzer_modus(page) else None
+
+    @gemessen
+    def csv_importieren(e=None):
+        pfad_feld = ft.TextField(label="Pfad zur CSV-Datei", hint_text="z. B. stundenplan.csv", width=450, autofocus=True)
+        bericht = ft.Text(size=13, selectable=True)
+
+        # Plan zum eingegebenen Pfad oder None (Fehlertext am Feld ist dann gesetzt)
+        async def plan_lesen(probelauf: bool):
+            pfad = import_pfad((pfad_feld.value or "").strip(), import_verzeichnis)
+            if pfad is None:
+                pfad_feld.error_text = "Nur Dateien im eigenen Verzeichnis"
+                return None
+            plan = await asyncio.to_thread(app.csv_importieren, pfad, probelauf)
+            pfad_feld.error_text = None if plan else "Datei nicht lesbar"
+            return plan
+
+        @gemessen
+        async def pruefen(e=None):
+            bericht.value = "Wird geprüft …"
+            await seite_aktualisieren()
+            plan = await plan_lesen(True)
+            bericht.value = plan.bericht() if plan else ""
+            await seite_aktualisieren()
+
+        @gemessen
+        async def importieren(e=None):
+            plan = await plan_lesen(False)
+            if plan is None:
+                await seite_aktualisieren()
+                return
+            overlays.schliessen(dialog)
+            # Neuzeichnen und Kalender-Feed nach einem großen Import dauern; nicht in der Ereignisschleife
+            await asyncio.to_thread(aenderung_anzeigen)
+            text = f"{plan.importiert} Aufgabe(n) importiert, {len(plan.neue_module)} Modul(e) neu angelegt"
+            if plan.fehler:
+                text += f", {len(plan.fehler)} fehlerhafte Zeile(n) übersprungen"
+            overlays.meldung(text, dauer=6000)
+            await seite_aktualisieren()
+
+        @gemessen
+        def abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        async def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                abbrechen()
+            elif e.key == "Enter":
+                await pruefen()
+
+        dialog = overlays.dialog(
+            "CSV importieren",
+            ft.Column([pfad_feld, bericht], tight=True, spacing=10, scroll=ft.ScrollMode.AUTO),
+            [
+                ft.TextButton("Abbrechen", on_click=abbrechen),
+                ft.TextButton("Prüfen", on_click=pruefen),
+                ft.ElevatedButton("Importieren", on_click=importieren)
+            ],
+            tasten=on_key
+        )
+        page.update()
+
+    @gemessen
+    async def backup_erstellen(e):
+        datei_name_backup = await asyncio.to_thread(app.backup_erstellen)
         if datei_name_backup:
-            page.snack_bar = ft.SnackBar(content=ft.Text(f"Daten Backup erfolgreich nach: {datei_name_backup}"))
-            page.snack_bar.open = True
+            overlays.meldung(f"Daten Backup erfolgreich nach: {datei_name_backup}", dauer=4000)
         else:
-            page.snack_bar = ft.SnackBar(ft.Text("Fehler beim Backup"))
-            page.snack_bar.open = True
- 
-        page.overlay.append(page.snack_bar)        
-        page.snack_bar.open = True
-        page.update()
+            overlays.meldung("Fehler beim Backup", fehler=True, dauer=4000)
+        await seite_aktualisieren()
+
+    @gemessen
+    async def backup_wiederherstellen_dialog(e=None):
+        backups = await asyncio.to_thread(app.backups)
+        if not backups:
+            overlays.meldung("Noch keine Backups vorhanden", dauer=4000)
+            await seite_aktualisieren()
+            return
+        backup_feld = ft.Dropdown(
+            label="Stand vom",
+            width=300,
+            options=[ft.dropdown.Option(key=name, text=zeitpunkt.strftime("%d.%m.%Y %H:%M:%S")) for name, zeitpunkt in backups],
+            value=backups[0][0]
+        )
+
+        @gemessen
+        async def pruefen(e=None):
+            fehler = await asyncio.to_thread(app.backups_pruefen, [backup_feld.value])
+            if fehler:
+                overlays.meldung("; ".join(fehler), fehler=True, dauer=6000)
+            else:
+                overlays.meldung("Backup ist vollständig und unbeschädigt", dauer=4000)
+            await seite_aktualisieren()
+
+        @gemessen
+        async def wiederherstellen(e=None):
+            overlays.schliessen(dialog)
+            if await asyncio.to_thread(app.backup_wiederherstellen, backup_feld.value):
+                ausgewaehlt.clear()
+                modul_karten.zuruecksetzen()
+                aufgabe_karten.zuruecksetzen()
+                await asyncio.to_thread(aenderung_anzeigen)
+                overlays.meldung("Backup wiederhergestellt (der vorherige Stand wurde ebenfalls gesichert)", dauer=4000)
+            else:
+                overlays.meldung("Fehler beim Wiederherstellen", fehler=True, dauer=4000)
+            await seite_aktualisieren()
+
+        @gemessen
+        def abbrechen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        @gemessen
+        async def on_key(e: ft.KeyboardEvent):
+            if not dialog.open:
+                return
+            if e.key == "Escape":
+                abbrechen()
+            elif e.key == "Enter":
+                await wiederherstellen()
+
+        dialog = overlays.dialog(
+            "Backup wiederherstellen",
+            backup_feld,
+            [
+                ft.TextButton("Abbrechen", on_click=abbrechen),
+                ft.TextButton("Prüfen", on_click=pruefen),
+                ft.ElevatedButton("Wiederherstellen", on_click=wiederherstellen)
+            ],
+            tasten=on_key
+        )
+        await seite_aktualisieren()
+
+    @gemessen
+    async def kalender_feed(e):
+        pfad = await asyncio.to_thread(app.ics_aktualisieren)
+        if pfad:
+            adresse = "/" + os.path.relpath(pfad, "assets").replace(os.sep, "/") if page.web else pfad
+            overlays.meldung(f"Kalender-Feed aktualisiert, abonnierbar unter: {adresse}", dauer=6000)
+        else:
+            overlays.meldung("Fehler beim Erzeugen des Kalender-Feeds", fehler=True, dauer=4000)
+        await seite_aktualisieren()
 
     # Block 6: Keyboard Shortcuts
-    def handle_keyboard(e: ft.KeyboardEvent):
+    @gemessen
+    async def handle_keyboard(e: ft.KeyboardEvent):
         if e.ctrl:
             if e.key == "N":  # Ctrl+N für neues Modul
                 modul_dialog()
             elif e.key == "E":  # Ctrl+E für Export
                 csv_exportieren(e)
             elif e.key == "S":  # Ctrl+S für Speichern
-                app.daten_speichern()
-                page.snack_bar = ft.SnackBar(ft.Text("Daten gespeichert"))
-                page.overlay.append(page.snack_bar)
-                page.snack_bar.open = True
-                page.update()
+                await asyncio.to_thread(app.daten_speichern)
+                if app.speicher.letzter_fehler:
+                    text = f"Fehler beim Speichern: {app.speicher.letzter_fehler}"
+                elif app.speicher.letzte_dauer is not None:
+                    text = f"Daten gespeichert (letzter Schreibvorgang {app.speicher.letzte_dauer * 1000:.0f} ms)"
+                else:
+                    text = "Daten gespeichert"
+                overlays.meldung(text, dauer=4000)
+                await seite_aktualisieren()
+            elif e.key == "D" and e.shift and diagnose.aktiv:  # Ctrl+Shift+D: versteckte Diagnose-Ansicht
+                await diagnose_anzeigen()
+
+    # Messwerte der Sitzung(en) dieses Prozesses, die teuersten zuerst; schreibt dabei auch die Dump-Datei
+    async def diagnose_anzeigen():
+        pfad = await asyncio.to_thread(diagnose.schreiben)
+
+        @gemessen
+        def schliessen(e=None):
+            overlays.schliessen(dialog)
+            page.update()
+
+        zeilen = diagnose.zeilen() or ["Noch keine Messungen"]
+        if pfad:
+            zeilen.append(f"Gespeichert unter: {os.path.abspath(pfad)}")
+        dialog = overlays.dialog(
+            "Diagnose",
+            ft.Column([ft.Text(zeile, size=12, selectable=True) for zeile in zeilen],
+                      scroll=ft.ScrollMode.AUTO, width=700, height=400),
+            [ft.TextButton("Schließen", on_click=schliessen)],
+            tasten=lambda e: schliessen() if e.key == "Escape" else None
+        )
+        await seite_aktualisieren()
     
     page.on_keyboard_event = handle_keyboard
     
@@ -898,9 +1470,24 @@ def main(page: ft.Page):
                         on_click=csv_exportieren
                     ),
                     ft.ElevatedButton(
-                        "JSON Backup",
-                        icon=ft.Icons.DOWNLOAD,
-                        on_click=json_backup
+                        "CSV Import",
+                        icon=ft.Icons.UPLOAD,
+                        on_click=csv_importieren
+                    ),
+                    ft.ElevatedButton(
+                        "Backup",
+                        icon=ft.Icons.BACKUP,
+                        on_click=backup_erstellen
+                    ),
+                    ft.ElevatedButton(
+                        "Wiederherstellen",
+                        icon=ft.Icons.RESTORE,
+                        on_click=backup_wiederherstellen_dialog
+                    ),
+                    ft.ElevatedButton(
+                        "Kalender-Feed",
+                        icon=ft.Icons.EVENT,
+                        on_click=kalender_feed
                     )
                 ],
                 spacing=10  # Abstand zwischen den Buttons
@@ -913,7 +1500,7 @@ def main(page: ft.Page):
     content_area = ft.Container(expand=True)
     
     # Hauptlayout
-    page.add(
+    page.controls.append(
         ft.Column([
             menubar,
             ft.Divider(),
@@ -921,12 +1508,18 @@ def main(page: ft.Page):
         ], expand=True)
     )
     
-    # Initiale Ansicht laden
-    aktualisiere_module_liste()
-    ansicht_wechseln("module")
+    # Initiale Ansicht laden: die erste Zählung läuft über alle Aufgaben, daher im Worker-Thread;
+    # die Seite geht danach mit einem einzigen Update raus
+    await asyncio.to_thread(ansicht_zeichnen, "module")
+    await seite_aktualisieren()
+
+    # Im Web-Modus liegt der Kalender-Feed von Anfang an als statische Datei unter assets/ bereit: gemeinsam
+    # assets/studienplaner.ics → /studienplaner.ics, pro Nutzer assets/kalender/<Feed-Kennung>.ics → /kalender/<Feed-Kennung>.ics
+    if page.web:
+        await asyncio.to_thread(app.ics_aktualisieren, True)
 
 
 if __name__ == "__main__":
     #ft.app(target=main)                                 # startet als Desktop App (getestet auf MacOS)
     #ft.app(target=main, view=ft.AppView.FLET_APP)       # startet als Desktop App (getestet auf MacOS)
-    ft.app(target=main, view=ft.AppView.WEB_BROWSER)    # Startet im System-Webbrowser (getestet auf MacOS)
+    ft.app(target=main, view=ft.AppView.WEB_BROWSER, assets_dir="assets")    # Startet im System-Webbrowser (getestet auf MacOS)
@@ -0,0 +1,367 @@
+import sys
+import uuid
+from bisect import bisect_left
+from datetime import datetime, date, timedelta
+from enum import Enum
+from itertools import islice
+from typing import List, Dict, Optional, Union, Iterable, ValuesView
+
+class Prioritaet(str, Enum):
+    SELBSTSTUDIUM = "Selbststudium"
+    PRAKTISCHE_ARBEIT = "Praktische Arbeit"
+    ABGABE = "Abgabe"
+    PRUEFUNG = "Prüfung"
+    NORMAL = "Normal"
+
+    # Wie ein normaler String anzeigen, nicht als "Prioritaet.ABGABE"
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+    @classmethod
+    def aus_text(cls, text: str) -> Union["Prioritaet", str]:
+        try:
+            return cls(text)
+        except ValueError:
+            # Unbekannte Werte aus älteren Dateien unverändert (aber interniert) behalten
+            return sys.intern(text)
+
+
+# Dauerhafte ID für Module und Aufgaben, wird in der JSON-Datei mitgespeichert
+def neue_id() -> str:
+    return uuid.uuid4().hex
+
+
+def datum_parsen(faelligkeitsdatum: Optional[str]) -> Optional[date]:
+    if not faelligkeitsdatum:
+        return None
+    try:
+        return datetime.fromisoformat(faelligkeitsdatum).date()
+    except (ValueError, TypeError):
+        return None
+
+
+# Verschiebt ein Fälligkeitsdatum um `tage` Tage; reine Datumsangaben bleiben reine Datumsangaben,
+# Angaben mit Uhrzeit behalten die Uhrzeit. Nicht lesbare Angaben ergeben None.
+def faelligkeit_verschieben(faelligkeitsdatum: Optional[str], tage: int) -> Optional[str]:
+    if not faelligkeitsdatum:
+        return None
+    try:
+        zeitpunkt = datetime.fromisoformat(faelligkeitsdatum)
+    except (ValueError, TypeError):
+        return None
+    zeitpunkt += timedelta(days=tage)
+    if len(faelligkeitsdatum) == 10:
+        return zeitpunkt.date().isoformat()
+    return zeitpunkt.isoformat()
+
+
+class Modul:
+    __slots__ = ("id", "name", "farbe", "beschreibung", "_aufgaben", "_aufgaben_roh", "erstellt_am",
+                 "_anzahl", "_erledigt", "_ueberfaellig", "_stichtag")
+
+    def __init__(self, name: str, farbe: str = "#2196F3", beschreibung: str = "", erstellt_am: Optional[str] = None,
+                 modul_id: Optional[str] = None):
+        self.id = modul_id or neue_id()
+        self.name = name
+        self.farbe = sys.intern(farbe)
+        self.beschreibung = beschreibung
+        # Aufgaben nach ID; dict behält die Einfügereihenfolge, Löschen ist O(1)
+        self._aufgaben: Dict[str, Aufgabe] = {}
+        # Rohdaten aus der Datei; die Aufgaben-Objekte werden erst beim ersten Zugriff erzeugt
+        self._aufgaben_roh: Optional[List[Dict]] = None
+        self.erstellt_am = erstellt_am if erstellt_am is not None else datetime.now().isoformat()
+        # Zähler, gültig für den Tag `_stichtag` (None = noch nicht berechnet)
+        self._anzahl = self._erledigt = self._ueberfaellig = 0
+        self._stichtag: Optional[date] = None
+
+    @property
+    def aufgaben(self) -> ValuesView["Aufgabe"]:
+        if self._aufgaben_roh is not None:
+            self._aufgaben = {aufgabe.id: aufgabe for aufgabe in map(Aufgabe.from_dict, self._aufgaben_roh)}
+            self._aufgaben_roh = None
+        return self._aufgaben.values()
+
+    @aufgaben.setter
+    def aufgaben(self, aufgaben: Iterable["Aufgabe"]):
+        self._aufgaben = {aufgabe.id: aufgabe for aufgabe in aufgaben}
+        self._aufgaben_roh = None
+
+    def aufgabe(self, aufgabe_id: str) -> Optional["Aufgabe"]:
+        self.aufgaben
+        return self._aufgaben.get(aufgabe_id)
+
+    def aufgabe_anhaengen(self, aufgabe: "Aufgabe"):
+        self.aufgaben
+        self._aufgaben[aufgabe.id] = aufgabe
+
+    def aufgabe_entfernen(self, aufgabe: "Aufgabe"):
+        self.aufgaben
+        del self._aufgaben[aufgabe.id]
+
+    @property
+    def ist_geladen(self) -> bool:
+        return self._aufgaben_roh is None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "farbe": self.farbe,
+            "beschreibung": self.beschreibung,
+            "aufgaben": list(self._aufgaben_roh) if self._aufgaben_roh is not None else [aufgabe.to_dict() for aufgabe in self._aufgaben.values()],
+            "erstellt_am": self.erstellt_am
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        modul = cls(data["name"], data.get("farbe", "#2196F3"), data.get("beschreibung", ""), data.get("erstellt_am"), data.get("id"))
+        modul._aufgaben_roh = data.get("aufgaben", [])
+        return modul
+
+    # (Aufgaben, erledigt, überfällig): einmal pro Tag gezählt, danach von StudienplanerApp
+    # bei jeder Änderung über zaehler_anpassen() nachgeführt
+    def zaehler(self, heute: Optional[date] = None) -> tuple:
+        heute = heute or date.today()
+        if self._stichtag != heute:
+            self._anzahl, self._erledigt, self._ueberfaellig = self.zaehler_neu_berechnen(heute)
+            self._stichtag = heute
+        return self._anzahl, self._erledigt, self._ueberfaellig
+
+    # Vollständige Zählung, funktioniert auch auf den Rohdaten, ohne die Aufgaben zu erzeugen
+    def zaehler_neu_berechnen(self, heute: date) -> tuple:
+        if self._aufgaben_roh is not None:
+            anzahl = erledigt = ueberfaellig = 0
+            for aufgabe_data in self._aufgaben_roh:
+                anzahl += 1
+                if aufgabe_data.get("erledigt", False):
+                    erledigt += 1
+                elif _roh_ueberfaellig(aufgabe_data, heute):
+                    ueberfaellig += 1
+            return anzahl, erledigt, ueberfaellig
+        return (len(self._aufgaben),
+                sum(1 for aufgabe in self._aufgaben.values() if aufgabe.erledigt),
+                sum(1 for aufgabe in self._aufgaben.values() if aufgabe.ist_ueberfaellig(heute)))
+
+    # Zähler von außen übernehmen (z. B. aus einer Datenbankabfrage), statt selbst zu zählen
+    def zaehler_setzen(self, heute: date, zaehler: tuple):
+        self._anzahl, self._erledigt, self._ueberfaellig = zaehler
+        self._stichtag = heute
+
+    def zaehler_anpassen(self, aufgabe: "Aufgabe", vorzeichen: int):
+        if self._stichtag is None:
+            return
+        self._anzahl += vorzeichen
+        if aufgabe.erledigt:
+            self._erledigt += vorzeichen
+        if aufgabe.ist_ueberfaellig(self._stichtag):
+            self._ueberfaellig += vorzeichen
+
+    # IDs der Aufgaben; solange das Modul nicht geladen ist direkt aus den Rohdaten, ohne Aufgaben zu erzeugen
+    def aufgaben_ids(self) -> Iterable[str]:
+        if self._aufgaben_roh is not None:
+            return (aufgabe_data["id"] for aufgabe_data in self._aufgaben_roh if "id" in aufgabe_data)
+        return self._aufgaben.keys()
+
+    # Flache Kopie der Aufgabenliste zum Lesen in einem anderen Thread, ohne die Rohdaten zu laden:
+    # solange das Modul nicht geladen ist die Roh-Dicts, sonst die Aufgaben. Unter der Sperre der App aufrufen
+    def aufgaben_kopie(self) -> List:
+        if self._aufgaben_roh is not None:
+            return list(self._aufgaben_roh)
+        return list(self._aufgaben.values())
+
+    def anzahl_aufgaben(self) -> int:
+        if self._aufgaben_roh is not None:
+            return len(self._aufgaben_roh)
+        return len(self._aufgaben)
+
+    def anzahl_erledigt(self) -> int:
+        return self.zaehler()[1]
+
+    def anzahl_ueberfaellig(self) -> int:
+        return self.zaehler()[2]
+
+    def get_fortschritt(self):
+        anzahl = self.anzahl_aufgaben()
+        if not anzahl:
+            return 0
+        return self.anzahl_erledigt() / anzahl
+
+class Aufgabe:
+    __slots__ = ("id", "titel", "beschreibung", "_faelligkeitsdatum", "faellig", "_prioritaet", "erledigt", "erstellt_am")
+
+    def __init__(self, titel: str, beschreibung: str = "", faelligkeitsdatum: Optional[str] = None, prioritaet: str = "Normal",
+                 erstellt_am: Optional[str] = None, aufgabe_id: Optional[str] = None):
+        self.id = aufgabe_id or neue_id()
+        self.titel = titel
+        self.beschreibung = beschreibung
+        self.faelligkeitsdatum = faelligkeitsdatum
+        self.prioritaet = prioritaet
+        self.erledigt = False
+        self.erstellt_am = erstellt_am if erstellt_am is not None else datetime.now().isoformat()
+
+    # Das Datum wird nur beim Setzen geparst; `faellig` ist das fertige date-Objekt (oder None)
+    @property
+    def faelligkeitsdatum(self) -> Optional[str]:
+        return self._faelligkeitsdatum
+
+    @faelligkeitsdatum.setter
+    def faelligkeitsdatum(self, faelligkeitsdatum: Optional[str]):
+        self._faelligkeitsdatum = faelligkeitsdatum
+        self.faellig = datum_parsen(faelligkeitsdatum)
+
+    @property
+    def prioritaet(self) -> Union[Prioritaet, str]:
+        return self._prioritaet
+
+    @prioritaet.setter
+    def prioritaet(self, prioritaet: str):
+        self._prioritaet = Prioritaet.aus_text(prioritaet)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "titel": self.titel,
+            "beschreibung": self.beschreibung,
+            "faelligkeitsdatum": self.faelligkeitsdatum,
+            "prioritaet": str(self.prioritaet),
+            "erledigt": self.erledigt,
+            "erstellt_am": self.erstellt_am
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aufgabe = cls(
+            data["titel"],
+            data.get("beschreibung", ""),
+            data.get("faelligkeitsdatum"),
+            data.get("prioritaet", "Normal"),
+            data.get("erstellt_am"),
+            data.get("id")
+        )
+        aufgabe.erledigt = data.get("erledigt", False)
+        return aufgabe
+
+    def ist_ueberfaellig(self, heute: Optional[date] = None):
+        if self.faellig is None or self.erledigt:
+            return False
+        return self.faellig < (heute or date.today())
+
+
+def _roh_ueberfaellig(aufgabe_data: Dict, heute: date) -> bool:
+    if aufgabe_data.get("erledigt", False):
+        return False
+    faellig = datum_parsen(aufgabe_data.get("faelligkeitsdatum"))
+    return faellig is not None and faellig < heute
+
+
+# Offene Aufgaben mit Fälligkeitsdatum, sortiert nach (Tag, Aufgaben-ID).
+# Ein Datumsbereich ist damit eine Binärsuche plus Slice; die Kosten hängen nur von der Trefferzahl ab.
+class FaelligkeitsIndex:
+    def __init__(self):
+        self._schluessel: List[tuple] = []
+        self._eintraege: List[tuple] = []
+
+    def __len__(self):
+        return len(self._schluessel)
+
+    @staticmethod
+    def _schluessel_fuer(aufgabe: Aufgabe) -> Optional[tuple]:
+        if aufgabe.faellig is None or aufgabe.erledigt:
+            return None
+        return (aufgabe.faellig.toordinal(), aufgabe.id)
+
+    def aufbauen(self, paare):
+        eintraege = sorted(
+            ((self._schluessel_fuer(aufgabe), aufgabe, modul) for aufgabe, modul in paare if self._schluessel_fuer(aufgabe)),
+            key=lambda eintrag: eintrag[0]
+        )
+        self._schluessel = [schluessel for schluessel, _, _ in eintraege]
+        self._eintraege = [(aufgabe, modul) for _, aufgabe, modul in eintraege]
+
+    def hinzufuegen(self, aufgabe: Aufgabe, modul: Modul):
+        schluessel = self._schluessel_fuer(aufgabe)
+        if schluessel is None:
+            return
+        position = bisect_left(self._schluessel, schluessel)
+        self._schluessel.insert(position, schluessel)
+        self._eintraege.insert(position, (aufgabe, modul))
+
+    # Muss mit dem Zustand der Aufgabe aufgerufen werden, mit dem sie eingetragen wurde
+    def entfernen(self, aufgabe: Aufgabe):
+        schluessel = self._schluessel_fuer(aufgabe)
+        if schluessel is None:
+            return
+        position = bisect_left(self._schluessel, schluessel)
+        if position < len(self._schluessel) and self._schluessel[position] == schluessel:
+            del self._schluessel[position]
+            del self._eintraege[position]
+
+    # (Datum, Aufgabe, Modul) für alle offenen Aufgaben mit von <= Datum <= bis, aufsteigend sortiert
+    def bereich(self, von: Optional[date] = None, bis: Optional[date] = None) -> List[tuple]:
+        start = 0 if von is None else bisect_left(self._schluessel, (von.toordinal(),))
+        ende = len(self._schluessel) if bis is None else bisect_left(self._schluessel, (bis.toordinal() + 1,))
+        return [(aufgabe.faellig, aufgabe, modul) for aufgabe, modul in self._eintraege[start:ende]]
+
+
+# Journal: jede Änderung wird als kleiner Eintrag protokolliert und beim Laden
+# in derselben Reihenfolge wieder auf die Module (nach ID) angewendet.
+# Einträge aus älteren Versionen adressieren Module und Aufgaben noch über ihre Position.
+#
+# Das Anwenden ist wiederholbar: alle Einträge setzen absolute Werte, und Einträge für Module oder Aufgaben, die es
+# nicht (mehr) gibt, werden übersprungen. Stürzt das Programm ab, nachdem ein Snapshot geschrieben, das eingefaltete
+# Journal aber noch nicht gelöscht wurde, ergibt das erneute Anwenden auf den neuen Snapshot denselben Stand.
+MODUL_FELDER = ("name", "farbe", "beschreibung")
+AUFGABE_FELDER = ("titel", "beschreibung", "faelligkeitsdatum", "prioritaet")
+
+def _modul_fuer(module: Dict[str, Modul], eintrag: Dict) -> Optional[Modul]:
+    if "modul_id" in eintrag:
+        return module.get(eintrag["modul_id"])
+    return next(islice(module.values(), eintrag["modul"], None), None)
+
+def _aufgabe_fuer(modul: Optional[Modul], eintrag: Dict) -> Optional[Aufgabe]:
+    if modul is None:
+        return None
+    if "aufgabe_id" in eintrag:
+        return modul.aufgabe(eintrag["aufgabe_id"])
+    return next(islice(modul.aufgaben, eintrag["aufgabe"], None), None)
+
+def aenderung_anwenden(module: Dict[str, Modul], eintrag: Dict):
+    op = eintrag["op"]
+    if op == "modul_neu":
+        modul = Modul.from_dict(eintrag["modul"])
+        module[modul.id] = modul
+    elif op == "modul_aendern":
+        modul = _modul_fuer(module, eintrag)
+        if modul is not None:
+            for feld in MODUL_FELDER:
+                if feld in eintrag["felder"]:
+                    setattr(modul, feld, eintrag["felder"][feld])
+    elif op == "modul_loeschen":
+        modul = _modul_fuer(module, eintrag)
+        if modul is not None:
+            del module[modul.id]
+    elif op == "aufgabe_neu":
+        modul = _modul_fuer(module, eintrag)
+        if modul is not None:
+            modul.aufgabe_anhaengen(Aufgabe.from_dict(eintrag["aufgabe"]))
+    elif op == "aufgabe_aendern":
+        aufgabe = _aufgabe_fuer(_modul_fuer(module, eintrag), eintrag)
+        if aufgabe is not None:
+            for feld in AUFGABE_FELDER:
+                if feld in eintrag["felder"]:
+                    setattr(aufgabe, feld, eintrag["felder"][feld])
+    elif op == "aufgabe_status":
+        aufgabe = _aufgabe_fuer(_modul_fuer(module, eintrag), eintrag)
+        if aufgabe is not None:
+            aufgabe.erledigt = eintrag["erledigt"]
+    elif op == "aufgabe_loeschen":
+        modul = _modul_fuer(module, eintrag)
+        aufgabe = _aufgabe_fuer(modul, eintrag)
+        if aufgabe is not None:
+            modul.aufgabe_entfernen(aufgabe)
+    elif op == "stapel":
+        # Sammelaktion: eine Journal-Zeile, die nur als Ganzes geschrieben und angewendet wird
+        for teil in eintrag["eintraege"]:
+            aenderung_anwenden(module, teil)
+    else:
+        raise ValueError(f"Unbekannte Änderung: {op}")
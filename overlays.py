@@ -0,0 +1,56 @@
+import flet as ft
+from typing import Callable, List, Optional
+
+
+# Verwaltet page.overlay für die ganze Sitzung:
+# - genau eine SnackBar, deren Text und Farbe für jede Meldung neu gesetzt werden
+# - Dialoge aus einem kleinen Pool; geschlossene Dialoge gehen zurück in den Pool, überzählige verlassen das Overlay
+# So bleibt page.overlay auch in langen Web-Sitzungen konstant klein und page.update() muss nicht immer mehr vergleichen.
+class Overlays:
+    def __init__(self, page: ft.Page, pool_groesse: int = 2):
+        self.page = page
+        self.pool_groesse = pool_groesse
+        self._text = ft.Text()
+        self.snackbar = ft.SnackBar(self._text, duration=3000)
+        page.overlay.append(self.snackbar)
+        self._frei: List[ft.AlertDialog] = []
+        # Tastatur-Handler, der beim Schließen eines Dialogs wiederhergestellt wird
+        self._tasten: dict = {}
+
+    def meldung(self, text: str, fehler: bool = False, dauer: int = 3000):
+        self._text.value = text
+        self.snackbar.bgcolor = ft.Colors.RED_700 if fehler else None
+        self.snackbar.duration = dauer
+        self.snackbar.open = True
+
+    def dialog(self, titel: str, inhalt: ft.Control, aktionen: List[ft.Control],
+               tasten: Optional[Callable] = None, actions_alignment=None) -> ft.AlertDialog:
+        if self._frei:
+            dialog = self._frei.pop()
+        else:
+            dialog = ft.AlertDialog(modal=True, title=ft.Text())
+            self.page.overlay.append(dialog)
+        dialog.title.value = titel
+        dialog.content = inhalt
+        dialog.actions = aktionen
+        dialog.actions_alignment = actions_alignment
+        dialog.open = True
+
+        self._tasten[id(dialog)] = self.page.on_keyboard_event
+        if tasten is not None:
+            self.page.on_keyboard_event = tasten
+        return dialog
+
+    def schliessen(self, dialog: ft.AlertDialog):
+        if not dialog.open:
+            return
+        dialog.open = False
+        self.page.on_keyboard_event = self._tasten.pop(id(dialog), self.page.on_keyboard_event)
+
+        if len(self._frei) < self.pool_groesse:
+            self._frei.append(dialog)
+        else:
+            self.page.overlay.remove(dialog)
+
+    def groesse(self) -> int:
+        return len(self.page.overlay)
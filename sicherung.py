@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from modell import Modul
+
+# Inhaltsadressierter Sicherungsspeicher:
+# - objekte/<ab>/<sha256>: ein Modul (samt Aufgaben) als kanonisches, gzip-komprimiertes JSON; der Name ist der
+#   SHA-256 des unkomprimierten Inhalts, gleiche Module werden also nur einmal abgelegt
+# - manifeste/<zeitstempel>.json: Reihenfolge der Module und ihre Hashes, mehr nicht
+# Eine Sicherung schreibt damit nur die Module neu, die sich seit der letzten Sicherung geändert haben.
+class Sicherungen:
+    def __init__(self, verzeichnis: str = "studienplaner_backups"):
+        self.verzeichnis = verzeichnis
+        self.objekte_pfad = os.path.join(verzeichnis, "objekte")
+        self.manifeste_pfad = os.path.join(verzeichnis, "manifeste")
+        # Modul-ID → Hash des zuletzt gesicherten Stands; veraltet() entfernt Einträge nach Änderungen
+        self._hashes: Dict[str, str] = {}
+        # Serialisiert Schreiben und Aufräumen, falls mehrere Sitzungen gleichzeitig sichern
+        self._schreib_sperre = threading.Lock()
+
+    def veraltet(self, modul_id: str):
+        self._hashes.pop(modul_id, None)
+
+    def alles_veraltet(self):
+        self._hashes.clear()
+
+    @staticmethod
+    def _kodieren(modul: Modul) -> bytes:
+        return json.dumps(modul.to_dict(), ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    def _objekt_pfad(self, hash_wert: str) -> str:
+        return os.path.join(self.objekte_pfad, hash_wert[:2], hash_wert)
+
+    @staticmethod
+    def _atomar_schreiben(pfad: str, daten: bytes):
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        tmp_pfad = pfad + ".tmp"
+        with open(tmp_pfad, "wb") as f:
+            f.write(daten)
+        os.replace(tmp_pfad, pfad)
+
+    # Legt eine Sicherung an und gibt (Manifest-Name, Zahl neu geschriebener Module) zurück.
+    # Hat sich seit der letzten Sicherung nichts geändert, wird kein neues Manifest angelegt.
+    def sichern(self, module: Iterable[Modul]) -> Tuple[str, int]:
+        return self.schreiben(*self.vorbereiten(module))
+
+    # Erster Teil einer Sicherung, solange das Modell nicht geändert werden darf: nur Rechnen, keine Platte
+    # (bis auf einen stat pro Modul). Liefert die Manifest-Einträge und die neu zu schreibenden Objekte (Hash, JSON).
+    def vorbereiten(self, module: Iterable[Modul]) -> Tuple[List[Dict], List[Tuple[str, bytes]]]:
+        eintraege = []
+        objekte = []
+        for modul in module:
+            hash_wert = self._hashes.get(modul.id)
+            if hash_wert is None or not os.path.exists(self._objekt_pfad(hash_wert)):
+                daten = self._kodieren(modul)
+                hash_wert = hashlib.sha256(daten).hexdigest()
+                objekte.append((hash_wert, daten))
+                self._hashes[modul.id] = hash_wert
+            eintraege.append({"id": modul.id, "name": modul.name, "hash": hash_wert})
+        return eintraege, objekte
+
+    # Zweiter Teil: Objekte komprimieren und schreiben, dann das Manifest
+    def schreiben(self, eintraege: List[Dict], objekte: List[Tuple[str, bytes]]) -> Tuple[str, int]:
+        with self._schreib_sperre:
+            neu = 0
+            for hash_wert, daten in objekte:
+                pfad = self._objekt_pfad(hash_wert)
+                if not os.path.exists(pfad):
+                    self._atomar_schreiben(pfad, gzip.compress(daten, compresslevel=6, mtime=0))
+                    neu += 1
+
+            namen = self.liste()
+            if namen and self._manifest_lesen(namen[-1])["module"] == eintraege:
+                return namen[-1], neu
+
+            jetzt = datetime.now()
+            name = jetzt.strftime("%Y%m%dT%H%M%S%f") + ".json"
+            manifest = {"erstellt_am": jetzt.isoformat(), "module": eintraege}
+            self._atomar_schreiben(os.path.join(self.manifeste_pfad, name),
+                                   json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+            return name, neu
+
+    # Manifest-Namen, älteste zuerst (die Namen sind Zeitstempel und sortieren daher chronologisch)
+    def liste(self) -> List[str]:
+        if not os.path.isdir(self.manifeste_pfad):
+            return []
+        return sorted(name for name in os.listdir(self.manifeste_pfad) if name.endswith(".json"))
+
+    def zeitpunkt(self, name: str) -> datetime:
+        return datetime.strptime(name[:-len(".json")], "%Y%m%dT%H%M%S%f")
+
+    def _manifest_lesen(self, name: str) -> Dict:
+        with open(os.path.join(self.manifeste_pfad, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _objekt_lesen(self, hash_wert: str) -> bytes:
+        with open(self._objekt_pfad(hash_wert), "rb") as f:
+            daten = gzip.decompress(f.read())
+        if hashlib.sha256(daten).hexdigest() != hash_wert:
+            raise ValueError(f"Prüfsumme stimmt nicht: {hash_wert}")
+        return daten
+
+    # Stand zum Zeitpunkt der Sicherung `name`; jedes Modul wird beim Lesen gegen seinen Hash geprüft
+    def laden(self, name: str) -> List[Modul]:
+        return [Modul.from_dict(json.loads(self._objekt_lesen(eintrag["hash"])))
+                for eintrag in self._manifest_lesen(name)["module"]]
+
+    # Prüft Manifeste und Objekte; gibt eine Liste der gefundenen Fehler zurück (leer = alles in Ordnung).
+    # Jedes Objekt wird nur einmal gelesen, auch wenn viele Sicherungen darauf verweisen.
+    def pruefen(self, namen: Optional[Iterable[str]] = None) -> List[str]:
+        fehler = []
+        geprueft: Dict[str, Optional[str]] = {}
+        for name in (self.liste() if namen is None else namen):
+            try:
+                manifest = self._manifest_lesen(name)
+            except (OSError, ValueError) as e:
+                fehler.append(f"{name}: Manifest nicht lesbar ({e})")
+                continue
+            for eintrag in manifest.get("module", []):
+                hash_wert = eintrag.get("hash", "")
+                if hash_wert not in geprueft:
+                    try:
+                        self._objekt_lesen(hash_wert)
+                        geprueft[hash_wert] = None
+                    except (OSError, ValueError, EOFError) as e:
+                        geprueft[hash_wert] = str(e)
+                if geprueft[hash_wert] is not None:
+                    fehler.append(f"{name}: Modul '{eintrag.get('name')}' beschädigt oder fehlend ({geprueft[hash_wert]})")
+        return fehler
+
+    # Aufbewahrung: die letzten `letzte` Sicherungen, dazu die jeweils neueste der letzten `tage` Tage
+    # und der letzten `wochen` Wochen. Danach werden Objekte gelöscht, auf die kein Manifest mehr verweist.
+    # Gibt (gelöschte Sicherungen, gelöschte Objekte) zurück. Zwischengespeicherte Hashes gelöschter Objekte
+    # bemerkt vorbereiten() daran, dass die Datei fehlt.
+    def aufraeumen(self, letzte: int = 10, tage: int = 14, wochen: int = 8,
+                   jetzt: Optional[datetime] = None) -> Tuple[int, int]:
+        with self._schreib_sperre:
+            return self._aufraeumen(letzte, tage, wochen, jetzt or datetime.now())
+
+    def _aufraeumen(self, letzte: int, tage: int, wochen: int, jetzt: datetime) -> Tuple[int, int]:
+        namen = self.liste()
+        behalten: Set[str] = set(namen[-letzte:]) if letzte > 0 else set()
+        tage_gesehen: Set[object] = set()
+        wochen_gesehen: Set[object] = set()
+        for name in reversed(namen):
+            zeitpunkt = self.zeitpunkt(name)
+            tag = zeitpunkt.date()
+            woche = tag.isocalendar()[:2]
+            if zeitpunkt >= jetzt - timedelta(days=tage) and tag not in tage_gesehen:
+                tage_gesehen.add(tag)
+                behalten.add(name)
+            if zeitpunkt >= jetzt - timedelta(weeks=wochen) and woche not in wochen_gesehen:
+                wochen_gesehen.add(woche)
+                behalten.add(name)
+
+        manifeste_geloescht = 0
+        for name in namen:
+            if name not in behalten:
+                os.remove(os.path.join(self.manifeste_pfad, name))
+                manifeste_geloescht += 1
+
+        benutzt = set()
+        for name in behalten:
+            benutzt.update(eintrag["hash"] for eintrag in self._manifest_lesen(name)["module"])
+        objekte_geloescht = 0
+        if os.path.isdir(self.objekte_pfad):
+            for unterordner in os.listdir(self.objekte_pfad):
+                ordner = os.path.join(self.objekte_pfad, unterordner)
+                for hash_wert in os.listdir(ordner):
+                    if hash_wert not in benutzt:
+                        os.remove(os.path.join(ordner, hash_wert))
+                        objekte_geloescht += 1
+        return manifeste_geloescht, objekte_geloescht
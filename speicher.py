@@ -0,0 +1,612 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, date
+from typing import List, Dict, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+import binaer
+from diagnose import erfassen, gemessen
+from modell import Modul, Aufgabe, aenderung_anwenden, datum_parsen, neue_id, MODUL_FELDER, AUFGABE_FELDER
+
+# Liest eine JSON-Datei stückweise: Werte werden einzeln mit raw_decode aus einem Puffer dekodiert,
+# der nur den noch nicht gelesenen Rest enthält. So liegt nie der ganze Dateitext im Speicher.
+class _JsonLeser:
+    def __init__(self, f, block: int = 1 << 16):
+        self._f = f
+        self._block = block
+        self._decoder = json.JSONDecoder()
+        self._puffer = ""
+        self._pos = 0
+        self._dateiende = False
+
+    # Sorgt dafür, dass mindestens `anzahl` ungelesene Zeichen im Puffer stehen (sofern die Datei so lang ist)
+    def _nachlesen(self, anzahl: int):
+        while not self._dateiende and len(self._puffer) - self._pos < anzahl:
+            teil = self._f.read(max(self._block, anzahl))
+            if not teil:
+                self._dateiende = True
+                return
+            self._puffer = self._puffer[self._pos:] + teil
+            self._pos = 0
+
+    def _leerraum_ueberspringen(self):
+        while True:
+            while self._pos < len(self._puffer) and self._puffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._puffer) or self._dateiende:
+                return
+            self._nachlesen(1)
+
+    # Überspringt `text`, falls er als Nächstes folgt
+    def erwarten(self, text: str) -> bool:
+        self._leerraum_ueberspringen()
+        self._nachlesen(len(text))
+        if self._puffer.startswith(text, self._pos):
+            self._pos += len(text)
+            return True
+        return False
+
+    def wert(self):
+        self._leerraum_ueberspringen()
+        nachschub = self._block
+        while True:
+            try:
+                wert, self._pos = self._decoder.raw_decode(self._puffer, self._pos)
+                return wert
+            except json.JSONDecodeError:
+                if self._dateiende:
+                    raise
+                # Der Wert ist noch nicht vollständig im Puffer: mindestens doppelt so viel nachlesen,
+                # damit ein großes Modul nicht quadratisch oft dekodiert wird
+                self._nachlesen(len(self._puffer) - self._pos + nachschub)
+                nachschub *= 2
+
+    # Elemente eines Arrays, dessen "[" schon gelesen wurde
+    def elemente(self):
+        if self.erwarten("]"):
+            return
+        while True:
+            yield self.wert()
+            if self.erwarten(","):
+                continue
+            if self.erwarten("]"):
+                return
+            raise ValueError("Ungültiges JSON: ',' oder ']' erwartet")
+
+
+# Module aus einem Snapshot im Format von JsonSpeicher._snapshot_schreiben ({"module": [...], ...}), eins nach dem
+# anderen. Andere Anordnungen (z. B. von Hand bearbeitete Dateien) werden wie bisher komplett gelesen.
+def _module_lesen(f):
+    leser = _JsonLeser(f)
+    if leser.erwarten("{") and leser.erwarten('"module"') and leser.erwarten(":") and leser.erwarten("["):
+        yield from leser.elemente()
+        return
+    f.seek(0)
+    yield from json.load(f).get("module", [])
+
+
+# JSON-Datei als Snapshot plus Änderungsjournal daneben (eine JSON-Zeile pro Änderung).
+# Ein Klick schreibt nur noch eine Zeile; das Journal wird im Hintergrund
+# in einen neuen Snapshot eingefaltet, sobald es zu lang wird.
+class JsonSpeicher:
+    kann_abfragen = False
+
+    def __init__(self, datei_pfad: str, max_journal: int = 500, binaer_snapshot: bool = False):
+        self.datei_pfad = datei_pfad
+        basis = os.path.splitext(datei_pfad)[0]
+        # Optionaler Binär-Snapshot (siehe binaer.py); wird beim Laden bevorzugt, wenn er neuer als die JSON-Datei ist
+        self.binaer_pfad = basis + ".bin"
+        self.binaer_snapshot = binaer_snapshot
+        self.journal_pfad = basis + ".journal"
+        # Journal, das gerade vom Hintergrund-Thread verdichtet wird
+        self.journal_alt_pfad = basis + ".journal.alt"
+        self.max_journal = max_journal
+        self._lock = threading.Lock()
+        self._journal_eintraege = 0
+        self._verdichter: Optional[threading.Thread] = None
+
+    def laden(self) -> List[Modul]:
+        module, ids_ergaenzt = self._snapshot_laden()
+        for eintrag in self._journal_lesen(self.journal_alt_pfad):
+            aenderung_anwenden(module, eintrag)
+        self._journal_eintraege = 0
+        for eintrag in self._journal_lesen(self.journal_pfad):
+            aenderung_anwenden(module, eintrag)
+            self._journal_eintraege += 1
+        if ids_ergaenzt:
+            # Datei aus einer Version ohne IDs: einmal komplett mit IDs speichern,
+            # damit künftige Journal-Einträge sich auf dieselben IDs beziehen
+            self.alles_speichern(list(module.values()))
+        return list(module.values())
+
+    def aenderung(self, eintrag: Dict):
+        self.aenderungen([eintrag])
+
+    def aenderungen(self, eintraege: List[Dict]):
+        zeilen = "".join(json.dumps(eintrag, ensure_ascii=False) + "\n" for eintrag in eintraege)
+        with self._lock:
+            with open(self.journal_pfad, 'a', encoding='utf-8') as f:
+                f.write(zeilen)
+            self._journal_eintraege += len(eintraege)
+            if self._journal_eintraege >= self.max_journal:
+                self._verdichten_starten()
+
+    def alles_speichern(self, module: List[Modul]):
+        self.snapshot_speichern([modul.to_dict() for modul in module])
+
+    # Wie alles_speichern, aber mit schon serialisierten Modulen (Modul.to_dict())
+    def snapshot_speichern(self, module_daten: List[Dict]):
+        # Ein laufendes Verdichten darf den neuen Snapshot nicht überschreiben
+        while True:
+            self.warten()
+            with self._lock:
+                if self._verdichter and self._verdichter.is_alive():
+                    continue
+                self._snapshot_schreiben(module_daten)
+                for pfad in (self.journal_alt_pfad, self.journal_pfad):
+                    if os.path.exists(pfad):
+                        os.remove(pfad)
+                self._journal_eintraege = 0
+                return
+
+    def warten(self):
+        verdichter = self._verdichter
+        if verdichter and verdichter.is_alive():
+            verdichter.join()
+
+    def _verdichten_starten(self):
+        if self._verdichter and self._verdichter.is_alive():
+            return
+        # Liegt noch ein altes Journal herum (abgebrochenes Verdichten), wird erst dieses eingefaltet; das aktuelle
+        # Journal kommt beim nächsten Mal dran. Der Zähler wird trotzdem zurückgesetzt, sonst würde nach einem
+        # fehlgeschlagenen Verdichten jede weitere Änderung einen neuen Versuch starten.
+        if not os.path.exists(self.journal_alt_pfad):
+            os.replace(self.journal_pfad, self.journal_alt_pfad)
+        self._journal_eintraege = 0
+        self._verdichter = threading.Thread(target=self._verdichten, daemon=True)
+        self._verdichter.start()
+
+    def _verdichten(self):
+        try:
+            module, _ = self._snapshot_laden()
+            for eintrag in self._journal_lesen(self.journal_alt_pfad):
+                aenderung_anwenden(module, eintrag)
+            self._snapshot_schreiben([modul.to_dict() for modul in module.values()])
+            os.remove(self.journal_alt_pfad)
+        except Exception as e:
+            print(f"Fehler beim Verdichten des Journals: {e}")
+
+    # Module nach ID; zweiter Wert: ob fehlende IDs ergänzt werden mussten
+    def _snapshot_laden(self):
+        if os.path.exists(self.binaer_pfad) and (
+                not os.path.exists(self.datei_pfad)
+                or os.path.getmtime(self.binaer_pfad) >= os.path.getmtime(self.datei_pfad)):
+            try:
+                return {modul.id: modul for modul in binaer.laden(self.binaer_pfad)}, False
+            except ValueError as e:
+                print(f"Binär-Snapshot wird ignoriert: {e}")
+        if not os.path.exists(self.datei_pfad):
+            return {}, False
+        ids_ergaenzt = False
+        module = {}
+        with open(self.datei_pfad, 'r', encoding='utf-8') as f:
+            for modul_data in _module_lesen(f):
+                # IDs direkt in den Rohdaten ergänzen, damit sie beim späteren Erzeugen der Aufgaben dieselben sind
+                for eintrag in [modul_data, *modul_data.get("aufgaben", [])]:
+                    if "id" not in eintrag:
+                        eintrag["id"] = neue_id()
+                        ids_ergaenzt = True
+                modul = Modul.from_dict(modul_data)
+                module[modul.id] = modul
+        return module, ids_ergaenzt
+
+    def _snapshot_schreiben(self, module_daten: List[Dict]):
+        data = {
+            "module": module_daten,
+            "gespeichert_am": datetime.now().isoformat()
+        }
+        # Erst in eine temporäre Datei schreiben, damit ein Absturz den Snapshot nicht halb zerstört
+        tmp_pfad = self.datei_pfad + ".tmp"
+        with open(tmp_pfad, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_pfad, self.datei_pfad)
+        # Nach der JSON-Datei schreiben, damit der Binär-Snapshot der neuere ist
+        if self.binaer_snapshot:
+            binaer.schreiben(module_daten, self.binaer_pfad)
+
+    def _journal_lesen(self, pfad: str):
+        if not os.path.exists(pfad):
+            return
+        with open(pfad, 'r', encoding='utf-8') as f:
+            for zeile in f:
+                zeile = zeile.strip()
+                if not zeile:
+                    continue
+                try:
+                    yield json.loads(zeile)
+                except json.JSONDecodeError:
+                    # Abgeschnittene letzte Zeile nach einem Absturz
+                    print(f"Ungültiger Journal-Eintrag in {pfad} wird übersprungen")
+
+
+def _faellig_tag(faelligkeitsdatum: Optional[str]) -> Optional[str]:
+    # Normalisiertes Datum (YYYY-MM-DD) für den Index, egal ob mit oder ohne Uhrzeit erfasst
+    faellig = datum_parsen(faelligkeitsdatum)
+    return faellig.isoformat() if faellig else None
+
+
+# SQLite als Alternative zur JSON-Datei: jede Änderung ist ein einzelnes UPDATE/INSERT/DELETE.
+# Module und Aufgaben werden über ihre ID (Spalte uid) angesprochen; `position` hält nur die Reihenfolge.
+class SqliteSpeicher:
+    kann_abfragen = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS modul (
+            id INTEGER PRIMARY KEY,
+            uid TEXT,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            farbe TEXT NOT NULL,
+            beschreibung TEXT NOT NULL,
+            erstellt_am TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS aufgabe (
+            id INTEGER PRIMARY KEY,
+            uid TEXT,
+            modul_id INTEGER NOT NULL REFERENCES modul(id),
+            position INTEGER NOT NULL,
+            titel TEXT NOT NULL,
+            beschreibung TEXT NOT NULL,
+            faelligkeitsdatum TEXT,
+            faellig_tag TEXT,
+            prioritaet TEXT NOT NULL,
+            erledigt INTEGER NOT NULL DEFAULT 0,
+            erstellt_am TEXT NOT NULL
+        );
+    """
+    INDIZES = """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_modul_uid ON modul(uid);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_aufgabe_uid ON aufgabe(uid);
+        CREATE INDEX IF NOT EXISTS idx_modul_position ON modul(position);
+        CREATE INDEX IF NOT EXISTS idx_aufgabe_modul ON aufgabe(modul_id, position);
+        CREATE INDEX IF NOT EXISTS idx_aufgabe_faellig ON aufgabe(faellig_tag);
+        CREATE INDEX IF NOT EXISTS idx_aufgabe_erledigt ON aufgabe(erledigt);
+    """
+
+    def __init__(self, db_pfad: str, json_pfad: Optional[str] = None):
+        self.db_pfad = db_pfad
+        # Wird beim ersten Laden einmalig übernommen, falls die Datenbank noch leer ist
+        self.json_pfad = json_pfad
+        self._lock = threading.Lock()
+        # Flet ruft Handler aus verschiedenen Threads auf, der Zugriff ist über den Lock serialisiert
+        self._db = sqlite3.connect(db_pfad, check_same_thread=False)
+        self._db.executescript(self.SCHEMA)
+        self._ids_ergaenzen()
+        self._db.executescript(self.INDIZES)
+
+    def _ids_ergaenzen(self):
+        # Datenbanken aus der Version ohne IDs: Spalte anlegen und zufällige IDs vergeben
+        with self._db:
+            for tabelle in ("modul", "aufgabe"):
+                spalten = [zeile[1] for zeile in self._db.execute(f"PRAGMA table_info({tabelle})")]
+                if "uid" not in spalten:
+                    self._db.execute(f"ALTER TABLE {tabelle} ADD COLUMN uid TEXT")
+                self._db.execute(f"UPDATE {tabelle} SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+
+    def laden(self) -> List[Modul]:
+        with self._lock:
+            leer = self._db.execute("SELECT COUNT(*) FROM modul").fetchone()[0] == 0
+        if leer and self.json_pfad and os.path.exists(self.json_pfad):
+            module = JsonSpeicher(self.json_pfad).laden()
+            self.alles_speichern(module)
+            print(f"Daten aus {self.json_pfad} nach {self.db_pfad} übernommen")
+            return module
+
+        with self._lock:
+            module = []
+            modul_nach_id = {}
+            for modul_id, uid, name, farbe, beschreibung, erstellt_am in self._db.execute(
+                    "SELECT id, uid, name, farbe, beschreibung, erstellt_am FROM modul ORDER BY position"):
+                modul = Modul(name, farbe, beschreibung, erstellt_am, uid)
+                modul_nach_id[modul_id] = modul
+                module.append(modul)
+            for modul_id, uid, titel, beschreibung, faelligkeitsdatum, prioritaet, erledigt, erstellt_am in self._db.execute(
+                    "SELECT modul_id, uid, titel, beschreibung, faelligkeitsdatum, prioritaet, erledigt, erstellt_am "
+                    "FROM aufgabe ORDER BY modul_id, position"):
+                aufgabe = Aufgabe(titel, beschreibung, faelligkeitsdatum, prioritaet, erstellt_am, uid)
+                aufgabe.erledigt = bool(erledigt)
+                modul_nach_id[modul_id].aufgabe_anhaengen(aufgabe)
+        return module
+
+    def aenderung(self, eintrag: Dict):
+        self.aenderungen([eintrag])
+
+    # Alle Einträge in einer Transaktion
+    def aenderungen(self, eintraege: List[Dict]):
+        with self._lock, self._db:
+            for eintrag in eintraege:
+                self._anwenden(eintrag)
+
+    def _anwenden(self, eintrag: Dict):
+        op = eintrag["op"]
+        if op == "modul_neu":
+            position = self._db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM modul").fetchone()[0]
+            self._modul_einfuegen(position, eintrag["modul"])
+        elif op == "modul_aendern":
+            for feld, wert in eintrag["felder"].items():
+                if feld in MODUL_FELDER:
+                    self._db.execute(f"UPDATE modul SET {feld} = ? WHERE uid = ?", (wert, eintrag["modul_id"]))
+        elif op == "modul_loeschen":
+            modul_id = self._modul_id(eintrag["modul_id"])
+            if modul_id is None:
+                return
+            self._db.execute("DELETE FROM aufgabe WHERE modul_id = ?", (modul_id,))
+            self._db.execute("DELETE FROM modul WHERE id = ?", (modul_id,))
+        elif op == "aufgabe_neu":
+            modul_id = self._modul_id(eintrag["modul_id"])
+            if modul_id is None:
+                return
+            position = self._db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM aufgabe WHERE modul_id = ?",
+                                        (modul_id,)).fetchone()[0]
+            self._aufgabe_einfuegen(modul_id, position, eintrag["aufgabe"])
+        elif op == "aufgabe_aendern":
+            for feld, wert in eintrag["felder"].items():
+                if feld in AUFGABE_FELDER:
+                    self._db.execute(f"UPDATE aufgabe SET {feld} = ? WHERE uid = ?", (wert, eintrag["aufgabe_id"]))
+            if "faelligkeitsdatum" in eintrag["felder"]:
+                self._db.execute("UPDATE aufgabe SET faellig_tag = ? WHERE uid = ?",
+                                 (_faellig_tag(eintrag["felder"]["faelligkeitsdatum"]), eintrag["aufgabe_id"]))
+        elif op == "aufgabe_status":
+            self._db.execute("UPDATE aufgabe SET erledigt = ? WHERE uid = ?", (int(eintrag["erledigt"]), eintrag["aufgabe_id"]))
+        elif op == "aufgabe_loeschen":
+            self._db.execute("DELETE FROM aufgabe WHERE uid = ?", (eintrag["aufgabe_id"],))
+        elif op == "stapel":
+            for teil in eintrag["eintraege"]:
+                self._anwenden(teil)
+        else:
+            raise ValueError(f"Unbekannte Änderung: {op}")
+
+    def alles_speichern(self, module: List[Modul]):
+        self.snapshot_speichern([modul.to_dict() for modul in module])
+
+    def snapshot_speichern(self, module_daten: List[Dict]):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM aufgabe")
+            self._db.execute("DELETE FROM modul")
+            for position, modul_daten in enumerate(module_daten):
+                self._modul_einfuegen(position, modul_daten)
+
+    def warten(self):
+        pass
+
+    # (Aufgaben, erledigt, überfällig) pro Modul-ID
+    def kennzahlen(self, heute: date) -> Dict[str, tuple]:
+        with self._lock:
+            zeilen = self._db.execute(
+                "SELECT m.uid, COUNT(a.id), COALESCE(SUM(a.erledigt), 0), "
+                "COALESCE(SUM(a.erledigt = 0 AND a.faellig_tag < ?), 0) "
+                "FROM modul m LEFT JOIN aufgabe a ON a.modul_id = m.id GROUP BY m.id",
+                (heute.isoformat(),)
+            ).fetchall()
+        return {uid: (anzahl, erledigt, ueberfaellig) for uid, anzahl, erledigt, ueberfaellig in zeilen}
+
+    # IDs aller offenen Aufgaben mit Fälligkeitsdatum, über den Index auf faellig_tag
+    def offene_faellige_ids(self) -> List[str]:
+        with self._lock:
+            return [uid for (uid,) in self._db.execute(
+                "SELECT uid FROM aufgabe WHERE faellig_tag IS NOT NULL AND erledigt = 0 ORDER BY faellig_tag")]
+
+    # Wie beim JSON-Journal werden Einträge für Module, die es nicht (mehr) gibt, übersprungen; UPDATE/DELETE
+    # über die uid treffen dann ohnehin keine Zeile
+    def _modul_id(self, uid: str) -> Optional[int]:
+        zeile = self._db.execute("SELECT id FROM modul WHERE uid = ?", (uid,)).fetchone()
+        return zeile[0] if zeile else None
+
+    def _modul_einfuegen(self, position: int, modul_daten: Dict):
+        cursor = self._db.execute(
+            "INSERT INTO modul (uid, position, name, farbe, beschreibung, erstellt_am) VALUES (?, ?, ?, ?, ?, ?)",
+            (modul_daten["id"], position, modul_daten["name"], modul_daten.get("farbe", "#2196F3"),
+             modul_daten.get("beschreibung", ""), modul_daten.get("erstellt_am", datetime.now().isoformat()))
+        )
+        for aufgabe_position, aufgabe_daten in enumerate(modul_daten.get("aufgaben", [])):
+            self._aufgabe_einfuegen(cursor.lastrowid, aufgabe_position, aufgabe_daten)
+
+    def _aufgabe_einfuegen(self, modul_id: int, position: int, aufgabe_daten: Dict):
+        self._db.execute(
+            "INSERT INTO aufgabe (uid, modul_id, position, titel, beschreibung, faelligkeitsdatum, faellig_tag, "
+            "prioritaet, erledigt, erstellt_am) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (aufgabe_daten["id"], modul_id, position, aufgabe_daten["titel"], aufgabe_daten.get("beschreibung", ""),
+             aufgabe_daten.get("faelligkeitsdatum"), _faellig_tag(aufgabe_daten.get("faelligkeitsdatum")),
+             aufgabe_daten.get("prioritaet", "Normal"), int(aufgabe_daten.get("erledigt", False)),
+             aufgabe_daten.get("erstellt_am", datetime.now().isoformat()))
+        )
+
+
+# Kompletter Stand in der Warteschlange des HintergrundSpeichers (siehe snapshot_vormerken)
+class _Snapshot:
+    __slots__ = ("module_daten",)
+
+    def __init__(self, module_daten: List[Dict]):
+        self.module_daten = module_daten
+
+
+# Write-behind: Änderungen werden nur vorgemerkt und von einem Hintergrund-Thread
+# nach kurzer Wartezeit gesammelt in einem Rutsch geschrieben.
+class HintergrundSpeicher:
+    def __init__(self, speicher, verzoegerung: float = 0.3, bei_fehler=None, max_wartezeit: float = 60):
+        self.speicher = speicher
+        self.verzoegerung = verzoegerung
+        # Nach einem Fehler wartet der Hintergrund-Thread vor jedem neuen Versuch doppelt so lange wie zuvor,
+        # höchstens max_wartezeit Sekunden; nach dem ersten erfolgreichen Schreiben wieder nur `verzoegerung`
+        self.max_wartezeit = max_wartezeit
+        self._wartezeit = verzoegerung
+        # Wird mit der Exception aufgerufen, wenn Schreiben fehlschlägt (aus dem Hintergrund-Thread); nur einmal pro
+        # Fehlerzustand, nicht bei jedem erneuten Versuch mit demselben Fehler
+        self.bei_fehler = bei_fehler
+        self.letzte_dauer: Optional[float] = None
+        self.letzter_fehler: Optional[Exception] = None
+        self._ausstehend: List[Dict] = []
+        self._bedingung = threading.Condition()
+        # Hält die Reihenfolge ein, wenn flush() gleichzeitig aus UI und Hintergrund kommt
+        self._schreib_lock = threading.Lock()
+        self._beenden = False
+        self._thread = threading.Thread(target=self._lauf, daemon=True)
+        self._thread.start()
+
+    @property
+    def kann_abfragen(self):
+        return self.speicher.kann_abfragen
+
+    @property
+    def ausstehend(self) -> int:
+        return len(self._ausstehend)
+
+    @gemessen(name="speicher.laden")
+    def laden(self) -> List[Modul]:
+        return self.speicher.laden()
+
+    def aenderung(self, eintrag: Dict):
+        with self._bedingung:
+            self._ausstehend.append(eintrag)
+            self._bedingung.notify()
+
+    def alles_speichern(self, module: List[Modul]):
+        self.snapshot_vormerken([modul.to_dict() for modul in module])
+        self.flush()
+
+    # Reiht einen kompletten Stand in die Warteschlange ein, ohne zu schreiben; gedacht für den Aufruf unter der
+    # Sperre der App. Was davor vorgemerkt war, steckt schon im Stand und entfällt; was danach kommt, wird nach
+    # dem Snapshot ins Journal geschrieben. Auf die Platte kommt er mit dem nächsten flush().
+    def snapshot_vormerken(self, module_daten: List[Dict]):
+        with self._bedingung:
+            self._ausstehend = [_Snapshot(module_daten)]
+            self._bedingung.notify()
+
+    def warten(self):
+        self.flush()
+        self.speicher.warten()
+
+    # Abfragen müssen den aktuellen Stand sehen
+    def kennzahlen(self, heute: date):
+        self.flush()
+        return self.speicher.kennzahlen(heute)
+
+    def offene_faellige_ids(self) -> List[str]:
+        self.flush()
+        return self.speicher.offene_faellige_ids()
+
+    def flush(self):
+        with self._schreib_lock:
+            with self._bedingung:
+                eintraege, self._ausstehend = self._ausstehend, []
+            if not eintraege:
+                return
+            start = time.perf_counter()
+            try:
+                # Nur der letzte vorgemerkte Snapshot zählt, Einträge davor sind darin enthalten
+                snapshots = [i for i, eintrag in enumerate(eintraege) if isinstance(eintrag, _Snapshot)]
+                if snapshots:
+                    teil_start = time.perf_counter()
+                    self.speicher.snapshot_speichern(eintraege[snapshots[-1]].module_daten)
+                    erfassen("speicher.alles_speichern", time.perf_counter() - teil_start)
+                    eintraege = eintraege[snapshots[-1] + 1:]
+                if eintraege:
+                    teil_start = time.perf_counter()
+                    self.speicher.aenderungen(eintraege)
+                    erfassen("speicher.journal", time.perf_counter() - teil_start, len(eintraege))
+                if self.letzter_fehler is not None:
+                    print("Speichern funktioniert wieder")
+                self.letzter_fehler = None
+                self._wartezeit = self.verzoegerung
+            except Exception as e:
+                # Nicht verwerfen, beim nächsten Durchlauf erneut versuchen
+                with self._bedingung:
+                    self._ausstehend[:0] = eintraege
+                neuer_fehler = self.letzter_fehler is None or str(self.letzter_fehler) != str(e)
+                self.letzter_fehler = e
+                self._wartezeit = min(self._wartezeit * 2, self.max_wartezeit)
+                if neuer_fehler:
+                    print(f"Fehler beim Speichern der Daten: {e}")
+                    if self.bei_fehler:
+                        self.bei_fehler(e)
+            finally:
+                self.letzte_dauer = time.perf_counter() - start
+
+    def schliessen(self):
+        with self._bedingung:
+            self._beenden = True
+            self._bedingung.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+        self.speicher.warten()
+
+    def _lauf(self):
+        while True:
+            with self._bedingung:
+                while not self._ausstehend and not self._beenden:
+                    self._bedingung.wait()
+                if self._beenden:
+                    return
+            # Weitere Änderungen eines Klick-Bursts einsammeln; nach Fehlern länger warten (siehe max_wartezeit)
+            with self._bedingung:
+                self._bedingung.wait_for(lambda: self._beenden, self._wartezeit)
+            self.flush()
+
+
+class DateiGesperrt(Exception):
+    pass
+
+
+# Exklusive Sperre auf <Datendatei ohne Endung>.lock: eine Datendatei schreibt immer nur ein Prozess (Oberfläche oder
+# API), sonst würden sich Journal und Snapshots gegenseitig überschreiben. Das Betriebssystem hebt die Sperre auf,
+# wenn der Prozess endet, auch nach einem Absturz; eine liegengebliebene .lock-Datei sperrt also nichts.
+class DateiSperre:
+    def __init__(self, datei_pfad: str):
+        self.datei_pfad = datei_pfad
+        self.pfad = os.path.splitext(datei_pfad)[0] + ".lock"
+        self._datei = None
+
+    def erwerben(self):
+        datei = open(self.pfad, "a+")
+        try:
+            if os.name == "nt":
+                datei.seek(0)
+                msvcrt.locking(datei.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(datei.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            datei.close()
+            raise DateiGesperrt(f"{self.datei_pfad} wird bereits von einem anderen Prozess benutzt (Sperre {self.pfad})")
+        self._datei = datei
+
+    def freigeben(self):
+        if self._datei is None:
+            return
+        if os.name == "nt":
+            self._datei.seek(0)
+            msvcrt.locking(self._datei.fileno(), msvcrt.LK_UNLCK, 1)
+        self._datei.close()
+        self._datei = None
+
+
+def speicher_erzeugen(datei_pfad: str, art: str = "json", binaer_snapshot: bool = False):
+    if art == "sqlite":
+        return SqliteSpeicher(os.path.splitext(datei_pfad)[0] + ".db", json_pfad=datei_pfad)
+    return JsonSpeicher(datei_pfad, binaer_snapshot=binaer_snapshot)
+
+
+# Einmalige Übernahme: python speicher.py [studienplaner_data.json] [studienplaner_data.db]
+if __name__ == "__main__":
+    import sys
+    json_pfad = sys.argv[1] if len(sys.argv) > 1 else "studienplaner_data.json"
+    db_pfad = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(json_pfad)[0] + ".db"
+    module = JsonSpeicher(json_pfad).laden()
+    SqliteSpeicher(db_pfad).alles_speichern(module)
+    print(f"{len(module)} Module mit {sum(len(m.aufgaben) for m in module)} Aufgaben nach {db_pfad} übernommen")
@@ -0,0 +1,728 @@
+import atexit
+import functools
+import os
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, ValuesView
+
+from modell import Modul, Aufgabe, FaelligkeitsIndex, MODUL_FELDER, AUFGABE_FELDER, faelligkeit_verschieben
+from speicher import speicher_erzeugen, DateiSperre, HintergrundSpeicher
+from suche import SuchIndex, normalisieren
+from datenaustausch import CsvExport, IcsFeed, ImportPlan, csv_import_lesen, csv_schreiben, csv_zeilen
+from sicherung import Sicherungen
+from diagnose import gemessen
+
+# Methode unter der Sperre der App ausführen; die Sperre ist reentrant, gesperrte Methoden dürfen sich gegenseitig aufrufen
+def _gesperrt(methode):
+    @functools.wraps(methode)
+    def gesperrt(self, *args, **kwargs):
+        with self.sperre:
+            return methode(self, *args, **kwargs)
+    return gesperrt
+
+
+# Was nur eine Sitzung (ein Browser-Tab) betrifft; das Modell selbst teilen sich alle Sitzungen
+class Sitzung:
+    def __init__(self):
+        self.aktuelles_modul: Optional[Modul] = None
+        self.aktuelle_ansicht = "module"
+
+
+class StudienplanerApp:
+    def __init__(self, datei_pfad: str = "studienplaner_data.json", ics_pfad: Optional[str] = None):
+        # Module nach ID (Reihenfolge = Einfügereihenfolge); nach außen über `module`
+        self._module: Dict[str, Modul] = {}
+        # Aufgaben-ID → Modul, wird bei der ersten Suche nach einer Aufgabe aus den IDs aufgebaut (ohne die Module
+        # zu laden); geladen wird dann nur das Modul der gesuchten Aufgabe
+        self._aufgaben_register: Optional[Dict[str, Modul]] = None
+        self.datei_pfad = datei_pfad
+        # Schützt Modell und abgeleitete Daten, wenn mehrere Sitzungen (Threads) dieselbe App benutzen.
+        # Gehalten wird sie nur für eine Änderung bzw. ein Neuzeichnen, nie für Ein-/Ausgabe auf der Platte.
+        self.sperre = threading.RLock()
+        # Fehlermeldung, falls die Datendatei nicht geladen werden konnte. Solange gesetzt, wird nichts geschrieben:
+        # ein Snapshot des (leeren) Modells würde die Datei sonst überschreiben. Eine Wiederherstellung hebt das auf.
+        self.ladefehler: Optional[str] = None
+        # Summen über alle Module (Aufgaben, erledigt, überfällig), gültig für `_stichtag`
+        self._gesamt = (0, 0, 0)
+        self._stichtag: Optional[date] = None
+        # Wird bei der ersten Datumsabfrage aufgebaut und danach bei jeder Änderung nachgeführt
+        self._faelligkeiten: Optional[FaelligkeitsIndex] = None
+        # Volltextsuche; nach daten_laden() bei der ersten Suche aufgebaut, danach nachgeführt
+        self._suchindex: Optional[SuchIndex] = None
+        # Kalender-Feed; nach dem ersten ics_aktualisieren() werden geänderte Aufgaben als veraltet vorgemerkt.
+        # Liegt unter assets/, damit ihn der Flet-Webserver als statische Datei ausliefert
+        self._ics: Optional[IcsFeed] = None
+        self.ics_pfad = ics_pfad or os.path.join("assets", "studienplaner.ics")
+        # Inkrementelle Sicherungen neben der Datendatei; geänderte Module werden über die Hooks unten als veraltet gemeldet
+        self.sicherungen = Sicherungen(os.path.join(os.path.dirname(datei_pfad), "studienplaner_backups"))
+        if os.path.dirname(datei_pfad):
+            os.makedirs(os.path.dirname(datei_pfad), exist_ok=True)
+        # Hält ein anderer Prozess die Datei, bricht der Start hier mit DateiGesperrt ab; freigegeben in schliessen()
+        self.dateisperre = DateiSperre(datei_pfad)
+        self.dateisperre.erwerben()
+        # "json" (Standard) oder "sqlite"; beim ersten Start mit SQLite wird die JSON-Datei übernommen
+        # Änderungen werden im Hintergrund gesammelt geschrieben, beim Beenden wird alles Ausstehende geschrieben
+        self.speicher = HintergrundSpeicher(speicher_erzeugen(
+            self.datei_pfad,
+            os.environ.get("STUDIENPLANER_SPEICHER", "json"),
+            binaer_snapshot=os.environ.get("STUDIENPLANER_BINAER") == "1"
+        ))
+        atexit.register(self.speicher.schliessen)
+
+    # Die gemeinsame App für `datei_pfad` aus dem prozessweiten Cache (siehe AppCache): beim ersten Aufruf angelegt
+    # und geladen, danach nur noch nachgeschlagen. Im Web-Modus ruft jede Sitzung main() auf; so gibt es trotzdem nur
+    # ein Modell und einen Schreiber pro Datei. Wer die App nicht mehr braucht, gibt sie mit freigeben() zurück.
+    @classmethod
+    def geteilt(cls, datei_pfad: str = "studienplaner_data.json", ics_pfad: Optional[str] = None) -> "StudienplanerApp":
+        return app_cache.holen(datei_pfad, lambda: cls(datei_pfad, ics_pfad))
+
+    def freigeben(self):
+        app_cache.freigeben(self)
+
+    # Grobe Schätzung des Speicherbedarfs in Bytes für die Verdrängung aus dem Cache; gemessen belegt eine Aufgabe
+    # (als Objekt oder Rohdaten, samt Anteil an den Indizes) knapp 1 KB
+    def speicherbedarf(self) -> int:
+        with self.sperre:
+            return sum(2048 + 1024 * modul.anzahl_aufgaben() for modul in self.module)
+
+    # Ausstehendes schreiben und den Hintergrund-Schreiber beenden; danach wird die App nicht mehr benutzt
+    def schliessen(self):
+        try:
+            self.speicher.schliessen()
+        except Exception as e:
+            print(f"Fehler beim Speichern der Daten: {e}")
+        atexit.unregister(self.speicher.schliessen)
+        self.dateisperre.freigeben()
+
+    @gemessen
+    @_gesperrt
+    def daten_laden(self):
+        try:
+            self._daten_setzen(self.speicher.laden())
+            self.ladefehler = None
+        except Exception as e:
+            self.ladefehler = str(e)
+            print(f"Fehler beim Laden der Daten: {e}")
+
+    # Neuer Gesamtstand (Laden, Wiederherstellen): abgeleitete Daten verwerfen
+    def _daten_setzen(self, module: Iterable[Modul]):
+        self.module = module
+        self._stichtag = None
+        self._faelligkeiten = None
+        self._suchindex = None
+        self._aufgaben_register = None
+        if self._ics is not None:
+            self._ics.alles_veraltet()
+        self.sicherungen.alles_veraltet()
+
+    @property
+    def module(self) -> ValuesView[Modul]:
+        return self._module.values()
+
+    @module.setter
+    def module(self, module: Iterable[Modul]):
+        self._module = {modul.id: modul for modul in module}
+
+    def modul_nach_id(self, modul_id: str) -> Optional[Modul]:
+        return self._module.get(modul_id)
+
+    # (Aufgabe, Modul) zur ID oder None
+    @_gesperrt
+    def aufgabe_nach_id(self, aufgabe_id: str) -> Optional[Tuple[Aufgabe, Modul]]:
+        if self._aufgaben_register is None:
+            self._aufgaben_register = {aufgabe_id: modul for modul in self.module for aufgabe_id in modul.aufgaben_ids()}
+        modul = self._aufgaben_register.get(aufgabe_id)
+        if modul is None:
+            return None
+        return modul.aufgabe(aufgabe_id), modul
+
+    # Schreibt den kompletten Stand als Snapshot (z.B. Ctrl+S); einzelne Änderungen laufen über das Journal.
+    # Unter der Sperre wird der Stand nur kopiert und vorgemerkt, geschrieben wird danach.
+    @gemessen
+    def daten_speichern(self):
+        with self.sperre:
+            if not self._snapshot_vormerken():
+                return
+        self.ausstehendes_speichern()
+
+    def _snapshot_vormerken(self) -> bool:
+        if self.ladefehler:
+            print(f"Speichern übersprungen, die Daten konnten nicht geladen werden: {self.ladefehler}")
+            return False
+        self.speicher.snapshot_vormerken([modul.to_dict() for modul in self.module])
+        return True
+
+    # Schreibt alle vorgemerkten Änderungen sofort, ohne kompletten Snapshot
+    def ausstehendes_speichern(self):
+        try:
+            self.speicher.flush()
+        except Exception as e:
+            print(f"Fehler beim Speichern der Daten: {e}")
+
+    def _protokollieren(self, eintrag: Dict):
+        if not self.ladefehler:
+            self.speicher.aenderung(eintrag)
+
+    # Zähler und Fälligkeitsindex nachführen: vor einer Änderung mit -1, danach mit +1 aufrufen
+    def _nachfuehren(self, modul: Modul, aufgabe: Aufgabe, vorzeichen: int):
+        if self._faelligkeiten is not None:
+            if vorzeichen > 0:
+                self._faelligkeiten.hinzufuegen(aufgabe, modul)
+            else:
+                self._faelligkeiten.entfernen(aufgabe)
+        if self._suchindex is not None:
+            if vorzeichen > 0:
+                self._suchindex.hinzufuegen(aufgabe, modul)
+            else:
+                self._suchindex.entfernen(aufgabe)
+        if self._ics is not None:
+            self._ics.veraltet(aufgabe.id)
+        self.sicherungen.veraltet(modul.id)
+        modul.zaehler_anpassen(aufgabe, vorzeichen)
+        if self._stichtag is not None:
+            anzahl, erledigt, ueberfaellig = self._gesamt
+            self._gesamt = (
+                anzahl + vorzeichen,
+                erledigt + (vorzeichen if aufgabe.erledigt else 0),
+                ueberfaellig + (vorzeichen if aufgabe.ist_ueberfaellig(self._stichtag) else 0)
+            )
+
+    def _modul_nachfuehren(self, modul: Modul, vorzeichen: int):
+        if self._aufgaben_register is not None:
+            for aufgabe_id in modul.aufgaben_ids():
+                if vorzeichen > 0:
+                    self._aufgaben_register[aufgabe_id] = modul
+                else:
+                    self._aufgaben_register.pop(aufgabe_id, None)
+        if self._faelligkeiten is not None:
+            for aufgabe in modul.aufgaben:
+                if vorzeichen > 0:
+                    self._faelligkeiten.hinzufuegen(aufgabe, modul)
+                else:
+                    self._faelligkeiten.entfernen(aufgabe)
+        if self._suchindex is not None:
+            if vorzeichen > 0:
+                self._suchindex.modul_hinzufuegen(modul)
+            else:
+                self._suchindex.modul_entfernen(modul)
+        if self._ics is not None:
+            for aufgabe_id in modul.aufgaben_ids():
+                self._ics.veraltet(aufgabe_id)
+        self.sicherungen.veraltet(modul.id)
+        if self._stichtag is not None:
+            self._gesamt = tuple(summe + vorzeichen * wert for summe, wert in zip(self._gesamt, modul.zaehler(self._stichtag)))
+
+    @_gesperrt
+    def gesamt_zaehler(self, heute: Optional[date] = None) -> tuple:
+        heute = heute or date.today()
+        # Am Tageswechsel werden neue Aufgaben überfällig, dann einmal komplett neu zählen
+        if self._stichtag != heute:
+            # Mit SQLite liefert eine Abfrage die Zähler aller Module, ohne jede Aufgabe anzufassen. Nur wenn das
+            # Journal mitläuft (kein Ladefehler), entspricht die Datenbank dem Modell
+            if self.speicher.kann_abfragen and not self.ladefehler:
+                kennzahlen = self.speicher.kennzahlen(heute)
+                for modul in self.module:
+                    modul.zaehler_setzen(heute, kennzahlen.get(modul.id, (0, 0, 0)))
+            zaehler = [modul.zaehler(heute) for modul in self.module]
+            self._gesamt = tuple(sum(z[i] for z in zaehler) for i in range(3))
+            self._stichtag = heute
+        return self._gesamt
+
+    # Vergleicht die nachgeführten Zähler mit einer vollständigen Neuzählung (und ggf. der Datenbank).
+    # Gibt die Abweichungen zurück; eine leere Liste heißt: alles konsistent.
+    @_gesperrt
+    def zaehler_pruefen(self, heute: Optional[date] = None) -> List[str]:
+        heute = heute or date.today()
+        abweichungen = []
+        summe = [0, 0, 0]
+        sql = self.speicher.kennzahlen(heute) if self.speicher.kann_abfragen else None
+        for modul in self.module:
+            erwartet = modul.zaehler_neu_berechnen(heute)
+            if modul.zaehler(heute) != erwartet:
+                abweichungen.append(f"Modul '{modul.name}': {modul.zaehler(heute)} statt {erwartet}")
+            if sql is not None and sql.get(modul.id, (0, 0, 0)) != erwartet:
+                abweichungen.append(f"Modul '{modul.name}' in der Datenbank: {sql.get(modul.id)} statt {erwartet}")
+            summe = [s + e for s, e in zip(summe, erwartet)]
+        if self.gesamt_zaehler(heute) != tuple(summe):
+            abweichungen.append(f"Gesamt: {self.gesamt_zaehler(heute)} statt {tuple(summe)}")
+        return abweichungen
+
+    # Gehören Modul (und Aufgabe) noch zum Modell? Eine andere Sitzung kann sie inzwischen gelöscht haben;
+    # Änderungen an solchen Objekten werden verworfen statt Zähler und Journal durcheinanderzubringen.
+    def _aktuell(self, modul: Modul, aufgabe: Optional[Aufgabe] = None) -> bool:
+        return self._module.get(modul.id) is modul and (aufgabe is None or modul.aufgabe(aufgabe.id) is aufgabe)
+
+    # Änderungen am Modell: jede Methode ändert die Objekte und schreibt genau einen Journal-Eintrag
+    @_gesperrt
+    def modul_hinzufuegen(self, modul: Modul):
+        self._module[modul.id] = modul
+        self._modul_nachfuehren(modul, +1)
+        self._protokollieren({"op": "modul_neu", "modul": modul.to_dict()})
+
+    @_gesperrt
+    def modul_aktualisieren(self, modul: Modul, **felder):
+        if not self._aktuell(modul):
+            return
+        felder = {feld: wert for feld, wert in felder.items() if feld in MODUL_FELDER}
+        for feld, wert in felder.items():
+            setattr(modul, feld, wert)
+        if self._suchindex is not None and "name" in felder:
+            self._suchindex.modul_umbenennen(modul)
+        if self._ics is not None and "name" in felder:
+            for aufgabe_id in modul.aufgaben_ids():
+                self._ics.veraltet(aufgabe_id)
+        self.sicherungen.veraltet(modul.id)
+        self._protokollieren({"op": "modul_aendern", "modul_id": modul.id, "felder": felder})
+
+    @_gesperrt
+    def modul_loeschen(self, modul: Modul):
+        if not self._aktuell(modul):
+            return
+        del self._module[modul.id]
+        self._modul_nachfuehren(modul, -1)
+        self._protokollieren({"op": "modul_loeschen", "modul_id": modul.id})
+
+    @_gesperrt
+    def aufgabe_hinzufuegen(self, modul: Modul, aufgabe: Aufgabe):
+        if self._aktuell(modul):
+            self._protokollieren(self._aufgabe_anhaengen(modul, aufgabe))
+
+    @_gesperrt
+    def aufgabe_aktualisieren(self, modul: Modul, aufgabe: Aufgabe, **felder):
+        felder = {feld: wert for feld, wert in felder.items() if feld in AUFGABE_FELDER}
+        if self._aktuell(modul, aufgabe):
+            self._protokollieren(self._felder_setzen(modul, aufgabe, felder))
+
+    @_gesperrt
+    def aufgabe_umschalten(self, modul: Modul, aufgabe: Aufgabe):
+        if self._aktuell(modul, aufgabe):
+            self._protokollieren(self._status_setzen(modul, aufgabe, not aufgabe.erledigt))
+
+    @_gesperrt
+    def aufgabe_loeschen(self, modul: Modul, aufgabe: Aufgabe):
+        if self._aktuell(modul, aufgabe):
+            self._protokollieren(self._aufgabe_entfernen(modul, aufgabe))
+
+    # Bausteine der Änderungsmethoden: ändern Objekte, Zähler und Indizes und geben den Journal-Eintrag zurück
+    def _aufgabe_anhaengen(self, modul: Modul, aufgabe: Aufgabe) -> Dict:
+        modul.aufgabe_anhaengen(aufgabe)
+        if self._aufgaben_register is not None:
+            self._aufgaben_register[aufgabe.id] = modul
+        self._nachfuehren(modul, aufgabe, +1)
+        return {"op": "aufgabe_neu", "modul_id": modul.id, "aufgabe": aufgabe.to_dict()}
+
+    def _felder_setzen(self, modul: Modul, aufgabe: Aufgabe, felder: Dict) -> Dict:
+        self._nachfuehren(modul, aufgabe, -1)
+        for feld, wert in felder.items():
+            setattr(aufgabe, feld, wert)
+        self._nachfuehren(modul, aufgabe, +1)
+        return {"op": "aufgabe_aendern", "modul_id": modul.id, "aufgabe_id": aufgabe.id, "felder": felder}
+
+    def _status_setzen(self, modul: Modul, aufgabe: Aufgabe, erledigt: bool) -> Dict:
+        self._nachfuehren(modul, aufgabe, -1)
+        aufgabe.erledigt = erledigt
+        self._nachfuehren(modul, aufgabe, +1)
+        return {"op": "aufgabe_status", "modul_id": modul.id, "aufgabe_id": aufgabe.id, "erledigt": aufgabe.erledigt}
+
+    def _aufgabe_entfernen(self, modul: Modul, aufgabe: Aufgabe) -> Dict:
+        modul.aufgabe_entfernen(aufgabe)
+        if self._aufgaben_register is not None:
+            self._aufgaben_register.pop(aufgabe.id, None)
+        self._nachfuehren(modul, aufgabe, -1)
+        return {"op": "aufgabe_loeschen", "modul_id": modul.id, "aufgabe_id": aufgabe.id}
+
+    # Sammelaktionen für mehrere Aufgaben (IDs, auch aus verschiedenen Modulen). Alle Änderungen landen in einem
+    # einzigen Journal-Eintrag {"op": "stapel", "eintraege": [...]}, der nur als Ganzes geschrieben wird.
+    # Rückgabe ist jeweils die Zahl der tatsächlich geänderten Aufgaben.
+    def _aufgaben_fuer(self, aufgabe_ids: Iterable[str]) -> List[Tuple[Aufgabe, Modul]]:
+        treffer = (self.aufgabe_nach_id(aufgabe_id) for aufgabe_id in aufgabe_ids)
+        return [eintrag for eintrag in treffer if eintrag is not None]
+
+    def _stapel_protokollieren(self, eintraege: List[Dict]) -> int:
+        if eintraege:
+            self._protokollieren({"op": "stapel", "eintraege": eintraege})
+        return len(eintraege)
+
+    @_gesperrt
+    def aufgaben_status_setzen(self, aufgabe_ids: Iterable[str], erledigt: bool) -> int:
+        return self._stapel_protokollieren([
+            self._status_setzen(modul, aufgabe, erledigt)
+            for aufgabe, modul in self._aufgaben_fuer(aufgabe_ids) if aufgabe.erledigt != erledigt
+        ])
+
+    @_gesperrt
+    def aufgaben_aktualisieren(self, aufgabe_ids: Iterable[str], **felder) -> int:
+        felder = {feld: wert for feld, wert in felder.items() if feld in AUFGABE_FELDER}
+        return self._stapel_protokollieren([
+            self._felder_setzen(modul, aufgabe, felder) for aufgabe, modul in self._aufgaben_fuer(aufgabe_ids)
+        ])
+
+    # Aufgaben ohne (lesbares) Fälligkeitsdatum bleiben unverändert
+    @_gesperrt
+    def aufgaben_faelligkeit_verschieben(self, aufgabe_ids: Iterable[str], tage: int) -> int:
+        eintraege = []
+        for aufgabe, modul in self._aufgaben_fuer(aufgabe_ids):
+            neues_datum = faelligkeit_verschieben(aufgabe.faelligkeitsdatum, tage)
+            if neues_datum is not None:
+                eintraege.append(self._felder_setzen(modul, aufgabe, {"faelligkeitsdatum": neues_datum}))
+        return self._stapel_protokollieren(eintraege)
+
+    @_gesperrt
+    def aufgaben_loeschen(self, aufgabe_ids: Iterable[str]) -> int:
+        return self._stapel_protokollieren([
+            self._aufgabe_entfernen(modul, aufgabe) for aufgabe, modul in self._aufgaben_fuer(aufgabe_ids)
+        ])
+
+    # Im Journal als Löschen + Neuanlage im Zielmodul (mit derselben ID)
+    @_gesperrt
+    def aufgaben_verschieben(self, aufgabe_ids: Iterable[str], ziel: Modul) -> int:
+        if not self._aktuell(ziel):
+            return 0
+        eintraege = []
+        for aufgabe, modul in self._aufgaben_fuer(aufgabe_ids):
+            if modul is ziel:
+                continue
+            eintraege.append(self._aufgabe_entfernen(modul, aufgabe))
+            eintraege.append(self._aufgabe_anhaengen(ziel, aufgabe))
+        self._stapel_protokollieren(eintraege)
+        return len(eintraege) // 2
+
+    # Offene Aufgaben mit Fälligkeit im Bereich von..bis (jeweils einschließlich, None = offen),
+    # als sortierte Liste von (Datum, Aufgabe, Modul)
+    @_gesperrt
+    def faellige_aufgaben(self, von: Optional[date] = None, bis: Optional[date] = None):
+        if self._faelligkeiten is None:
+            self._faelligkeiten = FaelligkeitsIndex()
+            if self.speicher.kann_abfragen and not self.ladefehler:
+                # Nur offene Aufgaben mit Datum, über den Index der Datenbank statt über alle Aufgaben
+                self._faelligkeiten.aufbauen(filter(None, map(self.aufgabe_nach_id, self.speicher.offene_faellige_ids())))
+            else:
+                self._faelligkeiten.aufbauen((aufgabe, modul) for modul in self.module for aufgabe in modul.aufgaben)
+        return self._faelligkeiten.bereich(von, bis)
+
+    @_gesperrt
+    def suchindex(self) -> SuchIndex:
+        if self._suchindex is None:
+            self._suchindex = SuchIndex()
+            self._suchindex.aufbauen(self.module)
+        return self._suchindex
+
+    # Volltextsuche über Aufgabentitel, -beschreibung und Modulname (Wortanfänge, Groß-/Kleinschreibung und
+    # Umlaute egal), kombinierbar mit Filtern; Liste von (Aufgabe, Modul), nach Fälligkeit sortiert
+    @_gesperrt
+    def aufgaben_suchen(self, anfrage: str = "", prioritaet: Optional[str] = None, erledigt: Optional[bool] = None,
+                        von: Optional[date] = None, bis: Optional[date] = None, limit: Optional[int] = 200):
+        return self.suchindex().suchen(anfrage, prioritaet=prioritaet, erledigt=erledigt, von=von, bis=bis, limit=limit)
+
+    # Offene Aufgaben, die überfällig sind oder bis Ende des nächsten Monats fällig werden
+    @_gesperrt
+    def kalender_eintraege(self, heute: Optional[date] = None):
+        heute = heute or date.today()
+        jahr, monat = (heute.year + 1, 1) if heute.month == 12 else (heute.year, heute.month + 1)
+        return self.faellige_aufgaben(bis=date(jahr, monat, calendar.monthrange(jahr, monat)[1]))
+
+    # (ID, Name) aller Module für Auswahllisten; die Oberfläche liest damit nicht ohne Sperre über die Module
+    @_gesperrt
+    def modul_auswahl(self) -> List[Tuple[str, str]]:
+        return [(modul.id, modul.name) for modul in self.module]
+
+    # Kennzahlen für Dashboard und Modulliste: {"gesamt", "erledigt", "ueberfaellig", "module": [(anzahl, erledigt), ...]}
+    # Liest nur die nachgeführten Zähler, ohne Aufgaben zu durchlaufen
+    @_gesperrt
+    def dashboard_zahlen(self, heute: Optional[date] = None):
+        heute = heute or date.today()
+        gesamt, erledigt, ueberfaellig = self.gesamt_zaehler(heute)
+        return {
+            "gesamt": gesamt,
+            "erledigt": erledigt,
+            "ueberfaellig": ueberfaellig,
+            "module": [modul.zaehler(heute)[:2] for modul in self.module]
+        }
+
+    # Für einen Export: die ausgewählten Module und die Zahl ihrer Aufgaben. Unter der Sperre werden nur die Module
+    # gesammelt (die Anzahl steht fest im Modul), die Aufgabenlisten kopiert erst _export_aufgaben
+    @_gesperrt
+    def _export_module(self, modul_ids: Optional[Iterable[str]] = None) -> Tuple[List[Modul], int]:
+        modul_ids = set(modul_ids) if modul_ids else None
+        module = [modul for modul in self.module if modul_ids is None or modul.id in modul_ids]
+        return module, sum(modul.anzahl_aufgaben() for modul in module)
+
+    # (Modulname, Kopie der Aufgabenliste) pro Modul, erst wenn der Export beim Modul ankommt. Die Sperre wird je Modul
+    # nur für das Kopieren der Liste gehalten; noch nicht geladene Module bleiben Rohdaten, die Zeilen baut erst der
+    # Export-Thread (siehe csv_zeilen). Jedes Modul erscheint mit dem Stand, den es beim Kopieren hatte
+    def _export_aufgaben(self, module: List[Modul]) -> Iterator[Tuple[str, List]]:
+        for modul in module:
+            with self.sperre:
+                eintrag = (modul.name, modul.aufgaben_kopie())
+            yield eintrag
+
+    # Neben der Datendatei, im Mehrnutzer-Betrieb also im Verzeichnis des Nutzers
+    def _export_name(self, komprimieren: bool) -> str:
+        return os.path.join(os.path.dirname(self.datei_pfad),
+                            f"studienplaner_export_{date.today().isoformat()}.csv" + (".gz" if komprimieren else ""))
+
+    # Filter: modul_ids (Auswahl von Modulen), erledigt (True/False), von/bis (Fälligkeit, jeweils einschließlich)
+    @gemessen
+    def export_csv(self, modul_ids: Optional[Iterable[str]] = None, erledigt: Optional[bool] = None,
+                   von: Optional[date] = None, bis: Optional[date] = None, komprimieren: bool = False):
+        try:
+            module, _ = self._export_module(modul_ids)
+            datei_name = self._export_name(komprimieren)
+            csv_schreiben(csv_zeilen(self._export_aufgaben(module), erledigt=erledigt, von=von, bis=bis), datei_name, komprimieren)
+            return datei_name
+        except Exception as e:
+            print(f"Fehler beim CSV-Export: {e}")
+            return None
+
+    # Wie export_csv, aber in einem eigenen Thread; bei_fortschritt(geschrieben, gesamt) und
+    # bei_ende(datei_name oder None, fehler) werden aus diesem Thread aufgerufen
+    def export_csv_starten(self, bei_fortschritt=None, bei_ende=None, modul_ids: Optional[Iterable[str]] = None,
+                           erledigt: Optional[bool] = None, von: Optional[date] = None, bis: Optional[date] = None,
+                           komprimieren: bool = False) -> CsvExport:
+        module, gesamt = self._export_module(modul_ids)
+        return CsvExport(
+            self._export_aufgaben(module), self._export_name(komprimieren), gesamt, komprimieren,
+            bei_fortschritt=bei_fortschritt, bei_ende=bei_ende, erledigt=erledigt, von=von, bis=bis
+        ).starten()
+
+    # CSV-Import (Format des eigenen Exports oder eines Stundenplan-Exports, siehe datenaustausch.IMPORT_SPALTEN).
+    # Zeilen werden Modulen gleichen Namens zugeordnet (Groß-/Kleinschreibung und Umlaute egal), fehlende Module
+    # neu angelegt. Mit probelauf=True wird nur geprüft; sonst werden alle gültigen Zeilen in einem einzigen
+    # Journal-Eintrag übernommen. Gibt den Plan mit Bericht zurück (None, wenn die Datei nicht lesbar ist).
+    @gemessen
+    def csv_importieren(self, pfad: str, probelauf: bool = False, bei_fortschritt=None) -> Optional[ImportPlan]:
+        try:
+            plan = csv_import_lesen(pfad, bei_fortschritt=bei_fortschritt)
+        except Exception as e:
+            print(f"Fehler beim CSV-Import: {e}")
+            return None
+        # Das Lesen läuft ohne Sperre, erst das Übernehmen hält sie
+        with self.sperre:
+            return self._import_uebernehmen(plan, probelauf)
+
+    def _import_uebernehmen(self, plan: ImportPlan, probelauf: bool) -> ImportPlan:
+        vorhandene = {normalisieren(modul.name): modul for modul in self.module}
+        plan.neue_module = [name for schluessel, (name, _) in plan.module.items() if schluessel not in vorhandene]
+        if probelauf:
+            return plan
+
+        # Bei großen Importen ist Neuaufbauen billiger als Einsortieren jeder einzelnen Aufgabe
+        if plan.anzahl_aufgaben > 1000:
+            self._faelligkeiten = None
+            self._suchindex = None
+            if self._ics is not None:
+                self._ics.alles_veraltet()
+        eintraege = []
+        for schluessel, (name, aufgaben) in plan.module.items():
+            modul = vorhandene.get(schluessel)
+            if modul is None:
+                modul = vorhandene[schluessel] = Modul(name)
+                self._module[modul.id] = modul
+                self._modul_nachfuehren(modul, +1)
+                eintraege.append({"op": "modul_neu", "modul": modul.to_dict()})
+            for aufgabe in aufgaben:
+                eintraege.append(self._aufgabe_anhaengen(modul, aufgabe))
+        plan.importiert = self._stapel_protokollieren(eintraege) - len(plan.neue_module)
+        return plan
+
+    @property
+    def ics_aktiv(self) -> bool:
+        return self._ics is not None
+
+    # Bringt den Kalender-Feed auf den aktuellen Stand; nur geänderte Aufgaben werden neu serialisiert,
+    # die Datei wird nur geschrieben, wenn sich etwas geändert hat. Gibt den Pfad zurück (None bei Fehler).
+    @gemessen
+    @_gesperrt
+    def ics_aktualisieren(self, im_hintergrund: bool = False) -> Optional[str]:
+        try:
+            if self._ics is None:
+                self._ics = IcsFeed()
+            self._ics.nachfuehren(self.module, self.aufgabe_nach_id)
+            self._ics.schreiben(self.ics_pfad, im_hintergrund)
+            return self.ics_pfad
+        except Exception as e:
+            print(f"Fehler beim ICS-Export: {e}")
+            return None
+
+    # Sichert den aktuellen Stand; nur seit der letzten Sicherung geänderte Module werden neu geschrieben.
+    # Danach greift die Aufbewahrungsregel. Gibt den Pfad des Manifests zurück (None bei Fehler).
+    @gemessen
+    def backup_erstellen(self) -> Optional[str]:
+        self.ausstehendes_speichern()
+        try:
+            # Nur das Serialisieren geänderter Module braucht die Sperre, geschrieben wird ohne
+            with self.sperre:
+                vorbereitet = self.sicherungen.vorbereiten(self.module)
+            name, _ = self.sicherungen.schreiben(*vorbereitet)
+            self.sicherungen.aufraeumen()
+            return os.path.join(self.sicherungen.manifeste_pfad, name)
+        except Exception as e:
+            print(f"Fehler beim Backup: {e}")
+            return None
+
+    # Automatische Sicherung, z. B. beim Start: nur wenn die letzte älter als `stunden` ist
+    def backup_falls_faellig(self, stunden: float = 24) -> Optional[str]:
+        # Nach einem Ladefehler würde nur ein leerer Stand gesichert und ältere Sicherungen verdrängt
+        if self.ladefehler:
+            return None
+        namen = self.sicherungen.liste()
+        if namen and datetime.now() - self.sicherungen.zeitpunkt(namen[-1]) < timedelta(hours=stunden):
+            return None
+        return self.backup_erstellen()
+
+    # (Manifest-Name, Zeitpunkt), neueste zuerst
+    def backups(self) -> List[Tuple[str, datetime]]:
+        return [(name, self.sicherungen.zeitpunkt(name)) for name in reversed(self.sicherungen.liste())]
+
+    def backups_pruefen(self, namen: Optional[Iterable[str]] = None) -> List[str]:
+        try:
+            return self.sicherungen.pruefen(namen)
+        except Exception as e:
+            return [f"Fehler beim Prüfen der Backups: {e}"]
+
+    # Stellt den Stand der Sicherung `name` wieder her; der bisherige Stand wird vorher selbst gesichert.
+    # Unter der Sperre werden nur der bisherige und der neue Stand serialisiert und das Modell ausgetauscht,
+    # damit keine Änderung dazwischen verloren geht; Lesen und Schreiben laufen ohne Sperre.
+    @gemessen
+    def backup_wiederherstellen(self, name: str) -> bool:
+        self.ausstehendes_speichern()
+        try:
+            module = self.sicherungen.laden(name)
+            with self.sperre:
+                vorbereitet = self.sicherungen.vorbereiten(self.module)
+                self._daten_setzen(module)
+                self.ladefehler = None
+                self._snapshot_vormerken()
+        except Exception as e:
+            print(f"Fehler beim Wiederherstellen: {e}")
+            return False
+        try:
+            self.sicherungen.schreiben(*vorbereitet)
+        except Exception as e:
+            print(f"Fehler beim Sichern des bisherigen Stands: {e}")
+        self.ausstehendes_speichern()
+        return True
+
+
+# Geladene Apps nach Datendatei, zuletzt benutzte zuletzt. Passen nicht mehr alle in die Grenzen (Anzahl und
+# geschätzter Speicher), werden die am längsten unbenutzten verdrängt: Ausstehendes wird geschrieben, beim nächsten
+# Zugriff wird die Datei neu geladen. Apps, die noch eine Sitzung benutzt (holen() ohne freigeben()), bleiben.
+class AppCache:
+    def __init__(self, max_anzahl: int = 50, max_bytes: int = 512 * 1024 * 1024):
+        self.max_anzahl = max_anzahl
+        self.max_bytes = max_bytes
+        self._apps: "OrderedDict[str, StudienplanerApp]" = OrderedDict()
+        # Schlüssel → Zahl der Sitzungen, die die App gerade benutzen
+        self._benutzer: Dict[str, int] = {}
+        # Geschätzter Speicherbedarf pro Schlüssel (beim Laden und bei jedem freigeben() erneuert) und die Summe
+        self._bytes: Dict[str, int] = {}
+        self._belegt = 0
+        # Die globale Sperre schützt nur die Verwaltung; Laden und Schließen laufen ohne sie unter der Sperre
+        # des Schlüssels. So wartet ein Tab nur auf seine eigene Datei, und eine Datei wird nie gleichzeitig von
+        # einer verdrängten und einer neu geladenen App geschrieben. Reihenfolge: erst Schlüssel, dann global.
+        # Die Sperren pro Schlüssel bleiben bestehen (eine Lock-Instanz pro jemals benutzter Datei).
+        self._sperre = threading.Lock()
+        self._ladesperren: Dict[str, threading.Lock] = {}
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.verdraengt = 0
+
+    @staticmethod
+    def _schluessel(datei_pfad: str) -> str:
+        return os.path.abspath(datei_pfad)
+
+    def holen(self, datei_pfad: str, erzeugen) -> StudienplanerApp:
+        schluessel = self._schluessel(datei_pfad)
+        with self._sperre:
+            app = self._treffer(schluessel)
+            if app is not None:
+                return app
+            ladesperre = self._ladesperren.setdefault(schluessel, threading.Lock())
+        with ladesperre:
+            # Inzwischen von einer anderen Sitzung geladen?
+            with self._sperre:
+                app = self._treffer(schluessel)
+            if app is not None:
+                return app
+            app = erzeugen()
+            app.daten_laden()
+            bytes_geschaetzt = app.speicherbedarf()
+            with self._sperre:
+                self.fehlschlaege += 1
+                self._apps[schluessel] = app
+                self._benutzer[schluessel] = self._benutzer.get(schluessel, 0) + 1
+                self._bytes_setzen(schluessel, bytes_geschaetzt)
+                verdraengt = self._verdraengen()
+        self._schliessen(verdraengt)
+        return app
+
+    def _treffer(self, schluessel: str) -> Optional[StudienplanerApp]:
+        app = self._apps.get(schluessel)
+        if app is not None:
+            self.treffer += 1
+            self._apps.move_to_end(schluessel)
+            self._benutzer[schluessel] = self._benutzer.get(schluessel, 0) + 1
+        return app
+
+    def freigeben(self, app: StudienplanerApp):
+        schluessel = self._schluessel(app.datei_pfad)
+        bytes_geschaetzt = app.speicherbedarf()
+        with self._sperre:
+            if self._apps.get(schluessel) is not app:
+                return
+            anzahl = self._benutzer.get(schluessel, 0) - 1
+            if anzahl > 0:
+                self._benutzer[schluessel] = anzahl
+            else:
+                self._benutzer.pop(schluessel, None)
+            self._bytes_setzen(schluessel, bytes_geschaetzt)
+            verdraengt = self._verdraengen()
+        self._schliessen(verdraengt)
+
+    def _bytes_setzen(self, schluessel: str, bytes_geschaetzt: int):
+        self._belegt += bytes_geschaetzt - self._bytes.get(schluessel, 0)
+        self._bytes[schluessel] = bytes_geschaetzt
+
+    # Unter der globalen Sperre: nimmt Apps aus dem Cache und gibt sie mit bereits gehaltener Schlüssel-Sperre
+    # zurück; geschlossen werden sie danach ohne globale Sperre. Wird ein Schlüssel gerade geladen, bleibt er.
+    def _verdraengen(self) -> List[Tuple[StudienplanerApp, threading.Lock]]:
+        verdraengt = []
+        for schluessel in [schluessel for schluessel in self._apps if schluessel not in self._benutzer]:
+            if len(self._apps) <= self.max_anzahl and self._belegt <= self.max_bytes:
+                break
+            ladesperre = self._ladesperren[schluessel]
+            if not ladesperre.acquire(blocking=False):
+                continue
+            app = self._apps.pop(schluessel)
+            self._belegt -= self._bytes.pop(schluessel, 0)
+            self.verdraengt += 1
+            verdraengt.append((app, ladesperre))
+        return verdraengt
+
+    @staticmethod
+    def _schliessen(verdraengt: List[Tuple[StudienplanerApp, threading.Lock]]):
+        for app, ladesperre in verdraengt:
+            try:
+                app.schliessen()
+            finally:
+                ladesperre.release()
+
+    # Für Diagnose und Monitoring
+    def statistik(self) -> Dict:
+        with self._sperre:
+            return {
+                "geladen": len(self._apps),
+                "benutzt": len(self._benutzer),
+                "treffer": self.treffer,
+                "fehlschlaege": self.fehlschlaege,
+                "verdraengt": self.verdraengt,
+                "bytes_geschaetzt": self._belegt
+            }
+
+
+app_cache = AppCache(
+    int(os.environ.get("STUDIENPLANER_CACHE_ANZAHL", "50")),
+    int(os.environ.get("STUDIENPLANER_CACHE_MB", "512")) * 1024 * 1024
+)
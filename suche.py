@@ -0,0 +1,178 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from modell import Modul, Aufgabe
+
+_UMLAUTE = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_WORT = re.compile(r"\w+")
+
+
+# Kleinschreibung, Umlaute und ß nach DIN 5007-2 (ä → ae, ß → ss), übrige Akzente entfernt,
+# damit "Prüfung", "PRUEFUNG" und "pruefung" auf dasselbe Wort führen
+def normalisieren(text: str) -> str:
+    text = text.lower().translate(_UMLAUTE)
+    if not text.isascii():
+        text = "".join(zeichen for zeichen in unicodedata.normalize("NFKD", text) if not unicodedata.combining(zeichen))
+    return text
+
+
+def woerter(text: Optional[str]) -> Set[str]:
+    if not text:
+        return set()
+    return set(_WORT.findall(normalisieren(text)))
+
+
+# Invertierter Index über Titel und Beschreibung der Aufgaben sowie die Modulnamen.
+# - Wort → Aufgaben-IDs bzw. Modul-IDs, dazu eine sortierte Wortliste für die Präfixsuche per bisect
+# - alle Aufgaben zusätzlich in Ergebnisreihenfolge (Fälligkeit, Titel), damit breite Anfragen nach `limit`
+#   Treffern abbrechen können, statt alle Kandidaten zu sortieren
+# - wird wie der Fälligkeitsindex einmal aufgebaut und danach bei jeder Änderung nachgeführt
+#   (entfernen mit dem alten Stand, hinzufuegen mit dem neuen)
+class SuchIndex:
+    def __init__(self):
+        self._aufgaben: Dict[str, Tuple[Aufgabe, Modul]] = {}
+        self._reihenfolge: List[tuple] = []
+        self._reihenfolge_schluessel: Dict[str, tuple] = {}
+        self._aufgaben_woerter: Dict[str, Set[str]] = {}
+        self._treffer: Dict[str, Set[str]] = {}
+        self._modul_woerter: Dict[str, Set[str]] = {}
+        self._modul_treffer: Dict[str, Set[str]] = {}
+        self._modul_aufgaben: Dict[str, Set[str]] = {}
+        self._sortiert: List[str] = []
+
+    def __len__(self):
+        return len(self._aufgaben)
+
+    def aufbauen(self, module: Iterable[Modul]):
+        self.__init__()
+        for modul in module:
+            self.modul_hinzufuegen(modul, einsortieren=False)
+        self._reihenfolge = sorted(self._reihenfolge_schluessel.values())
+
+    @staticmethod
+    def _sortierschluessel(aufgabe: Aufgabe) -> tuple:
+        # Ohne Datum zuletzt
+        if aufgabe.faellig is None:
+            return (1, 0, aufgabe.titel, aufgabe.id)
+        return (0, aufgabe.faellig.toordinal(), aufgabe.titel, aufgabe.id)
+
+    def _eintragen(self, index: Dict[str, Set[str]], wort: str, schluessel: str):
+        if wort not in self._treffer and wort not in self._modul_treffer:
+            insort(self._sortiert, wort)
+        index.setdefault(wort, set()).add(schluessel)
+
+    def _austragen(self, index: Dict[str, Set[str]], wort: str, schluessel: str):
+        ids = index.get(wort)
+        if ids is None:
+            return
+        ids.discard(schluessel)
+        if not ids:
+            del index[wort]
+            if wort not in self._treffer and wort not in self._modul_treffer:
+                position = bisect_left(self._sortiert, wort)
+                if position < len(self._sortiert) and self._sortiert[position] == wort:
+                    del self._sortiert[position]
+
+    def hinzufuegen(self, aufgabe: Aufgabe, modul: Modul, einsortieren: bool = True):
+        aufgabe_woerter = woerter(aufgabe.titel) | woerter(aufgabe.beschreibung)
+        self._aufgaben[aufgabe.id] = (aufgabe, modul)
+        schluessel = self._reihenfolge_schluessel[aufgabe.id] = self._sortierschluessel(aufgabe)
+        if einsortieren:
+            insort(self._reihenfolge, schluessel)
+        self._aufgaben_woerter[aufgabe.id] = aufgabe_woerter
+        self._modul_aufgaben.setdefault(modul.id, set()).add(aufgabe.id)
+        for wort in aufgabe_woerter:
+            self._eintragen(self._treffer, wort, aufgabe.id)
+
+    def entfernen(self, aufgabe: Aufgabe):
+        eintrag = self._aufgaben.pop(aufgabe.id, None)
+        if eintrag is None:
+            return
+        self._modul_aufgaben.get(eintrag[1].id, set()).discard(aufgabe.id)
+        schluessel = self._reihenfolge_schluessel.pop(aufgabe.id)
+        position = bisect_left(self._reihenfolge, schluessel)
+        if position < len(self._reihenfolge) and self._reihenfolge[position] == schluessel:
+            del self._reihenfolge[position]
+        for wort in self._aufgaben_woerter.pop(aufgabe.id, ()):
+            self._austragen(self._treffer, wort, aufgabe.id)
+
+    def modul_hinzufuegen(self, modul: Modul, einsortieren: bool = True):
+        self._modul_woerter[modul.id] = woerter(modul.name)
+        for wort in self._modul_woerter[modul.id]:
+            self._eintragen(self._modul_treffer, wort, modul.id)
+        for aufgabe in modul.aufgaben:
+            self.hinzufuegen(aufgabe, modul, einsortieren)
+
+    def modul_entfernen(self, modul: Modul):
+        for aufgabe_id in list(self._modul_aufgaben.pop(modul.id, ())):
+            self.entfernen(self._aufgaben[aufgabe_id][0])
+        for wort in self._modul_woerter.pop(modul.id, ()):
+            self._austragen(self._modul_treffer, wort, modul.id)
+
+    # Nach einer Umbenennung nur die Wörter des Modulnamens neu eintragen
+    def modul_umbenennen(self, modul: Modul):
+        for wort in self._modul_woerter.pop(modul.id, ()):
+            self._austragen(self._modul_treffer, wort, modul.id)
+        self._modul_woerter[modul.id] = woerter(modul.name)
+        for wort in self._modul_woerter[modul.id]:
+            self._eintragen(self._modul_treffer, wort, modul.id)
+
+    def _praefix(self, praefix: str) -> Iterable[str]:
+        position = bisect_left(self._sortiert, praefix)
+        while position < len(self._sortiert) and self._sortiert[position].startswith(praefix):
+            yield self._sortiert[position]
+            position += 1
+
+    # Aufgaben-IDs, bei denen ein Wort in Titel, Beschreibung oder Modulname mit `praefix` beginnt
+    def _ids_fuer(self, praefix: str) -> Set[str]:
+        ids: Set[str] = set()
+        for wort in self._praefix(praefix):
+            ids.update(self._treffer.get(wort, ()))
+            for modul_id in self._modul_treffer.get(wort, ()):
+                ids.update(self._modul_aufgaben.get(modul_id, ()))
+        return ids
+
+    # (Aufgabe, Modul) für alle Aufgaben, die jedes Wort der Anfrage (als Präfix) enthalten und alle Filter erfüllen.
+    # Sortiert nach Fälligkeit (ohne Datum zuletzt), höchstens `limit` Treffer.
+    def suchen(self, anfrage: str = "", prioritaet: Optional[str] = None, erledigt: Optional[bool] = None,
+               von: Optional[date] = None, bis: Optional[date] = None, limit: Optional[int] = 200) -> List[Tuple[Aufgabe, Modul]]:
+        kandidaten: Optional[Set[str]] = None
+        # Längste Präfixe zuerst (meist die seltensten), damit die Schnittmenge schnell klein wird
+        for praefix in sorted(set(_WORT.findall(normalisieren(anfrage))), key=len, reverse=True):
+            ids = self._ids_fuer(praefix)
+            kandidaten = ids if kandidaten is None else kandidaten & ids
+            if not kandidaten:
+                return []
+
+        filtern = prioritaet is not None or erledigt is not None or von is not None or bis is not None
+
+        def passt(aufgabe: Aufgabe) -> bool:
+            return ((prioritaet is None or aufgabe.prioritaet == prioritaet)
+                    and (erledigt is None or aufgabe.erledigt == erledigt)
+                    and (von is None or (aufgabe.faellig is not None and aufgabe.faellig >= von))
+                    and (bis is None or (aufgabe.faellig is not None and aufgabe.faellig <= bis)))
+
+        # Wenige Kandidaten: direkt sortieren
+        if kandidaten is not None and (limit is None or len(kandidaten) <= 4 * limit):
+            ergebnis = sorted(self._reihenfolge_schluessel[aufgabe_id] for aufgabe_id in kandidaten)
+            treffer = [self._aufgaben[schluessel[3]] for schluessel in ergebnis]
+            if filtern:
+                treffer = [(aufgabe, modul) for aufgabe, modul in treffer if passt(aufgabe)]
+            return treffer if limit is None else treffer[:limit]
+
+        # Viele Kandidaten (oder nur Filter): in Ergebnisreihenfolge laufen, bis `limit` Treffer beisammen sind
+        treffer = []
+        for schluessel in self._reihenfolge:
+            aufgabe_id = schluessel[3]
+            if kandidaten is not None and aufgabe_id not in kandidaten:
+                continue
+            eintrag = self._aufgaben[aufgabe_id]
+            if filtern and not passt(eintrag[0]):
+                continue
+            treffer.append(eintrag)
+            if limit is not None and len(treffer) >= limit:
+                break
+        return treffer